@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Benchmark every DataSource implementation against synthetic decks.
+
+For each deck size and source this measures:
+- load_seconds: constructing the source
+- first_query_seconds: the first get_questions() call (for Google Sheets this
+  includes the fetch and parse, served by an in-memory stub client)
+- get_questions_per_second / get_all_questions_per_second: lookup throughput
+- peak_memory_bytes / retained_memory_bytes: tracemalloc peak during load and
+  first query, and what is still allocated afterwards (measured in a separate
+  pass so tracing does not distort the timings). The stub sheet's cells are
+  allocated before tracing starts, so Sheets figures exclude the downloaded
+  cell strings that the catalog goes on to share
+
+Usage:
+    python -m benchmarks.bench_data_sources
+    python -m benchmarks.bench_data_sources --sizes 1000 100000 --compare old.json
+
+Results are written as JSON (default: benchmarks/results/bench-<version>.json)
+so runs can be compared between releases with --compare.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from src.data_sources import DataSource
+from src.data_sources.csv_source import CSVDataSource
+from src.data_sources.sheets_source import GoogleSheetsDataSource
+from src.version import get_version
+
+from .deckgen import sheet_rows, theme_count, write_csv_deck
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 3
+# Lookups per throughput measurement
+DEFAULT_LOOKUPS = 200_000
+RESULTS_DIR = Path(__file__).parent / "results"
+
+SOURCES = ("csv", "google_sheets")
+_METRICS = (
+    "load_seconds",
+    "first_query_seconds",
+    "get_questions_per_second",
+    "get_all_questions_per_second",
+    "peak_memory_bytes",
+    "retained_memory_bytes",
+)
+_STUB_CREDENTIALS = json.dumps({"type": "service_account", "client_email": "bench@example.com"})
+
+
+@contextmanager
+def _stub_sheets(rows: list[list[str]]) -> Iterator[None]:
+    """Serve rows from an in-memory stand-in for the gspread client."""
+    worksheet = SimpleNamespace(get_all_values=lambda: rows)
+    client = SimpleNamespace(
+        open_by_key=lambda key: SimpleNamespace(worksheet=lambda name: worksheet),
+        http_client=SimpleNamespace(
+            get_file_drive_metadata=lambda sheet_id: {"modifiedTime": "2026-01-01T00:00:00Z"}
+        ),
+    )
+    with (
+        patch("src.data_sources.sheets_source.gspread.authorize", return_value=client),
+        patch("src.data_sources.sheets_source.service_account"),
+    ):
+        yield
+
+
+def _factories(data_dir: Path) -> dict[str, Callable[[], DataSource]]:
+    fallback = CSVDataSource()  # bundled deck; only used if the stub fetch fails
+    return {
+        "csv": lambda: CSVDataSource(data_dir),
+        "google_sheets": lambda: GoogleSheetsDataSource(
+            sheet_id="benchmark", credentials_json=_STUB_CREDENTIALS, csv_fallback=fallback
+        ),
+    }
+
+
+def _throughput(call: Callable[[int], object], lookups: int) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        call(i)
+    return lookups / (time.perf_counter() - start)
+
+
+def measure(
+    factory: Callable[[], DataSource], questions: int, repeat: int, lookups: int
+) -> dict[str, float]:
+    """Benchmark one source on one deck; timings are the best of repeat runs."""
+    theme_ids = [f"theme-{i:05d}" for i in range(theme_count(questions))]
+    load = first_query = float("inf")
+    source: DataSource | None = None
+    for _ in range(repeat):
+        source = None
+        gc.collect()
+        start = time.perf_counter()
+        source = factory()
+        loaded = time.perf_counter()
+        deck = source.get_questions(theme_ids[0])
+        queried = time.perf_counter()
+        load = min(load, loaded - start)
+        first_query = min(first_query, queried - loaded)
+        if not deck:
+            raise RuntimeError(f"{type(source).__name__} returned no questions")
+    assert source is not None
+
+    get_questions = source.get_questions
+    get_all_questions = source.get_all_questions
+    n_themes = len(theme_ids)
+    questions_rate = _throughput(lambda i: get_questions(theme_ids[i % n_themes]), lookups)
+    all_questions_rate = _throughput(lambda i: get_all_questions(), lookups)
+
+    source = None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        source = factory()
+        source.get_questions(theme_ids[0])
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "load_seconds": load,
+        "first_query_seconds": first_query,
+        "get_questions_per_second": questions_rate,
+        "get_all_questions_per_second": all_questions_rate,
+        "peak_memory_bytes": peak,
+        "retained_memory_bytes": retained,
+    }
+
+
+def run(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    sources: tuple[str, ...] = SOURCES,
+    repeat: int = DEFAULT_REPEAT,
+    lookups: int = DEFAULT_LOOKUPS,
+) -> dict[str, Any]:
+    """Run the suite and return the results document."""
+    results: list[dict[str, Any]] = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="table-talks-bench-") as tmp:
+            data_dir = Path(tmp)
+            write_csv_deck(data_dir, size)
+            rows = sheet_rows(size)
+            factories = _factories(data_dir)
+            with _stub_sheets(rows):
+                for name in sources:
+                    print(f"  {name:<14} {size:>9,} questions ...", file=sys.stderr, flush=True)
+                    metrics = measure(factories[name], size, repeat, lookups)
+                    results.append(
+                        {
+                            "source": name,
+                            "questions": size,
+                            "themes": theme_count(size),
+                            **metrics,
+                        }
+                    )
+            del rows
+    return {
+        "version": get_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "repeat": repeat,
+        "lookups": lookups,
+        "results": results,
+    }
+
+
+def _format_value(metric: str, value: float) -> str:
+    if metric.endswith("_bytes"):
+        return f"{value / 2**20:.1f} MiB"
+    if metric.endswith("_per_second"):
+        return f"{value:,.0f}/s"
+    return f"{value * 1000:.2f} ms"
+
+
+def report(document: dict[str, Any], baseline: dict[str, Any] | None = None) -> str:
+    """Return a text table of results, with ratios to baseline when given."""
+    baseline = baseline or {}
+    previous = {(r["source"], r["questions"]): r for r in baseline.get("results", [])}
+    lines: list[str] = []
+    for result in document["results"]:
+        key = (result["source"], result["questions"])
+        lines.append(f"{result['source']} - {result['questions']:,} questions")
+        for metric in _METRICS:
+            line = f"  {metric:<30} {_format_value(metric, result[metric]):>16}"
+            old = previous.get(key, {}).get(metric)
+            if old:
+                line += f"  ({result[metric] / old:.2f}x vs {baseline.get('version')})"
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Deck sizes"
+    )
+    parser.add_argument(
+        "--sources", nargs="+", choices=SOURCES, default=list(SOURCES), help="Sources to run"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing runs")
+    parser.add_argument(
+        "--lookups", type=int, default=DEFAULT_LOOKUPS, help="Calls per throughput test"
+    )
+    parser.add_argument("--output", "-o", type=Path, help="JSON results file")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    document = run(tuple(args.sizes), tuple(args.sources), args.repeat, args.lookups)
+    output: Path = args.output or RESULTS_DIR / f"bench-{document['version']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None
+    print(report(document, baseline))
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Synthetic deck generation for benchmarks.
+
+Decks are deterministic for a given size and seed, spread questions across
+many themes, and come in both layouts the data sources read: themes.csv plus
+questions.csv for CSVDataSource, and the denormalized rows of a Google Sheet.
+"""
+
+import csv
+import random
+from collections.abc import Iterator
+from pathlib import Path
+
+# One theme per this many questions (at least MIN_THEMES)
+QUESTIONS_PER_THEME = 1000
+MIN_THEMES = 10
+
+SHEET_HEADER = ["theme_id", "theme_label", "theme_description", "question"]
+
+_WORDS = (
+    "what when where who why how favorite memory moment place friend family dream "
+    "together learn change remember laugh share trust hope surprise gift story"
+).split()
+
+
+def theme_count(questions: int) -> int:
+    """Return the number of themes a deck of this many questions is spread over."""
+    return max(MIN_THEMES, questions // QUESTIONS_PER_THEME)
+
+
+def _themes(count: int) -> list[tuple[str, str, str]]:
+    return [(f"theme-{i:05d}", f"Theme {i}", f"Synthetic theme number {i}") for i in range(count)]
+
+
+def _questions(questions: int, themes: int, seed: int) -> Iterator[tuple[int, str]]:
+    """Yield (theme index, question text) pairs."""
+    rng = random.Random(seed)
+    for i in range(questions):
+        words = " ".join(rng.choices(_WORDS, k=rng.randint(6, 14)))
+        yield rng.randrange(themes), f"Q{i}: {words.capitalize()}?"
+
+
+def write_csv_deck(data_dir: Path, questions: int, seed: int = 0) -> None:
+    """Write themes.csv and questions.csv with this many questions into data_dir."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    themes = _themes(theme_count(questions))
+    with open(data_dir / "themes.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "label", "description"])
+        writer.writerows(themes)
+    with open(data_dir / "questions.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["theme_id", "question"])
+        writer.writerows(
+            (themes[index][0], text) for index, text in _questions(questions, len(themes), seed)
+        )
+
+
+def sheet_rows(questions: int, seed: int = 0) -> list[list[str]]:
+    """Return the rows get_all_values() would return for a sheet with this deck."""
+    themes = _themes(theme_count(questions))
+    rows = [list(SHEET_HEADER)]
+    for index, text in _questions(questions, len(themes), seed):
+        theme_id, label, description = themes[index]
+        rows.append([theme_id, label, description, text])
+    return rows
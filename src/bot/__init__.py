@@ -1,5 +1,5 @@
 """Table Talks Telegram bot package."""
 
-from .app import build_application
+from .app import build_application, run_polling, run_webhook
 
-__all__ = ["build_application"]
+__all__ = ["build_application", "run_polling", "run_webhook"]
@@ -1,12 +1,21 @@
 """Application building and lifecycle management."""
 
-import asyncio
 import logging
+import re
+import time
+from collections import OrderedDict
 from typing import Any
+from urllib.parse import urlsplit
 
-from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ContextTypes
+from telegram import Update
+from telegram.ext import Application, CommandHandler, ContextTypes
 
+from ..health import register_readiness_probe
+from ..logging_setup import ErrorAggregator
+from .broadcast import DEFAULT_BROADCAST_DEADLINE, broadcast
+from .coalesce import DEFAULT_NAV_COALESCE_DELAY, NavigationCoalescer
 from .constants import (
+    ACTIVE_SESSIONS_KEY,
     CALLBACK_BACK_TO_HOME,
     CALLBACK_BOT_INFO,
     CALLBACK_END_SESSION,
@@ -18,9 +27,10 @@ from .constants import (
     CALLBACK_RANDOM_MIX,
     CALLBACK_START_SESSION,
     CALLBACK_SUPPORT,
-    CALLBACK_THEME_PREFIX,
+    CALLBACK_THEME,
     CHAT_IDS_KEY,
     DEFAULT_BOT_VERSION,
+    NAVIGATION_STATS_KEY,
     OFFLINE_MESSAGE,
 )
 from .handlers import (
@@ -30,6 +40,7 @@ from .handlers import (
     new_topic,
     next_card,
     previous_card,
+    profile_command,
     random_mix_chosen,
     show_bot_info,
     show_home,
@@ -38,68 +49,163 @@ from .handlers import (
     start_session,
     theme_chosen,
 )
+from .loop_monitor import DEFAULT_LOOP_BLOCK_THRESHOLD, DEFAULT_LOOP_WEDGED_AFTER, LoopMonitor
+from .outbound import DEFAULT_GLOBAL_RATE, OutboundScheduler
+from .profiler import DEFAULT_PROFILE_DIR, DEFAULT_PROFILE_SAMPLE_RATE, UpdateProfiler
+from .router import CallbackRouter
+from .sweeper import (
+    DEFAULT_MAX_TRACKED_CHATS,
+    DEFAULT_SESSION_IDLE_TTL,
+    DEFAULT_SESSION_SWEEP_INTERVAL,
+    SessionSweeper,
+    evict_untracked_chats,
+    get_active_sessions,
+    get_tracked_chats,
+)
+from .update_processor import DEFAULT_MAX_CONCURRENT_UPDATES, ChatOrderedUpdateProcessor
 
 logger = logging.getLogger(__name__)
 
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+DEFAULT_WEBHOOK_LISTEN = "0.0.0.0"
+DEFAULT_WEBHOOK_PORT = 8443
+DEFAULT_WEBHOOK_MAX_CONNECTIONS = 40
+
+# Telegram accepts 1-256 characters from this set as a webhook secret token
+_WEBHOOK_SECRET_RE = re.compile(r"^[A-Za-z0-9_-]{1,256}$")
+
 AppType = Application[Any, Any, Any, Any, Any, Any]
 
 
+def check_webhook_secret(secret: str | None) -> None:
+    """Raise ValueError unless secret is None or a token Telegram accepts."""
+    if secret is not None and not _WEBHOOK_SECRET_RE.match(secret):
+        raise ValueError("Webhook secret must be 1-256 characters of A-Z, a-z, 0-9, _ or -")
+
+
 async def on_error(
     update: object,
     context: ContextTypes.DEFAULT_TYPE,
 ) -> None:
-    """Handle errors in bot handlers."""
+    """Handle errors in bot handlers.
+
+    Repeats of the same error are counted rather than logged until the
+    aggregation window passes; the next log line reports how many were skipped.
+    """
     err = context.error
     if err is None:
         return
-    chat_id = context.bot_data.get("_last_chat_id") if hasattr(context, "bot_data") else None
-    logger.exception("Handler error | chat_id=%s | error=%s", chat_id, err)
+    # Updates run concurrently, so take the chat from the failing update itself
+    chat = update.effective_chat if isinstance(update, Update) else None
+    chat_id = chat.id if chat is not None else None
+    aggregator: ErrorAggregator | None = context.bot_data.get("_error_aggregator")
+    repeats = aggregator.record((type(err).__name__, str(err))) if aggregator else 0
+    if repeats is None:
+        return
+    fields: dict[str, object] = {"chat_id": chat_id, "error_type": type(err).__name__}
+    if repeats:
+        fields["repeats_suppressed"] = repeats
+    logger.error(
+        "Handler error | chat_id=%s | error=%s",
+        chat_id,
+        err,
+        exc_info=err,
+        extra={"fields": fields},
+    )
+
+
+def log_suppressed_errors(app: AppType) -> None:
+    """Log the repeats of aggregated handler errors not yet reported."""
+    aggregator: ErrorAggregator | None = app.bot_data.get("_error_aggregator")
+    if aggregator is None:
+        return
+    # Keys are (error type, message), as recorded by on_error
+    for (error_type, message), repeats in aggregator.flush():
+        logger.error(
+            "Handler error repeated | error=%s | repeats=%d",
+            message,
+            repeats,
+            extra={"fields": {"error_type": error_type, "repeats_suppressed": repeats}},
+        )
+
+
+async def on_startup(app: AppType) -> None:
+    """Start background maintenance tasks once the event loop is running."""
+    evict_untracked_chats(app)
+    monitor: LoopMonitor | None = app.bot_data.get("_loop_monitor")
+    if monitor is not None:
+        monitor.start()
+    sweeper: SessionSweeper | None = app.bot_data.get("_session_sweeper")
+    if sweeper is not None:
+        sweeper.start(app)
+
+
+async def on_stop(app: AppType) -> None:
+    """Stop background tasks, then tell active chats the bot is going offline.
+
+    Error repeats still pending aggregation are logged last.
+    """
+    sweeper: SessionSweeper | None = app.bot_data.get("_session_sweeper")
+    if sweeper is not None:
+        await sweeper.stop()
+    await notify_going_offline(app)
+    monitor: LoopMonitor | None = app.bot_data.get("_loop_monitor")
+    if monitor is not None:
+        await monitor.stop()
+    profiler: UpdateProfiler | None = app.bot_data.get("_profiler")
+    if profiler is not None:
+        await profiler.flush()
+    log_suppressed_errors(app)
 
 
 async def notify_going_offline(app: AppType) -> None:
-    """Send 'going offline' to tracked chats with active sessions.
+    """Send 'going offline' to chats with active sessions.
 
-    Runs in post_stop so the bot is still usable.
+    Enumerates the active-session index only, so the cost is proportional to
+    live sessions rather than every chat ever seen. Messages are fanned out
+    concurrently within Telegram's rate limits and the call returns once all
+    in-flight sends finish or the shutdown deadline passes. Runs in post_stop
+    so the bot is still usable.
     """
-    raw = app.bot_data.get(CHAT_IDS_KEY)
-    chat_ids: set[int] = raw if isinstance(raw, set) else set()  # type: ignore[assignment]
+    chat_ids = list(get_active_sessions(app))
     if not chat_ids:
-        logger.info("Shutdown: no chats to notify")
+        logger.info("Shutdown: no active sessions to notify")
         return
-    notified = 0
-    skipped = 0
-    for cid in chat_ids:
-        # Check if chat has an active session
-        chat_data = app.chat_data.get(cid)
-        has_active_session = False
-        if chat_data and isinstance(chat_data, dict):
-            # Session is active if user has selected a theme or has questions loaded
-            session_data: dict[str, object] = chat_data  # type: ignore[assignment]
-            has_active_session = bool(
-                session_data.get("theme_id") or session_data.get("shuffled_questions")
-            )
-
-        if not has_active_session:
-            skipped += 1
-            logger.debug("Shutdown: skipping chat_id=%s (no active session)", cid)
-            continue
-
-        try:
-            await app.bot.send_message(chat_id=cid, text=OFFLINE_MESSAGE)
-            notified += 1
-        except Exception as e:
-            logger.warning("Shutdown: failed to notify chat_id=%s: %s", cid, e)
-    # Let the send requests flush before shutdown tears down the HTTP client
-    if notified:
-        await asyncio.sleep(1.0)
+    not_active = max(0, len(get_tracked_chats(app)) - len(chat_ids))
+    deadline: float = app.bot_data.get("shutdown_notify_deadline", DEFAULT_BROADCAST_DEADLINE)
+    result = await broadcast(app.bot, chat_ids, OFFLINE_MESSAGE, deadline=deadline)
     logger.info(
         "Shutdown: notified %d chat(s) that bot is going offline "
-        "(skipped %d without active sessions)",
-        notified,
-        skipped,
+        "(failed %d, skipped %d at deadline, %d without active sessions)",
+        result.delivered,
+        result.failed,
+        result.skipped,
+        not_active,
     )
 
 
+def readiness(app: AppType) -> tuple[bool, dict[str, object]]:
+    """Report whether the application is running and receiving updates.
+
+    Ready while the application runs and, if it has an updater (polling or
+    webhook), while the updater does. Also reports when the last update was
+    processed; a quiet bot is not considered unready.
+    """
+    updater_running = app.updater.running if app.updater is not None else None
+    processor = app.update_processor
+    last = (
+        processor.last_processed_at if isinstance(processor, ChatOrderedUpdateProcessor) else None
+    )
+    details: dict[str, object] = {
+        "running": app.running,
+        "updater_running": updater_running,
+        "last_update_at": last,
+        "last_update_age": time.time() - last if last is not None else None,
+    }
+    return app.running and updater_running is not False, details
+
+
 def build_application(
     token: str,
     secret: str | None = None,
@@ -109,15 +215,71 @@ def build_application(
     changelog: str | None = None,
     coffee_link: str | None = None,
     deployment_time: str | None = None,
+    session_idle_ttl: float = DEFAULT_SESSION_IDLE_TTL,
+    session_sweep_interval: float = DEFAULT_SESSION_SWEEP_INTERVAL,
+    max_tracked_chats: int = DEFAULT_MAX_TRACKED_CHATS,
+    shutdown_notify_deadline: float = DEFAULT_BROADCAST_DEADLINE,
+    max_concurrent_updates: int = DEFAULT_MAX_CONCURRENT_UPDATES,
+    nav_coalesce_delay: float = DEFAULT_NAV_COALESCE_DELAY,
+    outbound_rate: float = DEFAULT_GLOBAL_RATE,
+    loop_block_threshold: float = DEFAULT_LOOP_BLOCK_THRESHOLD,
+    loop_wedged_after: float = DEFAULT_LOOP_WEDGED_AFTER,
+    profile_sample_rate: float = DEFAULT_PROFILE_SAMPLE_RATE,
+    profile_dir: str = DEFAULT_PROFILE_DIR,
+    with_updater: bool = True,
 ) -> AppType:
-    """Build and configure the Telegram bot application."""
-    app: AppType = (
+    """Build and configure the Telegram bot application.
+
+    Chats idle for longer than session_idle_ttl seconds are evicted every
+    session_sweep_interval seconds (0 disables the sweeper), and at most
+    max_tracked_chats recently active chats are tracked. Shutdown notices
+    stop being sent shutdown_notify_deadline seconds after stopping begins.
+    Up to max_concurrent_updates updates from different chats are handled
+    concurrently; updates from the same chat are handled one at a time, in order.
+    Rapid Next/Back taps are folded into one message edit, waiting up to
+    nav_coalesce_delay extra seconds for further taps. All Bot API calls pass
+    through an OutboundScheduler limited to outbound_rate requests per second.
+    Event loop stalls longer than loop_block_threshold seconds are logged with
+    the blocking handler (0 disables the monitor), and GET /health fails while
+    the loop has been stalled for loop_wedged_after seconds.
+    A profile_sample_rate fraction of updates is profiled into profile_dir;
+    the creator can change the rate at runtime with /profile.
+    When serving a webhook, secret is the token Telegram must send in the
+    X-Telegram-Bot-Api-Secret-Token header; other requests are rejected.
+    Pass with_updater=False for workers that are fed updates by another
+    process through app.update_queue.
+    """
+    check_webhook_secret(secret)
+    profiler = UpdateProfiler(sample_rate=profile_sample_rate, output_dir=profile_dir)
+    builder = (
         Application.builder()
         .token(token)
-        .post_stop(notify_going_offline)  # type: ignore[arg-type]
-        .build()
+        .concurrent_updates(ChatOrderedUpdateProcessor(max_concurrent_updates, profiler))
+        .rate_limiter(OutboundScheduler(global_rate=outbound_rate))
+        .post_init(on_startup)  # type: ignore[arg-type]
+        .post_stop(on_stop)  # type: ignore[arg-type]
+    )
+    if not with_updater:
+        builder = builder.updater(None)
+    app: AppType = builder.build()
+    app.bot_data[CHAT_IDS_KEY] = OrderedDict()
+    app.bot_data[ACTIVE_SESSIONS_KEY] = set()
+    app.bot_data["max_tracked_chats"] = max_tracked_chats
+    app.bot_data["shutdown_notify_deadline"] = shutdown_notify_deadline
+    app.bot_data["_webhook_secret"] = secret
+    app.bot_data["_navigation_coalescer"] = NavigationCoalescer(
+        delay=nav_coalesce_delay, stats=app.bot_data.setdefault(NAVIGATION_STATS_KEY, {})
+    )
+    app.bot_data["_session_sweeper"] = SessionSweeper(
+        idle_ttl=session_idle_ttl,
+        interval=session_sweep_interval,
+        housekeeping=log_suppressed_errors,
+    )
+    app.bot_data["_profiler"] = profiler
+    app.bot_data["_error_aggregator"] = ErrorAggregator()
+    app.bot_data["_loop_monitor"] = LoopMonitor(
+        threshold=loop_block_threshold, wedged_after=loop_wedged_after
     )
-    app.bot_data[CHAT_IDS_KEY] = set()
     if env:
         app.bot_data["env"] = env
         logger.info("Application built for %s environment", env)
@@ -130,22 +292,68 @@ def build_application(
     app.bot_data["deployment_time"] = deployment_time or "Unknown"
     # Register command handlers
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("profile", profile_command))
 
-    # Register existing callback handlers
-    app.add_handler(CallbackQueryHandler(theme_chosen, pattern=f"^{CALLBACK_THEME_PREFIX}"))
-    app.add_handler(CallbackQueryHandler(random_mix_chosen, pattern=f"^{CALLBACK_RANDOM_MIX}$"))
-    app.add_handler(CallbackQueryHandler(next_card, pattern=f"^{CALLBACK_NEXT}$"))
-    app.add_handler(CallbackQueryHandler(previous_card, pattern=f"^{CALLBACK_PREVIOUS}$"))
-    app.add_handler(CallbackQueryHandler(new_topic, pattern=f"^{CALLBACK_NEW_TOPIC}$"))
-    app.add_handler(CallbackQueryHandler(end_session, pattern=f"^{CALLBACK_END_SESSION}$"))
-
-    # Register new home page callback handlers
-    app.add_handler(CallbackQueryHandler(show_home, pattern=f"^{CALLBACK_HOME}$"))
-    app.add_handler(CallbackQueryHandler(start_session, pattern=f"^{CALLBACK_START_SESSION}$"))
-    app.add_handler(CallbackQueryHandler(show_bot_info, pattern=f"^{CALLBACK_BOT_INFO}$"))
-    app.add_handler(CallbackQueryHandler(show_support, pattern=f"^{CALLBACK_SUPPORT}$"))
-    app.add_handler(CallbackQueryHandler(handle_exit, pattern=f"^{CALLBACK_EXIT}$"))
-    app.add_handler(CallbackQueryHandler(back_to_home, pattern=f"^{CALLBACK_BACK_TO_HOME}$"))
+    # Route all callback queries through one handler and a dict lookup
+    router = CallbackRouter()
+    router.add(CALLBACK_THEME, theme_chosen)
+    router.add(CALLBACK_RANDOM_MIX, random_mix_chosen)
+    router.add(CALLBACK_NEXT, next_card)
+    router.add(CALLBACK_PREVIOUS, previous_card)
+    router.add(CALLBACK_NEW_TOPIC, new_topic)
+    router.add(CALLBACK_END_SESSION, end_session)
+    router.add(CALLBACK_HOME, show_home)
+    router.add(CALLBACK_START_SESSION, start_session)
+    router.add(CALLBACK_BOT_INFO, show_bot_info)
+    router.add(CALLBACK_SUPPORT, show_support)
+    router.add(CALLBACK_EXIT, handle_exit)
+    router.add(CALLBACK_BACK_TO_HOME, back_to_home)
+    app.add_handler(router.handler())
 
     app.add_error_handler(on_error)
+    register_readiness_probe("application", lambda: readiness(app))
     return app
+
+
+def run_polling(app: AppType) -> None:
+    """Fetch updates by long polling until the process is stopped."""
+    app.run_polling(allowed_updates=ALLOWED_UPDATES)
+
+
+def run_webhook(
+    app: AppType,
+    webhook_url: str,
+    listen: str = DEFAULT_WEBHOOK_LISTEN,
+    port: int = DEFAULT_WEBHOOK_PORT,
+    url_path: str | None = None,
+    max_connections: int = DEFAULT_WEBHOOK_MAX_CONNECTIONS,
+) -> None:
+    """Serve updates from Telegram's webhook until the process is stopped.
+
+    Registers webhook_url with Telegram and receives updates on an embedded
+    HTTP server at listen:port. Requests are verified against the secret
+    passed to build_application(). The webhook is left registered on
+    shutdown so Telegram queues updates until the next start.
+
+    Args:
+        app: Application from build_application()
+        webhook_url: Public HTTPS URL Telegram posts updates to
+        listen: Local address to bind
+        port: Local port to bind
+        url_path: Local path to serve; defaults to the path of webhook_url
+        max_connections: Maximum simultaneous connections Telegram may open (1-100)
+    """
+    if url_path is None:
+        url_path = urlsplit(webhook_url).path
+    secret = app.bot_data.get("_webhook_secret")
+    if not secret:
+        logger.warning("Webhook secret not set; update requests will not be verified")
+    app.run_webhook(
+        listen=listen,
+        port=port,
+        url_path=url_path.strip("/"),
+        webhook_url=webhook_url,
+        secret_token=secret,
+        max_connections=max_connections,
+        allowed_updates=ALLOWED_UPDATES,
+    )
@@ -0,0 +1,145 @@
+"""Concurrent, rate-limited message fan-out (e.g. shutdown notices)."""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from telegram import Bot
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+
+from .outbound import PRIORITY_BULK, OutboundScheduler, _retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 30 messages/second overall; stay a little below it
+DEFAULT_BROADCAST_RATE = 25.0
+DEFAULT_BROADCAST_CONCURRENCY = 10
+DEFAULT_BROADCAST_DEADLINE = 20.0
+DEFAULT_BROADCAST_RETRIES = 2
+
+
+@dataclass
+class BroadcastResult:
+    """Outcome counts of one broadcast."""
+
+    delivered: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+class _Pacer:
+    """Hands out send slots at a fixed global rate; can be paused on flood control."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next_slot = 0.0
+
+    async def wait_for_slot(self, deadline: float) -> bool:
+        """Sleep until the next slot; False if that slot would be past the deadline."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        if slot >= deadline:
+            return False
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Push every later slot back by at least seconds from now."""
+        resume_at = asyncio.get_running_loop().time() + seconds
+        self._next_slot = max(self._next_slot, resume_at)
+
+
+async def broadcast(
+    bot: Bot,
+    chat_ids: Iterable[int],
+    text: str,
+    *,
+    rate: float = DEFAULT_BROADCAST_RATE,
+    concurrency: int = DEFAULT_BROADCAST_CONCURRENCY,
+    deadline: float = DEFAULT_BROADCAST_DEADLINE,
+    max_retries: int = DEFAULT_BROADCAST_RETRIES,
+) -> BroadcastResult:
+    """Send text to many chats with bounded concurrency and a global rate limit.
+
+    Each chat receives a single message, so Telegram's per-chat limit cannot be
+    exceeded. When the bot's requests go through an OutboundScheduler, it
+    paces the sends (behind interactive traffic) and retries flood control.
+    Otherwise sends are paced at rate per second here, and on RetryAfter all
+    senders pause for the requested time and the message is retried up to
+    max_retries times. Chats that cannot be attempted before the deadline are
+    counted as skipped. Returns once every in-flight request has completed.
+
+    Args:
+        bot: Bot used to send
+        chat_ids: Recipients
+        text: Message text
+        rate: Maximum messages per second across all chats (without a scheduler)
+        concurrency: Maximum requests in flight
+        deadline: Seconds from now after which no new sends are started
+        max_retries: Retries per chat after RetryAfter (without a scheduler)
+
+    Returns:
+        Delivered, failed, and skipped counts
+    """
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    # Let the outbound scheduler queue these behind interactive traffic
+    send_kwargs: dict[str, Any] = (
+        {"rate_limit_args": PRIORITY_BULK} if isinstance(bot, ExtBot) else {}
+    )
+    scheduled = isinstance(bot, ExtBot) and isinstance(bot.rate_limiter, OutboundScheduler)
+    pacer = None if scheduled else _Pacer(rate)
+    retries = 0 if scheduled else max_retries
+    result = BroadcastResult()
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for chat_id in chat_ids:
+        queue.put_nowait(chat_id)
+
+    async def send_one(chat_id: int) -> None:
+        for attempt in range(retries + 1):
+            if pacer is not None:
+                started = await pacer.wait_for_slot(stop_at)
+            else:
+                started = loop.time() < stop_at
+            if not started:
+                result.skipped += 1
+                return
+            remaining = stop_at - loop.time()
+            try:
+                await asyncio.wait_for(
+                    bot.send_message(chat_id=chat_id, text=text, **send_kwargs), remaining
+                )
+            except RetryAfter as e:
+                wait = _retry_after_seconds(e)
+                logger.warning(
+                    "Broadcast: flood control for chat_id=%s (retry after %.1fs)", chat_id, wait
+                )
+                if pacer is not None:
+                    pacer.pause(wait)
+                if attempt == retries:
+                    result.failed += 1
+                continue
+            except Exception as e:
+                logger.warning("Broadcast: failed to send to chat_id=%s: %s", chat_id, e)
+                result.failed += 1
+                return
+            result.delivered += 1
+            return
+
+    async def worker() -> None:
+        while True:
+            try:
+                chat_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await send_one(chat_id)
+
+    workers = [loop.create_task(worker()) for _ in range(max(1, min(concurrency, queue.qsize())))]
+    await asyncio.gather(*workers)
+    return result
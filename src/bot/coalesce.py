@@ -0,0 +1,140 @@
+"""Coalescing of rapid card navigation into as few message edits as possible."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from telegram import CallbackQuery, InlineKeyboardMarkup
+from telegram.error import BadRequest
+from telegram.ext import Application
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds to wait for more taps before editing; 0 edits immediately and
+# only coalesces taps that arrive while an edit is in flight
+DEFAULT_NAV_COALESCE_DELAY = 0.0
+
+Rendered = tuple[str, InlineKeyboardMarkup]
+# (chat_id, message_id) of a card message
+_MessageKey = tuple[int, int | None]
+
+_EDITS = metrics.counter(
+    "table_talks_navigation_edits_total",
+    "Card edits requested by navigation taps: sent, failed, or saved by coalescing",
+    ["result"],
+)
+_EDITS_SENT = _EDITS.labels("sent")
+_EDITS_FAILED = _EDITS.labels("failed")
+_EDITS_SAVED = _EDITS.labels("saved")
+
+
+class _PendingEdit:
+    """Latest navigation state of one card message."""
+
+    __slots__ = ("query", "render", "dirty", "displayed", "taps")
+
+    def __init__(
+        self, query: CallbackQuery, render: Callable[[], Rendered | None], displayed: str | None
+    ):
+        self.query = query
+        self.render = render
+        self.dirty = True
+        self.displayed = displayed
+        self.taps = 1
+
+
+class NavigationCoalescer:
+    """Apply every navigation tap at once but edit the card message lazily.
+
+    Handlers update the session and answer the callback query for each tap,
+    then call request(). One edit task per message renders the state as of when
+    it runs; taps arriving while it waits or while an edit is in flight are
+    folded into a single follow-up edit. Edits that would not change the
+    message are skipped, so "message is not modified" is never provoked.
+
+    Counts are kept in stats: taps, edits sent, edits that failed, and
+    edits saved (taps that did not need an edit of their own).
+    """
+
+    def __init__(
+        self, delay: float = DEFAULT_NAV_COALESCE_DELAY, stats: dict[str, int] | None = None
+    ):
+        self.delay = delay
+        self.stats: dict[str, int] = stats if stats is not None else {}
+        for key in ("taps", "edits", "edits_failed", "edits_saved"):
+            self.stats.setdefault(key, 0)
+        self._pending: dict[_MessageKey, _PendingEdit] = {}
+
+    def request(
+        self,
+        application: Application[Any, Any, Any, Any, Any, Any],
+        chat_id: int,
+        query: CallbackQuery,
+        render: Callable[[], Rendered | None],
+    ) -> None:
+        """Schedule an edit of the query's message to whatever render() returns.
+
+        Args:
+            application: Runs the edit task, so stopping it waits for the edit
+            chat_id: Chat the message belongs to
+            query: Latest callback query on the message (used to edit it)
+            render: Returns the text and keyboard to show, or None to leave
+                the message alone (e.g. the session has since ended)
+        """
+        self.stats["taps"] += 1
+        message = query.message
+        key = (chat_id, getattr(message, "message_id", None))
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry.query = query
+            entry.render = render
+            entry.dirty = True
+            entry.taps += 1
+            return
+        displayed = getattr(message, "text", None)
+        entry = self._pending[key] = _PendingEdit(query, render, displayed)
+        application.create_task(self._run(key, entry), name=f"navigation-edit-{chat_id}")
+
+    @property
+    def pending_edits(self) -> int:
+        """Number of messages with an edit scheduled or in flight."""
+        return len(self._pending)
+
+    async def _run(self, key: _MessageKey, entry: _PendingEdit) -> None:
+        chat_id = key[0]
+        sent = failed = 0
+        try:
+            while entry.dirty:
+                if self.delay > 0:
+                    await asyncio.sleep(self.delay)
+                entry.dirty = False
+                rendered = entry.render()
+                if rendered is None or rendered[0] == entry.displayed:
+                    continue
+                text, markup = rendered
+                try:
+                    await entry.query.edit_message_text(text=text, reply_markup=markup)
+                except BadRequest as e:
+                    if "not modified" not in str(e).lower():
+                        logger.warning("Card edit failed for chat_id=%s: %s", chat_id, e)
+                        failed += 1
+                        continue
+                except Exception as e:
+                    logger.warning("Card edit failed for chat_id=%s: %s", chat_id, e)
+                    failed += 1
+                    continue
+                entry.displayed = text
+                sent += 1
+        finally:
+            del self._pending[key]
+            # Taps arriving from here on start a new entry, so this one's count is final
+            saved = entry.taps - sent - failed
+            self.stats["edits"] += sent
+            self.stats["edits_failed"] += failed
+            self.stats["edits_saved"] += saved
+            _EDITS_SENT.inc(sent)
+            _EDITS_FAILED.inc(failed)
+            _EDITS_SAVED.inc(saved)
@@ -1,23 +1,56 @@
 """Constants used across the bot."""
 
-# Callback data prefixes/patterns
-CALLBACK_THEME_PREFIX = "theme:"
-CALLBACK_NEXT = "next"
-CALLBACK_PREVIOUS = "previous"
-CALLBACK_NEW_TOPIC = "new_topic"
-CALLBACK_END_SESSION = "end_session"
+# Callback data: "<version><action>[:<argument>]", e.g. "1t:faith".
+# One-character action codes leave nearly all of Telegram's 64 bytes for the
+# argument; bump CALLBACK_VERSION when the encoding changes and keep decoding
+# older buttons (see LEGACY_CALLBACKS) for messages already sent.
+CALLBACK_VERSION = "1"
+CALLBACK_ARG_SEPARATOR = ":"
+
+# Card actions
+CALLBACK_THEME = "1t"
+CALLBACK_THEME_PREFIX = CALLBACK_THEME + CALLBACK_ARG_SEPARATOR
+CALLBACK_NEXT = "1n"
+CALLBACK_PREVIOUS = "1p"
+CALLBACK_NEW_TOPIC = "1c"
+CALLBACK_END_SESSION = "1e"
+CALLBACK_RANDOM_MIX = "1r"
 
 # Home page actions
-CALLBACK_HOME = "home"
-CALLBACK_START_SESSION = "start_session"
-CALLBACK_BOT_INFO = "bot_info"
-CALLBACK_SUPPORT = "support"
-CALLBACK_EXIT = "exit"
-CALLBACK_BACK_TO_HOME = "back_to_home"
-CALLBACK_RANDOM_MIX = "random_mix"
+CALLBACK_HOME = "1h"
+CALLBACK_START_SESSION = "1s"
+CALLBACK_BOT_INFO = "1i"
+CALLBACK_SUPPORT = "1$"
+CALLBACK_EXIT = "1x"
+CALLBACK_BACK_TO_HOME = "1b"
+
+# Unversioned callback data used by buttons sent before compact encoding
+LEGACY_CALLBACK_THEME_PREFIX = "theme:"
+LEGACY_CALLBACKS = {
+    "next": CALLBACK_NEXT,
+    "previous": CALLBACK_PREVIOUS,
+    "new_topic": CALLBACK_NEW_TOPIC,
+    "end_session": CALLBACK_END_SESSION,
+    "random_mix": CALLBACK_RANDOM_MIX,
+    "home": CALLBACK_HOME,
+    "start_session": CALLBACK_START_SESSION,
+    "bot_info": CALLBACK_BOT_INFO,
+    "support": CALLBACK_SUPPORT,
+    "exit": CALLBACK_EXIT,
+    "back_to_home": CALLBACK_BACK_TO_HOME,
+}
+
+# Session theme_id used for the all-themes shuffled deck
+RANDOM_MIX_THEME_ID = "random_mix"
+
+# Decks larger than this are shuffled lazily (O(1) per session start)
+LAZY_SHUFFLE_THRESHOLD = 2048
 
 # Bot data keys
 CHAT_IDS_KEY = "chat_ids"
+ACTIVE_SESSIONS_KEY = "active_sessions"
+SESSION_STATS_KEY = "session_stats"
+NAVIGATION_STATS_KEY = "navigation_stats"
 
 # Messages
 OFFLINE_MESSAGE = "The bot is going offline. Try again later."
@@ -59,5 +92,10 @@ Stay tuned for public availability!"""
 
 EXIT_MESSAGE = "Thanks for using Table Talks! Send /start anytime to return."
 
+PROFILE_STATUS_MESSAGE = (
+    "Profile sample rate: {rate:g} ({profiled} update(s) profiled so far, written to {path})"
+)
+PROFILE_USAGE_MESSAGE = "Usage: /profile [RATE|off], e.g. /profile 0.05 to profile 5% of updates"
+
 # Configuration defaults (can be overridden by env vars)
 DEFAULT_BOT_VERSION = "v0.1.0"
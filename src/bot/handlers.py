@@ -1,26 +1,48 @@
 """Bot command and callback handlers."""
 
-import random
+import time
 from typing import Any
 
-from telegram import Update
+from telegram import InlineKeyboardMarkup, Update
 from telegram.ext import Application, ContextTypes
 
-from ..data_loader import Theme, get_questions, get_themes
+from .. import metrics
+from ..data_loader import Catalog, get_catalog
+from .coalesce import NavigationCoalescer
 from .constants import (
     BOT_INFO_MESSAGE,
-    CALLBACK_THEME_PREFIX,
     DEFAULT_BOT_VERSION,
     EXIT_MESSAGE,
     HOME_WELCOME_MESSAGE,
+    PROFILE_STATUS_MESSAGE,
+    PROFILE_USAGE_MESSAGE,
+    RANDOM_MIX_THEME_ID,
     SUPPORT_CREATOR_MESSAGE,
 )
 from .keyboards import back_to_home_keyboard, home_keyboard, navigation_keyboard, theme_keyboard
+from .profiler import UpdateProfiler
 from .rate_limit import rate_limit
-from .session import format_card, get_session, log_action, track_chat
+from .session import (
+    SessionDict,
+    clear_session,
+    format_card,
+    get_session,
+    is_creator,
+    log_action,
+    mark_session_active,
+    mark_session_ended,
+    start_deck,
+    sync_deck,
+)
 
 AppType = Application[Any, Any, Any, Any, Any, Any]
 
+_CARDS = metrics.counter("table_talks_cards_total", "Cards shown, by delivery path", ["path"])
+_CARDS_SENT = _CARDS.labels("send")
+_SEND_CARD_SECONDS = metrics.histogram(
+    "table_talks_send_card_duration_seconds", "Time to render and send or edit a card"
+).labels()
+
 
 @rate_limit("command")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -28,11 +50,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if update.message is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
-    session = get_session(context)
-    session["theme_id"] = None
-    session["index"] = 0
-    session["shuffled_questions"] = []
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
     log_action(update, "start")
     await update.message.reply_text(
         HOME_WELCOME_MESSAGE,
@@ -40,33 +59,81 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     )
 
 
+def _move_to_card(session: SessionDict, catalog: Catalog, index: int) -> int | None:
+    """Move the session to the card at position index (wrapping around the deck).
+
+    Returns:
+        The card's position in the deck, or None if the deck is empty
+    """
+    sync_deck(session, catalog)
+    order = session.get("order", ())
+    if not session.get("theme_id") or not order:
+        return None
+    idx = index % len(order)
+    session["index"] = idx + 1
+    return idx
+
+
+def _render_card(
+    session: SessionDict, catalog: Catalog, index: int
+) -> tuple[str, InlineKeyboardMarkup]:
+    """Move the session to the card at position index and return its text and keyboard.
+
+    Question text is resolved from the current catalog at render time.
+    """
+    idx = _move_to_card(session, catalog, index)
+    theme_id = session.get("theme_id")
+    if idx is None or not theme_id:
+        return "No questions in this theme yet.", theme_keyboard()
+    text = format_card(catalog, theme_id, session.get("order", ()), idx)
+    # Show back button only if not on first question
+    return text, navigation_keyboard(show_back=idx > 0)
+
+
 async def send_card(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    shuffled_questions: list[str],
     index: int,
-    theme_labels: list[str] | None = None,
 ) -> None:
-    """Send a question card to the user."""
-    if not shuffled_questions:
-        text = "No questions in this theme yet."
-        markup = theme_keyboard()
-    else:
-        total = len(shuffled_questions)
-        idx = index % total
-        text = format_card(shuffled_questions, idx, theme_labels)
-        # Show back button only if not on first question
-        show_back = idx > 0
-        markup = navigation_keyboard(show_back=show_back)
-        session = get_session(context)
-        session["index"] = idx + 1
-        session["shuffled_questions"] = shuffled_questions
-        if theme_labels:
-            session["theme_labels"] = theme_labels
-    if update.callback_query is not None:
-        await update.callback_query.edit_message_text(text=text, reply_markup=markup)
-    elif update.message is not None:
-        await update.message.reply_text(text, reply_markup=markup)
+    """Send the card at position index of the session's deck to the user."""
+    _CARDS_SENT.inc()
+    start = time.perf_counter()
+    try:
+        text, markup = _render_card(get_session(context), get_catalog(), index)
+        if update.callback_query is not None:
+            await update.callback_query.edit_message_text(text=text, reply_markup=markup)
+        elif update.message is not None:
+            await update.message.reply_text(text, reply_markup=markup)
+    finally:
+        _SEND_CARD_SECONDS.observe(time.perf_counter() - start)
+
+
+async def navigate_to_card(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    index: int,
+) -> None:
+    """Move to the card at position index, coalescing the edit with other taps.
+
+    The session changes immediately; the message is edited by the chat's
+    NavigationCoalescer, which folds rapid taps into one edit.
+    """
+    query = update.callback_query
+    coalescer: NavigationCoalescer | None = context.bot_data.get("_navigation_coalescer")
+    if query is None or update.effective_chat is None or coalescer is None:
+        await send_card(update, context, index)
+        return
+    session = get_session(context)
+    _move_to_card(session, get_catalog(), index)
+    theme_id = session.get("theme_id")
+
+    def render() -> tuple[str, InlineKeyboardMarkup] | None:
+        # Leave the message alone if the deck was ended or replaced meanwhile
+        if session.get("theme_id") != theme_id or not session.get("order"):
+            return None
+        return _render_card(session, get_catalog(), session.get("index", 1) - 1)
+
+    coalescer.request(context.application, update.effective_chat.id, query, render)
 
 
 @rate_limit("theme_selection")
@@ -76,25 +143,19 @@ async def theme_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
-    if not query.data or not query.data.startswith(CALLBACK_THEME_PREFIX):
+    # Set by the callback router from the data after the action code
+    if not context.args:
         return
-    theme_id = query.data[len(CALLBACK_THEME_PREFIX) :].strip()
-    themes: list[Theme] = get_themes()
-    if not any(t["id"] == theme_id for t in themes):
+    theme_id = context.args[0].strip()
+    catalog = get_catalog()
+    if catalog.get_theme(theme_id) is None:
         log_action(update, "theme_chosen_invalid", theme_id=theme_id)
         return
     log_action(update, "theme_chosen", theme_id=theme_id)
-    questions = get_questions(theme_id)
-    shuffled: list[str] = questions.copy()
-    random.shuffle(shuffled)
-    session = get_session(context)
-    session["theme_id"] = theme_id
-    session["index"] = 0
-    session["shuffled_questions"] = shuffled
-    session["theme_labels"] = None  # Clear labels for single-theme mode
-    await send_card(update, context, shuffled, 0)
+    start_deck(get_session(context), catalog, theme_id)
+    mark_session_active(app, update)
+    await send_card(update, context, 0)
 
 
 @rate_limit("theme_selection")
@@ -104,37 +165,15 @@ async def random_mix_chosen(update: Update, context: ContextTypes.DEFAULT_TYPE)
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
 
     log_action(update, "random_mix_chosen")
 
-    # Get all questions with their theme IDs
-    from ..data_loader import get_all_questions, get_themes
-
-    all_questions = get_all_questions()
-
-    # Shuffle questions
-    shuffled_pairs = all_questions.copy()
-    random.shuffle(shuffled_pairs)
-
-    # Separate into parallel lists
-    questions = [q for _, q in shuffled_pairs]
-    theme_ids = [tid for tid, _ in shuffled_pairs]
-
-    # Get theme labels for display
-    themes = get_themes()
-    theme_map = {t["id"]: t["label"] for t in themes}
-    theme_labels = [theme_map.get(tid, "Unknown") for tid in theme_ids]
-
-    # Store in session
-    session = get_session(context)
-    session["theme_id"] = "random_mix"
-    session["index"] = 0
-    session["shuffled_questions"] = questions
-    session["theme_labels"] = theme_labels
-
-    await send_card(update, context, questions, 0, theme_labels)
+    # Shuffle positions into the shared all-questions deck; labels are
+    # resolved from the catalog when each card is rendered
+    start_deck(get_session(context), get_catalog(), RANDOM_MIX_THEME_ID)
+    mark_session_active(app, update)
+    await send_card(update, context, 0)
 
 
 @rate_limit("card_navigation")
@@ -143,12 +182,9 @@ async def next_card(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     if query is None:
         return
-    app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
     session = get_session(context)
-    shuffled = session.get("shuffled_questions", [])
-    if not shuffled:
+    if not session.get("order"):
         log_action(update, "next_card_no_theme")
         await query.edit_message_text(
             "Choose a theme first.",
@@ -157,8 +193,7 @@ async def next_card(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     log_action(update, "next_card", theme_id=str(session.get("theme_id", "")))
     next_index = session.get("index", 0)
-    theme_labels = session.get("theme_labels")
-    await send_card(update, context, shuffled, next_index, theme_labels)
+    await navigate_to_card(update, context, next_index)
 
 
 @rate_limit("card_navigation")
@@ -167,12 +202,9 @@ async def previous_card(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     query = update.callback_query
     if query is None:
         return
-    app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
     session = get_session(context)
-    shuffled = session.get("shuffled_questions", [])
-    if not shuffled:
+    if not session.get("order"):
         log_action(update, "previous_card_no_theme")
         await query.edit_message_text(
             "Choose a theme first.",
@@ -183,8 +215,7 @@ async def previous_card(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     # Go back: current index points to next card, so go back 2 positions
     prev_index = max(0, current_index - 2)
     log_action(update, "previous_card", theme_id=str(session.get("theme_id", "")))
-    theme_labels = session.get("theme_labels")
-    await send_card(update, context, shuffled, prev_index, theme_labels)
+    await navigate_to_card(update, context, prev_index)
 
 
 @rate_limit("callback")
@@ -194,13 +225,10 @@ async def new_topic(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     log_action(update, "new_topic")
     await query.answer()
-    session = get_session(context)
-    session["theme_id"] = None
-    session["index"] = 0
-    session["shuffled_questions"] = []
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
     await query.edit_message_text(
         "Choose a theme to get conversation cards. Each card is one question.",
         reply_markup=theme_keyboard(),
@@ -214,13 +242,10 @@ async def end_session(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     log_action(update, "end_session")
     await query.answer()
-    session = get_session(context)
-    session["theme_id"] = None
-    session["index"] = 0
-    session["shuffled_questions"] = []
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
     await query.edit_message_text(
         "Thanks for playing! Send /start to begin a new session.",
     )
@@ -230,13 +255,10 @@ async def end_session(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 async def show_home(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Display the home page with main menu options."""
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
 
     # Clear theme session state when returning home
-    session = get_session(context)
-    session.pop("theme_id", None)
-    session.pop("index", None)
-    session.pop("shuffled_questions", None)
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
 
     log_action(update, "show_home")
 
@@ -261,16 +283,13 @@ async def start_session(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
 
     log_action(update, "start_session")
 
     # Clear session state
-    session = get_session(context)
-    session.pop("theme_id", None)
-    session.pop("index", None)
-    session.pop("shuffled_questions", None)
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
 
     await query.edit_message_text(
         text="Choose a theme to get conversation cards. Each card is one question.",
@@ -285,7 +304,6 @@ async def show_bot_info(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
 
     log_action(update, "show_bot_info")
@@ -315,7 +333,6 @@ async def show_support(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
 
     log_action(update, "show_support")
@@ -338,16 +355,13 @@ async def handle_exit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     if query is None:
         return
     app: AppType = context.application  # type: ignore[assignment]
-    track_chat(app, update)
     await query.answer()
 
     log_action(update, "handle_exit")
 
     # Clear all session state
-    session = get_session(context)
-    session.pop("theme_id", None)
-    session.pop("index", None)
-    session.pop("shuffled_questions", None)
+    clear_session(get_session(context))
+    mark_session_ended(app, update)
 
     await query.edit_message_text(text=EXIT_MESSAGE)
 
@@ -356,3 +370,33 @@ async def handle_exit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
 async def back_to_home(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Return to home page from any location."""
     await show_home(update, context)
+
+
+@rate_limit("command")
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show or change the profiling sample rate (creator only).
+
+    /profile shows the current state, /profile RATE samples that fraction of
+    updates and /profile off stops profiling and writes what was collected.
+    """
+    if update.message is None or not is_creator(update, context):
+        return
+    app: AppType = context.application  # type: ignore[assignment]
+    profiler: UpdateProfiler | None = app.bot_data.get("_profiler")
+    if profiler is None:
+        return
+    args = context.args or []
+    if args:
+        try:
+            profiler.sample_rate = 0.0 if args[0].lower() == "off" else float(args[0])
+        except ValueError:
+            await update.message.reply_text(PROFILE_USAGE_MESSAGE)
+            return
+        if profiler.sample_rate == 0:
+            await profiler.flush()
+        log_action(update, "profile", rate=str(profiler.sample_rate))
+    await update.message.reply_text(
+        PROFILE_STATUS_MESSAGE.format(
+            rate=profiler.sample_rate, profiled=profiler.profiled, path=profiler.path
+        )
+    )
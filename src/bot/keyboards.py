@@ -4,7 +4,7 @@ import logging
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-from ..data_loader import Theme, get_themes
+from ..data_loader import Catalog, get_catalog
 from .constants import (
     CALLBACK_BACK_TO_HOME,
     CALLBACK_BOT_INFO,
@@ -45,15 +45,14 @@ def is_valid_callback_data(callback_data: str) -> bool:
     return True
 
 
-def theme_keyboard() -> InlineKeyboardMarkup:
+def _build_theme_keyboard(catalog: Catalog) -> InlineKeyboardMarkup:
     """Build keyboard with theme selection buttons and back to home button.
 
     Validates callback_data and skips themes with invalid IDs.
     """
-    themes: list[Theme] = get_themes()
     buttons = []
 
-    for t in themes:
+    for t in catalog.themes:
         callback_data = f"{CALLBACK_THEME_PREFIX}{t['id']}"
 
         # Validate callback data
@@ -73,7 +72,7 @@ def theme_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
-def home_keyboard() -> InlineKeyboardMarkup:
+def _build_home_keyboard() -> InlineKeyboardMarkup:
     """Build the home page keyboard with main menu options."""
     buttons = [
         [InlineKeyboardButton("🎯 Select Theme", callback_data=CALLBACK_START_SESSION)],
@@ -84,13 +83,13 @@ def home_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
-def back_to_home_keyboard() -> InlineKeyboardMarkup:
+def _build_back_to_home_keyboard() -> InlineKeyboardMarkup:
     """Build keyboard with just a 'Back to Home' button."""
     buttons = [[InlineKeyboardButton("🏠 Back to Home", callback_data=CALLBACK_BACK_TO_HOME)]]
     return InlineKeyboardMarkup(buttons)
 
 
-def navigation_keyboard(show_back: bool = True) -> InlineKeyboardMarkup:
+def _build_navigation_keyboard(show_back: bool) -> InlineKeyboardMarkup:
     """Build keyboard with navigation and action buttons."""
     buttons: list[list[InlineKeyboardButton]] = []
     # Navigation row with back and next
@@ -104,3 +103,43 @@ def navigation_keyboard(show_back: bool = True) -> InlineKeyboardMarkup:
     buttons.append([InlineKeyboardButton("🔄 New Topic", callback_data=CALLBACK_NEW_TOPIC)])
     buttons.append([InlineKeyboardButton("🚪 End Session", callback_data=CALLBACK_END_SESSION)])
     return InlineKeyboardMarkup(buttons)
+
+
+# Markups are immutable once built, so one instance is shared by all updates
+_HOME_KEYBOARD = _build_home_keyboard()
+_BACK_TO_HOME_KEYBOARD = _build_back_to_home_keyboard()
+_NAVIGATION_KEYBOARD = _build_navigation_keyboard(show_back=True)
+_NAVIGATION_KEYBOARD_NO_BACK = _build_navigation_keyboard(show_back=False)
+
+# (catalog version, markup); replaced with a single assignment when the deck changes
+_theme_keyboard_cache: tuple[int, InlineKeyboardMarkup] | None = None
+
+
+def theme_keyboard() -> InlineKeyboardMarkup:
+    """Return the theme selection keyboard for the current catalog.
+
+    Built once per catalog version and reused until the deck is reloaded.
+    """
+    global _theme_keyboard_cache
+    catalog = get_catalog()
+    cached = _theme_keyboard_cache
+    if cached is not None and cached[0] == catalog.version:
+        return cached[1]
+    markup = _build_theme_keyboard(catalog)
+    _theme_keyboard_cache = (catalog.version, markup)
+    return markup
+
+
+def home_keyboard() -> InlineKeyboardMarkup:
+    """Return the home page keyboard with main menu options."""
+    return _HOME_KEYBOARD
+
+
+def back_to_home_keyboard() -> InlineKeyboardMarkup:
+    """Return keyboard with just a 'Back to Home' button."""
+    return _BACK_TO_HOME_KEYBOARD
+
+
+def navigation_keyboard(show_back: bool = True) -> InlineKeyboardMarkup:
+    """Return keyboard with navigation and action buttons."""
+    return _NAVIGATION_KEYBOARD if show_back else _NAVIGATION_KEYBOARD_NO_BACK
@@ -0,0 +1,185 @@
+"""Event loop lag measurement and detection of blocking calls."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from types import FrameType
+
+from .. import metrics
+from ..health import register_health_check, unregister_health_check
+
+logger = logging.getLogger(__name__)
+
+# Seconds between lag probes; a blocked loop is noticed within one probe
+DEFAULT_LOOP_LAG_INTERVAL = 0.1
+# A loop stalled this long (seconds) has its stack sampled and logged; 0 disables the monitor
+DEFAULT_LOOP_BLOCK_THRESHOLD = 0.25
+# A loop stalled this long (seconds) makes GET /health report unhealthy
+DEFAULT_LOOP_WEDGED_AFTER = 10.0
+# Recent lag samples kept for percentiles (about 100s at the default interval)
+LAG_SAMPLES = 1024
+# Innermost frames included in a logged stack sample
+STACK_SAMPLE_DEPTH = 12
+
+_PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+# Gauges are refreshed every this many probes rather than on each one
+_PUBLISH_EVERY = 10
+_HANDLER_MODULE = __name__.rsplit(".", 1)[0] + ".handlers"
+_PACKAGE = __name__.split(".", 1)[0]
+
+_LAG_SECONDS = metrics.histogram(
+    "table_talks_event_loop_lag_seconds",
+    "Delay between when the lag probe was due and when it ran",
+).labels()
+_LAG_QUANTILES = metrics.gauge(
+    "table_talks_event_loop_lag_quantile_seconds",
+    "Recent event loop lag percentiles",
+    ["quantile"],
+)
+_BLOCKED = metrics.counter(
+    "table_talks_event_loop_blocked_total",
+    "Event loop stalls longer than the blocking threshold, by handler",
+    ["handler"],
+)
+
+
+def blocking_function(frame: FrameType | None) -> str:
+    """Name the code responsible for a stack, innermost frame first.
+
+    Prefers the outermost function in the bot's handlers module, then the
+    innermost function in this package, then the innermost function at all.
+    """
+    handler = None
+    own = None
+    innermost = None
+    while frame is not None:
+        code = frame.f_code
+        module = str(frame.f_globals.get("__name__", ""))
+        if innermost is None:
+            innermost = f"{module}.{code.co_name}"
+        if own is None and (module == _PACKAGE or module.startswith(_PACKAGE + ".")):
+            own = f"{module}.{code.co_name}"
+        if module == _HANDLER_MODULE:
+            handler = code.co_name
+        frame = frame.f_back
+    return handler or own or innermost or "unknown"
+
+
+class LoopMonitor:
+    """Measure event loop lag and report what is running while the loop is blocked.
+
+    A task in the loop sleeps for interval seconds and records how late it
+    wakes up. A watchdog thread checks that task's heartbeat; when the loop
+    has been stalled for threshold seconds it samples the loop thread's stack
+    and logs the handler responsible (once per stall). While a stall exceeds
+    wedged_after seconds, GET /health reports unhealthy.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_LOOP_BLOCK_THRESHOLD,
+        wedged_after: float = DEFAULT_LOOP_WEDGED_AFTER,
+        interval: float = DEFAULT_LOOP_LAG_INTERVAL,
+    ):
+        self.threshold = threshold
+        self.wedged_after = wedged_after
+        self.interval = interval
+        self._samples: deque[float] = deque(maxlen=LAG_SAMPLES)
+        self._heartbeat = time.monotonic()
+        self._reported_heartbeat: float | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self.stats: dict[str, int] = {"blocked": 0}
+
+    def start(self) -> None:
+        """Start probing; call from within the running event loop."""
+        if self._task is not None or self.threshold <= 0:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        register_health_check("event_loop", self.health_problem)
+
+    async def stop(self) -> None:
+        """Stop the probe task and the watchdog thread."""
+        if self._task is None:
+            return
+        unregister_health_check("event_loop")
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog = None
+
+    async def _run(self) -> None:
+        probes = 0
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - start - self.interval)
+            self._samples.append(lag)
+            _LAG_SECONDS.observe(lag)
+            probes += 1
+            if probes % _PUBLISH_EVERY == 0:
+                for name, value in self.percentiles().items():
+                    _LAG_QUANTILES.labels(name).set(value)
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.interval):
+            heartbeat = self._heartbeat
+            stalled = self.blocked_for()
+            if stalled < self.threshold or heartbeat == self._reported_heartbeat:
+                continue
+            self._reported_heartbeat = heartbeat
+            self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        culprit = blocking_function(frame)
+        stack = traceback.format_list(traceback.extract_stack(frame)[-STACK_SAMPLE_DEPTH:])
+        self.stats["blocked"] += 1
+        _BLOCKED.labels(culprit).inc()
+        logger.warning(
+            "Event loop blocked for %.2fs in %s; stack sample:\n%s",
+            stalled,
+            culprit,
+            "".join(stack).rstrip(),
+        )
+
+    def blocked_for(self) -> float:
+        """Seconds the loop has currently been stalled (0 if probes are on time)."""
+        if self._task is None:
+            return 0.0
+        return max(0.0, time.monotonic() - self._heartbeat - self.interval)
+
+    def percentiles(self) -> dict[str, float]:
+        """Return p50, p90, p99 and max of recent lag samples, in seconds."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {name: 0.0 for name, _ in _PERCENTILES} | {"max": 0.0}
+        result = {
+            name: samples[min(len(samples) - 1, int(q * len(samples)))] for name, q in _PERCENTILES
+        }
+        result["max"] = samples[-1]
+        return result
+
+    def health_problem(self) -> str | None:
+        """Return why the loop is unhealthy, or None if it is responsive."""
+        stalled = self.blocked_for()
+        if stalled >= self.wedged_after:
+            return f"event loop blocked for {stalled:.1f}s"
+        return None
@@ -0,0 +1,245 @@
+"""Central scheduler for outbound Bot API requests."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import warnings
+from collections import OrderedDict
+from collections.abc import Callable, Coroutine
+from datetime import timedelta
+from typing import Any
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from telegram.warnings import PTBDeprecationWarning
+
+from .. import metrics
+from .rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first. Pass one of these as rate_limit_args to override the
+# priority derived from the endpoint (e.g. PRIORITY_BULK for broadcasts).
+PRIORITY_CALLBACK_ANSWER = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BULK = 2
+
+_PRIORITY_NAMES = {
+    PRIORITY_CALLBACK_ANSWER: "callback_answer",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BULK: "bulk",
+}
+
+_ENDPOINT_PRIORITY = {
+    "answerCallbackQuery": PRIORITY_CALLBACK_ANSWER,
+    "editMessageText": PRIORITY_INTERACTIVE,
+    "editMessageReplyMarkup": PRIORITY_INTERACTIVE,
+    "sendMessage": PRIORITY_INTERACTIVE,
+}
+
+# Telegram allows about 30 messages/second overall, about one per second in a
+# private chat (short bursts are tolerated) and 20 per minute in a group
+DEFAULT_GLOBAL_RATE = 30.0
+PRIVATE_CHAT_LIMIT = (3.0, 1.0)  # (burst, per second)
+GROUP_CHAT_LIMIT = (3.0, 20 / 60)
+# Floor for the adaptive global rate and how fast it recovers (per second, per success)
+MIN_GLOBAL_RATE = 1.0
+RATE_RECOVERY_STEP = 0.1
+MAX_TRACKED_CHAT_BUCKETS = 10_000
+DEFAULT_MAX_RETRIES = 2
+
+_REQUESTS = metrics.counter(
+    "table_talks_bot_api_requests_total",
+    "Bot API requests by endpoint and result",
+    ["endpoint", "result"],
+)
+_REQUEST_SECONDS = metrics.histogram(
+    "table_talks_bot_api_request_duration_seconds", "Bot API call time", ["endpoint"]
+)
+_QUEUE_WAIT_SECONDS = metrics.histogram(
+    "table_talks_bot_api_queue_wait_seconds",
+    "Time requests waited for rate limit tokens",
+    ["priority"],
+)
+_RETRY_AFTER = metrics.counter(
+    "table_talks_bot_api_retry_after_total", "Flood control (RetryAfter) responses"
+).labels()
+
+Callback = Callable[..., Coroutine[Any, Any, Any]]
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    """Return the seconds to wait before retrying after flood control."""
+    # retry_after is an int or a timedelta during PTB's v22.2 transition, and
+    # reading it as an int warns; both are handled here
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", PTBDeprecationWarning)
+        value: Any = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+class OutboundScheduler(BaseRateLimiter[int]):
+    """Shape every Bot API request with priorities, token buckets and flood control.
+
+    Each request takes a token from its chat's bucket (groups are limited
+    more strictly than private chats) and then one from a global bucket.
+    When the global bucket is empty, waiting requests are served in priority
+    order: callback answers, then edits and replies, then bulk sends.
+
+    On RetryAfter the chat is paused for the requested time, the global rate
+    is halved (recovering gradually with each success), and the request is
+    retried up to max_retries times before the error is raised.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            global_rate: Maximum requests per second across all chats
+            max_retries: Retries per request after RetryAfter
+        """
+        self.max_rate = global_rate
+        self.rate = global_rate
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, time.monotonic())
+        self._chats: OrderedDict[int | str, TokenBucket] = OrderedDict()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._pump: asyncio.Task[None] | None = None
+        self.stats: dict[str, int] = {"requests": 0, "queued": 0, "retry_after": 0}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        for _, _, waiter in self._waiters:
+            waiter.cancel()
+        self._waiters.clear()
+
+    @staticmethod
+    def priority_for(endpoint: str, rate_limit_args: int | None) -> int:
+        """Return the priority of a request (lower runs first)."""
+        if isinstance(rate_limit_args, int):
+            return rate_limit_args
+        return _ENDPOINT_PRIORITY.get(endpoint, PRIORITY_INTERACTIVE)
+
+    def _chat_bucket(self, chat_id: int | str, now: float) -> tuple[TokenBucket, float, float]:
+        capacity, rate = (
+            GROUP_CHAT_LIMIT if isinstance(chat_id, str) or chat_id < 0 else PRIVATE_CHAT_LIMIT
+        )
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(capacity, now)
+            if len(self._chats) > MAX_TRACKED_CHAT_BUCKETS:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        return bucket, capacity, rate
+
+    async def _take_chat_token(self, chat_id: int | str) -> None:
+        while True:
+            now = time.monotonic()
+            bucket, capacity, rate = self._chat_bucket(chat_id, now)
+            if bucket.consume(capacity, rate, now):
+                return
+            await asyncio.sleep(bucket.wait_time(capacity, rate, now))
+
+    async def _take_global_token(self, priority: int) -> None:
+        if not self._waiters and self._global.consume(self.max_rate, self.rate, time.monotonic()):
+            return
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future[None] = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self.stats["queued"] += 1
+        if self._pump is None or self._pump.done():
+            self._pump = loop.create_task(self._run_pump())
+        await waiter
+
+    async def _run_pump(self) -> None:
+        """Hand out global tokens to waiting requests, highest priority first."""
+        while self._waiters:
+            now = time.monotonic()
+            if not self._global.consume(self.max_rate, self.rate, now):
+                await asyncio.sleep(self._global.wait_time(self.max_rate, self.rate, now))
+                continue
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                # Caller gave up (cancelled); return its token
+                self._global.tokens += 1
+                continue
+            waiter.set_result(None)
+
+    def _on_retry_after(self, chat_id: int | str | None, seconds: float) -> None:
+        self.stats["retry_after"] += 1
+        _RETRY_AFTER.inc()
+        self.rate = max(MIN_GLOBAL_RATE, self.rate / 2)
+        now = time.monotonic()
+        if chat_id is not None:
+            bucket, _, rate = self._chat_bucket(chat_id, now)
+            # Negative tokens keep the chat blocked until the pause has passed
+            bucket.tokens = min(bucket.tokens, 1 - seconds * rate)
+            bucket.updated = now
+        logger.warning(
+            "Flood control: chat_id=%s retry after %.1fs; global rate now %.1f/s",
+            chat_id,
+            seconds,
+            self.rate,
+        )
+
+    async def process_request(
+        self,
+        callback: Callback,
+        args: Any,
+        kwargs: dict[str, Any],
+        endpoint: str,
+        data: dict[str, Any],
+        rate_limit_args: int | None,
+    ) -> Any:
+        priority = self.priority_for(endpoint, rate_limit_args)
+        chat_id = data.get("chat_id")
+        if not isinstance(chat_id, (int, str)):
+            chat_id = None
+        queue_wait = _QUEUE_WAIT_SECONDS.labels(_PRIORITY_NAMES.get(priority, str(priority)))
+        duration = _REQUEST_SECONDS.labels(endpoint)
+        retries = 0
+        while True:
+            start = time.perf_counter()
+            if chat_id is not None:
+                await self._take_chat_token(chat_id)
+            await self._take_global_token(priority)
+            sent = time.perf_counter()
+            queue_wait.observe(sent - start)
+            self.stats["requests"] += 1
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as e:
+                duration.observe(time.perf_counter() - sent)
+                _REQUESTS.labels(endpoint, "retry_after").inc()
+                seconds = _retry_after_seconds(e)
+                self._on_retry_after(chat_id, seconds)
+                if retries >= self.max_retries:
+                    raise
+                retries += 1
+                if chat_id is None:
+                    await asyncio.sleep(seconds)
+                # Otherwise the paused chat bucket delays the retry
+                continue
+            except Exception:
+                duration.observe(time.perf_counter() - sent)
+                _REQUESTS.labels(endpoint, "error").inc()
+                raise
+            duration.observe(time.perf_counter() - sent)
+            _REQUESTS.labels(endpoint, "ok").inc()
+            self.rate = min(self.max_rate, self.rate + RATE_RECOVERY_STEP)
+            return result
@@ -0,0 +1,80 @@
+"""Lazily evaluated random permutations for very large decks."""
+
+from collections.abc import Sequence
+from typing import overload
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix(value: int) -> int:
+    """SplitMix64 finalizer: a fast, well-distributed 64-bit hash."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class LazyPermutation(Sequence[int]):
+    """Keyed bijection over range(size), computed one position at a time.
+
+    A balanced Feistel network permutes the smallest even-bit-width domain
+    that covers size; cycle walking re-applies it until the result lands in
+    range(size). Construction and lookups are O(1) in time and memory, and
+    only (size, seed) is pickled, so a session stays a few bytes regardless
+    of how many questions the deck has.
+    """
+
+    __slots__ = ("size", "seed", "_half_bits", "_half_mask", "_round_keys")
+
+    ROUNDS = 4
+
+    def __init__(self, size: int, seed: int):
+        """Initialize the permutation.
+
+        Args:
+            size: Number of positions to permute
+            seed: Key selecting which permutation of range(size) to produce
+        """
+        if size < 0:
+            raise ValueError("size must be non-negative")
+        self.size = size
+        self.seed = seed & _MASK64
+        bits = max(2, (size - 1).bit_length())
+        self._half_bits = (bits + 1) // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        self._round_keys = tuple(_mix(self.seed ^ r) for r in range(self.ROUNDS))
+
+    def _encrypt(self, value: int) -> int:
+        left = value >> self._half_bits
+        right = value & self._half_mask
+        for key in self._round_keys:
+            left, right = right, left ^ (_mix(key ^ right) & self._half_mask)
+        return (left << self._half_bits) | right
+
+    def __len__(self) -> int:
+        return self.size
+
+    @overload
+    def __getitem__(self, index: int) -> int: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[int]: ...
+
+    def __getitem__(self, index: int | slice) -> int | Sequence[int]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.size))]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("permutation index out of range")
+        value = self._encrypt(index)
+        # Cycle walking: the domain is < 4x size, so this ends after a few steps
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def __reduce__(self) -> tuple[type["LazyPermutation"], tuple[int, int]]:
+        return (LazyPermutation, (self.size, self.seed))
+
+    def __repr__(self) -> str:
+        return f"LazyPermutation(size={self.size}, seed={self.seed})"
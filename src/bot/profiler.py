@@ -0,0 +1,139 @@
+"""Opt-in sampling profiler for update handling."""
+
+import asyncio
+import cProfile
+import logging
+import marshal
+import os
+import pstats
+import random
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Fraction of updates profiled; 0 turns profiling off
+DEFAULT_PROFILE_SAMPLE_RATE = 0.0
+DEFAULT_PROFILE_DIR = "profiles"
+# Profiled updates between writes of the aggregated profile
+DEFAULT_PROFILE_FLUSH_EVERY = 20
+
+
+class UpdateProfiler:
+    """Profile a random fraction of updates with cProfile and aggregate the results.
+
+    Only one update is profiled at a time (sampled updates that arrive while
+    another is being profiled run unprofiled). Handlers interleave on the
+    event loop, so a profile also includes whatever else the loop ran while
+    the sampled update was awaiting; aggregated over many samples, the
+    handlers' own costs dominate.
+
+    The aggregate is written as a pstats file, one per process, to
+    output_dir every flush_every profiled updates and on flush(); it is
+    serialized on the event loop but written from a worker thread. Inspect it
+    with `python -m pstats` or a viewer such as snakeviz. With a sample rate
+    of 0 the only cost per update is one attribute check.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = DEFAULT_PROFILE_SAMPLE_RATE,
+        output_dir: str | Path = DEFAULT_PROFILE_DIR,
+        flush_every: int = DEFAULT_PROFILE_FLUSH_EVERY,
+        rng: Callable[[], float] = random.random,
+    ):
+        """Initialize the profiler.
+
+        Args:
+            sample_rate: Fraction of updates to profile (0-1)
+            output_dir: Directory the aggregated profile is written to
+            flush_every: Profiled updates between writes
+            rng: Source of uniform [0, 1) numbers (for tests)
+        """
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.flush_every = flush_every
+        self._rng = rng
+        self._active = False
+        self._stats: pstats.Stats | None = None
+        self._unflushed = 0
+        self._write_lock = asyncio.Lock()
+        self.profiled = 0
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, value: float) -> None:
+        if not 0 <= value <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self._sample_rate = value
+
+    @property
+    def path(self) -> Path:
+        """File the aggregated profile of this process is written to."""
+        return self.output_dir / f"updates-{os.getpid()}.pstats"
+
+    def should_sample(self) -> bool:
+        """Decide whether to profile the next update."""
+        return self._sample_rate > 0 and not self._active and self._rng() < self._sample_rate
+
+    async def profile(self, coroutine: Awaitable[Any]) -> None:
+        """Await coroutine under cProfile and add its profile to the aggregate."""
+        profile = cProfile.Profile()
+        self._active = True
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger's) is already active
+            self._active = False
+            await coroutine
+            return
+        try:
+            await coroutine
+        finally:
+            profile.disable()
+            self._active = False
+            self._add(profile)
+        if self._unflushed >= self.flush_every:
+            await self.flush()
+
+    def _add(self, profile: cProfile.Profile) -> None:
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+        self.profiled += 1
+        self._unflushed += 1
+
+    async def flush(self) -> Path | None:
+        """Write the aggregated profile, if anything was profiled since the last write.
+
+        Returns:
+            The file written, or None if there was nothing new to write
+        """
+        if self._stats is None or self._unflushed == 0:
+            return None
+        # Serialize here, where the aggregate cannot change underneath us
+        data = marshal.dumps(self._stats.stats)  # type: ignore[attr-defined]
+        unflushed, self._unflushed = self._unflushed, 0
+        path = self.path
+        async with self._write_lock:
+            try:
+                await asyncio.to_thread(_write_atomically, path, data)
+            except OSError as e:
+                logger.warning("Failed to write profile %s: %s", path, e)
+                self._unflushed += unflushed
+                return None
+        logger.info("Wrote profile of %d update(s) to %s", self.profiled, path)
+        return path
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    """Replace path with data, so readers never see a partly written profile."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".tmp")
+    partial.write_bytes(data)
+    os.replace(partial, path)
@@ -1,6 +1,7 @@
 """Rate limiting for bot handlers."""
 
 import functools
+import math
 import time
 from collections.abc import Callable, Coroutine
 from typing import Any
@@ -8,7 +9,12 @@ from typing import Any
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from .. import metrics
+from .session import track_chat
+
 # Rate limit configuration: (max_requests, window_seconds)
+# Enforced as a token bucket: bursts of up to max_requests, refilled at
+# max_requests per window_seconds.
 # More permissive limits for personal bot use
 RATE_LIMITS = {
     "callback": (50, 10),
@@ -17,19 +23,93 @@ RATE_LIMITS = {
     "command": (20, 60),
 }
 
+_UPDATES = metrics.counter(
+    "table_talks_updates_total", "Updates received by each handler", ["handler"]
+)
+_HANDLER_SECONDS = metrics.histogram(
+    "table_talks_handler_duration_seconds", "Handler run time", ["handler"]
+)
+_RATE_LIMITED = metrics.counter(
+    "table_talks_rate_limited_total", "Updates rejected by the rate limiter", ["category"]
+)
+
+
+class TokenBucket:
+    """Constant-size rate limit state: a token count and its last refill time."""
+
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, capacity: float, rate: float, now: float) -> None:
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(capacity, self.tokens + elapsed * rate)
+        self.updated = now
+
+    def consume(self, capacity: float, rate: float, now: float) -> bool:
+        """Take one token if available.
+
+        Args:
+            capacity: Maximum tokens (burst size)
+            rate: Tokens added per second
+            now: Current time in seconds
+
+        Returns:
+            True if a token was taken, False if the bucket is empty
+        """
+        self._refill(capacity, rate, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, capacity: float, rate: float, now: float) -> float:
+        """Seconds until the next token is available."""
+        self._refill(capacity, rate, now)
+        return max(0.0, (1 - self.tokens) / rate)
+
+
+def _get_bucket(
+    chat_data: dict[Any, Any], category: str, capacity: float, now: float
+) -> TokenBucket:
+    key = f"rate_limit_{category}"
+    bucket = chat_data.get(key)
+    if not isinstance(bucket, TokenBucket):
+        bucket = TokenBucket(capacity, now)
+        chat_data[key] = bucket
+    return bucket
+
 
 def rate_limit(category: str):
-    """Decorator to apply rate limiting to handlers."""
+    """Decorator to apply rate limiting to handlers.
+
+    Also records the chat's activity with track_chat(): the limiter keeps its
+    state in chat_data, and only tracked chats' chat_data is evicted when idle.
+    """
 
     def decorator(
         handler: Callable[[Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]],
     ) -> Callable[[Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]]:
+        # Bind metric children once so each call only touches its own counters
+        updates = _UPDATES.labels(handler.__name__)
+        seconds = _HANDLER_SECONDS.labels(handler.__name__)
+        rate_limited = _RATE_LIMITED.labels(category)
+
         @functools.wraps(handler)
         async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+            updates.inc()
+            track_chat(context.application, update)
             if is_rate_limited(update, context, category):
+                rate_limited.inc()
                 await handle_rate_limit_exceeded(update, context, category)
                 return
-            await handler(update, context)
+            start = time.perf_counter()
+            try:
+                await handler(update, context)
+            finally:
+                seconds.observe(time.perf_counter() - start)
 
         return wrapper
 
@@ -37,41 +117,30 @@ def rate_limit(category: str):
 
 
 def is_rate_limited(_update: Update, context: ContextTypes.DEFAULT_TYPE, category: str) -> bool:
-    """Check if user exceeded rate limit for category."""
+    """Check if user exceeded rate limit for category (O(1) per call)."""
     max_requests, window_seconds = RATE_LIMITS[category]
 
-    # Get or initialize timestamps list
     if context.chat_data is None:
         return False
-    timestamps: list[float] = context.chat_data.setdefault(f"rate_limit_{category}", [])
-
-    # Clean old timestamps outside window
-    current_time = time.time()
-    cutoff = current_time - window_seconds
-    timestamps[:] = [ts for ts in timestamps if ts > cutoff]
-
-    # Check limit
-    if len(timestamps) >= max_requests:
-        return True
-
-    # Record this request
-    timestamps.append(current_time)
-    return False
+    now = time.time()
+    bucket = _get_bucket(context.chat_data, category, max_requests, now)
+    return not bucket.consume(max_requests, max_requests / window_seconds, now)
 
 
 async def handle_rate_limit_exceeded(
     update: Update, context: ContextTypes.DEFAULT_TYPE, category: str
 ) -> None:
     """Handle rate limit exceeded with user-friendly message."""
-    _, window_seconds = RATE_LIMITS[category]
+    max_requests, window_seconds = RATE_LIMITS[category]
 
     # Calculate cooldown time
     if context.chat_data is None:
         cooldown_seconds = window_seconds
     else:
-        timestamps = context.chat_data.get(f"rate_limit_{category}", [])
-        oldest_timestamp = min(timestamps) if timestamps else time.time()
-        cooldown_seconds = int(window_seconds - (time.time() - oldest_timestamp))
+        now = time.time()
+        bucket = _get_bucket(context.chat_data, category, max_requests, now)
+        wait = bucket.wait_time(max_requests, max_requests / window_seconds, now)
+        cooldown_seconds = max(1, math.ceil(wait))
 
     message = f"⏱️ Slow down! Please wait {cooldown_seconds} seconds before trying again."
 
@@ -0,0 +1,83 @@
+"""Single-handler callback query routing."""
+
+import logging
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+from telegram import Update
+from telegram.ext import CallbackQueryHandler, ContextTypes
+
+from .constants import (
+    CALLBACK_ARG_SEPARATOR,
+    CALLBACK_THEME,
+    CALLBACK_VERSION,
+    LEGACY_CALLBACK_THEME_PREFIX,
+    LEGACY_CALLBACKS,
+)
+
+logger = logging.getLogger(__name__)
+
+CallbackHandler = Callable[[Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]]
+
+
+def encode_callback(action: str, argument: str | None = None) -> str:
+    """Return callback_data for an action (a CALLBACK_* constant) and optional argument."""
+    if argument is None:
+        return action
+    return f"{action}{CALLBACK_ARG_SEPARATOR}{argument}"
+
+
+def decode_callback(data: str) -> tuple[str, list[str]] | None:
+    """Split callback_data into (action, arguments).
+
+    Understands the current versioned encoding and the legacy unversioned
+    strings, which are mapped to their current actions.
+
+    Returns:
+        The action and its arguments, or None if data is not recognized
+    """
+    if data.startswith(CALLBACK_VERSION):
+        action, sep, argument = data.partition(CALLBACK_ARG_SEPARATOR)
+        return action, [argument] if sep else []
+    if data.startswith(LEGACY_CALLBACK_THEME_PREFIX):
+        return CALLBACK_THEME, [data[len(LEGACY_CALLBACK_THEME_PREFIX) :]]
+    action = LEGACY_CALLBACKS.get(data)
+    if action is None:
+        return None
+    return action, []
+
+
+class CallbackRouter:
+    """Route every callback query through one dict lookup.
+
+    Replaces one regex CallbackQueryHandler per button: the data is decoded
+    once and the handler for its action is called with the arguments in
+    context.args.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[str, CallbackHandler] = {}
+
+    def add(self, action: str, handler: CallbackHandler) -> None:
+        """Register the handler for an action (a CALLBACK_* constant)."""
+        if action in self._routes:
+            raise ValueError(f"Callback action {action!r} is already routed")
+        self._routes[action] = handler
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Decode the callback query's data and call the matching handler."""
+        query = update.callback_query
+        if query is None:
+            return
+        decoded = decode_callback(query.data or "")
+        handler = self._routes.get(decoded[0]) if decoded is not None else None
+        if decoded is None or handler is None:
+            logger.warning("Unroutable callback data: %r", query.data)
+            await query.answer()
+            return
+        context.args = decoded[1]
+        await handler(update, context)
+
+    def handler(self) -> CallbackQueryHandler[Any, None]:
+        """Return a CallbackQueryHandler that dispatches through this router."""
+        return CallbackQueryHandler(self.dispatch)
@@ -1,23 +1,48 @@
 """Session management and utilities."""
 
 import logging
+import random
+import time
+from array import array
+from collections.abc import Sequence
 from typing import Any, TypedDict
 
 from telegram import Update
 from telegram.ext import Application, ContextTypes
 
+from ..data_sources import Catalog
+from ..logging_setup import sample_action
+from .constants import LAZY_SHUFFLE_THRESHOLD, RANDOM_MIX_THEME_ID
+from .permutation import LazyPermutation
+from .sweeper import (
+    DEFAULT_MAX_TRACKED_CHATS,
+    evict_chat,
+    get_active_sessions,
+    get_tracked_chats,
+)
+
 logger = logging.getLogger(__name__)
 
 AppType = Application[Any, Any, Any, Any, Any, Any]
 
 
 class SessionDict(TypedDict, total=False):
-    """Session state stored in context.chat_data (persisted per chat)."""
+    """Session state stored in context.chat_data (persisted per chat).
+
+    Question text is never copied into the session: ``order`` is a permutation
+    of positions into the shared catalog deck for ``theme_id`` (the theme's
+    questions, or all questions for random mix), resolved at render time.
+    Small decks use an array; large ones a seeded LazyPermutation.
+    """
 
     theme_id: str | None
     index: int
-    shuffled_questions: list[str]
-    theme_labels: list[str] | None
+    catalog_version: int
+    order: Sequence[int]
+
+
+# Session keys describing the current deck; cleared together
+_DECK_KEYS = ("theme_id", "index", "catalog_version", "order")
 
 
 def get_session(context: ContextTypes.DEFAULT_TYPE) -> SessionDict:
@@ -28,31 +53,108 @@ def get_session(context: ContextTypes.DEFAULT_TYPE) -> SessionDict:
     if "theme_id" not in chat_data:
         chat_data["theme_id"] = None
         chat_data["index"] = 0
-        chat_data["shuffled_questions"] = []
+        chat_data["order"] = array("I")
     return chat_data
 
 
+def clear_session(session: SessionDict) -> None:
+    """Drop the current deck; get_session() re-initializes it on next use."""
+    for key in _DECK_KEYS:
+        session.pop(key, None)
+
+
+def deck_size(catalog: Catalog, theme_id: str) -> int:
+    """Number of cards in the deck for theme_id (or random mix)."""
+    if theme_id == RANDOM_MIX_THEME_ID:
+        return len(catalog.all_questions)
+    return len(catalog.get_questions(theme_id))
+
+
+def shuffled_order(size: int) -> Sequence[int]:
+    """Return a random permutation of range(size).
+
+    Decks up to LAZY_SHUFFLE_THRESHOLD are shuffled into a compact unsigned-int
+    array; larger ones get a LazyPermutation, which costs O(1) to create and
+    computes each position on demand.
+    """
+    if size > LAZY_SHUFFLE_THRESHOLD:
+        return LazyPermutation(size, random.getrandbits(64))
+    order = array("I", range(size))
+    random.shuffle(order)
+    return order
+
+
+def start_deck(session: SessionDict, catalog: Catalog, theme_id: str) -> None:
+    """Begin a freshly shuffled deck for theme_id at the first card."""
+    session["theme_id"] = theme_id
+    session["index"] = 0
+    session["catalog_version"] = catalog.version
+    session["order"] = shuffled_order(deck_size(catalog, theme_id))
+
+
+def sync_deck(session: SessionDict, catalog: Catalog) -> None:
+    """Re-point a session at a newly published catalog.
+
+    The permutation is kept while the deck size is unchanged; otherwise the
+    deck is reshuffled and the position wrapped into the new range.
+    """
+    if session.get("catalog_version") == catalog.version:
+        return
+    theme_id = session.get("theme_id")
+    if not theme_id:
+        return
+    size = deck_size(catalog, theme_id)
+    if len(session.get("order", ())) != size:
+        session["order"] = shuffled_order(size)
+        session["index"] = session.get("index", 0) % size if size else 0
+    session["catalog_version"] = catalog.version
+
+
 def track_chat(application: AppType, update: Update) -> None:
-    """Track chat IDs for shutdown notifications."""
+    """Record chat activity for idle eviction and shutdown notifications.
+
+    Tracking is bounded: beyond max_tracked_chats the least recently active
+    chat is evicted.
+    """
     if update.effective_chat is None:
         return
     chat_id: int = update.effective_chat.id
-    from .constants import CHAT_IDS_KEY
 
-    chat_ids: set[int] = application.bot_data.setdefault(CHAT_IDS_KEY, set())
-    chat_ids.add(chat_id)
-    # for error handler context
-    application.bot_data["_last_chat_id"] = chat_id
+    tracked = get_tracked_chats(application)
+    tracked[chat_id] = time.monotonic()
+    tracked.move_to_end(chat_id)
+    max_tracked: int = application.bot_data.get("max_tracked_chats") or DEFAULT_MAX_TRACKED_CHATS
+    while len(tracked) > max_tracked:
+        evict_chat(application, next(iter(tracked)))
+
+
+def mark_session_active(application: AppType, update: Update) -> None:
+    """Add the current chat to the active-session index."""
+    if update.effective_chat is not None:
+        get_active_sessions(application).add(update.effective_chat.id)
+
+
+def mark_session_ended(application: AppType, update: Update) -> None:
+    """Remove the current chat from the active-session index."""
+    if update.effective_chat is not None:
+        get_active_sessions(application).discard(update.effective_chat.id)
 
 
 def log_action(update: Update, action: str, **extra: str | int) -> None:
-    """Log bot actions with context."""
-    chat_id = update.effective_chat.id if update.effective_chat else None
-    user_id = update.effective_user.id if update.effective_user else None
-    parts = [f"chat_id={chat_id}", f"user_id={user_id}", f"action={action}"]
-    for k, v in extra.items():
-        parts.append(f"{k}={v}")
-    logger.info(" | ".join(parts))
+    """Log a bot action as a structured record, subject to per-action sampling.
+
+    The record's message is the action; chat_id, user_id, action and extra
+    are attached as fields (see logging_setup).
+    """
+    if not sample_action(action):
+        return
+    fields: dict[str, object] = {
+        "chat_id": update.effective_chat.id if update.effective_chat else None,
+        "user_id": update.effective_user.id if update.effective_user else None,
+        "action": action,
+        **extra,
+    }
+    logger.info(action, extra={"fields": fields})
 
 
 def is_creator(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
@@ -66,15 +168,20 @@ def is_creator(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     return update.effective_user.id == creator_id
 
 
-def format_card(questions: list[str], index: int, theme_labels: list[str] | None = None) -> str:
-    """Format one question with 'Question N of M' and optional theme label."""
-    total = len(questions)
+def format_card(catalog: Catalog, theme_id: str, order: Sequence[int], index: int) -> str:
+    """Format one question with 'Question N of M' and, in random mix, its theme label."""
+    total = len(order)
     idx = index % total
     one_based = idx + 1
+    position = order[idx]
 
     # Add theme label if in random mix mode
     theme_info = ""
-    if theme_labels and idx < len(theme_labels):
-        theme_info = f"\n📚 Theme: {theme_labels[idx]}\n"
-
-    return f"Question {one_based} of {total}{theme_info}\n{questions[idx]}"
+    if theme_id == RANDOM_MIX_THEME_ID:
+        question_theme_id, question = catalog.all_questions[position]
+        theme = catalog.get_theme(question_theme_id)
+        theme_info = f"\n📚 Theme: {theme['label'] if theme else 'Unknown'}\n"
+    else:
+        question = catalog.get_questions(theme_id)[position]
+
+    return f"Question {one_based} of {total}{theme_info}\n{question}"
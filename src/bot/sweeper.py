@@ -0,0 +1,151 @@
+"""Periodic eviction of idle chat state."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from telegram.ext import Application
+
+from .constants import ACTIVE_SESSIONS_KEY, CHAT_IDS_KEY, SESSION_STATS_KEY
+
+logger = logging.getLogger(__name__)
+
+AppType = Application[Any, Any, Any, Any, Any, Any]
+
+DEFAULT_SESSION_IDLE_TTL = 24 * 60 * 60
+DEFAULT_SESSION_SWEEP_INTERVAL = 5 * 60
+DEFAULT_MAX_TRACKED_CHATS = 10_000
+
+
+def get_tracked_chats(app: AppType) -> OrderedDict[int, float]:
+    """Return chat_id -> last activity (monotonic seconds), least recent first."""
+    tracked = app.bot_data.get(CHAT_IDS_KEY)
+    if not isinstance(tracked, OrderedDict):
+        tracked = OrderedDict()
+        app.bot_data[CHAT_IDS_KEY] = tracked
+    return tracked
+
+
+def get_active_sessions(app: AppType) -> set[int]:
+    """Return the ids of chats with a deck in progress.
+
+    Maintained by the handlers that start and end sessions, so callers can
+    enumerate live sessions without scanning chat_data.
+    """
+    active = app.bot_data.get(ACTIVE_SESSIONS_KEY)
+    if not isinstance(active, set):
+        active = set()
+        app.bot_data[ACTIVE_SESSIONS_KEY] = active
+    return active  # type: ignore[return-value]
+
+
+def evict_chat(app: AppType, chat_id: int) -> None:
+    """Forget a chat: drop its chat_data and stop tracking it."""
+    get_tracked_chats(app).pop(chat_id, None)
+    get_active_sessions(app).discard(chat_id)
+    if chat_id in app.chat_data:
+        app.drop_chat_data(chat_id)
+
+
+def evict_idle_chats(app: AppType, idle_ttl: float, now: float | None = None) -> int:
+    """Evict chats with no activity for idle_ttl seconds.
+
+    Tracked chats are kept in least-recently-active order, so this only
+    touches the chats it evicts.
+
+    Returns:
+        Number of chats evicted
+    """
+    if now is None:
+        now = time.monotonic()
+    cutoff = now - idle_ttl
+    tracked = get_tracked_chats(app)
+    evicted = 0
+    while tracked:
+        chat_id, last_seen = next(iter(tracked.items()))
+        if last_seen >= cutoff:
+            break
+        evict_chat(app, chat_id)
+        evicted += 1
+    return evicted
+
+
+def evict_untracked_chats(app: AppType) -> int:
+    """Drop chat_data of chats that are not tracked (e.g. restored from before a restart).
+
+    Every handler tracks its chat, so this scan of all chat_data only needs
+    to run once, at startup.
+
+    Returns:
+        Number of chats evicted
+    """
+    tracked = get_tracked_chats(app)
+    untracked = [chat_id for chat_id in app.chat_data if chat_id not in tracked]
+    for chat_id in untracked:
+        evict_chat(app, chat_id)
+    return len(untracked)
+
+
+def sweep(app: AppType, idle_ttl: float) -> int:
+    """Run one eviction pass and record its counts in bot_data."""
+    evicted = evict_idle_chats(app, idle_ttl)
+    resident = len(app.chat_data)
+    stats: dict[str, int] = app.bot_data.setdefault(SESSION_STATS_KEY, {})
+    stats["evicted_total"] = stats.get("evicted_total", 0) + evicted
+    stats["last_evicted"] = evicted
+    stats["resident"] = resident
+    stats["tracked"] = len(get_tracked_chats(app))
+    stats["active_sessions"] = len(get_active_sessions(app))
+    logger.info("Session sweep: evicted %d idle chat(s); %d resident", evicted, resident)
+    return evicted
+
+
+class SessionSweeper:
+    """Run sweep() on an interval inside the application's event loop.
+
+    housekeeping, if given, is called after every sweep for other periodic
+    upkeep that does not need its own timer.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = DEFAULT_SESSION_IDLE_TTL,
+        interval: float = DEFAULT_SESSION_SWEEP_INTERVAL,
+        housekeeping: Callable[[AppType], None] | None = None,
+    ):
+        self.idle_ttl = idle_ttl
+        self.interval = interval
+        self.housekeeping = housekeeping
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self, app: AppType) -> None:
+        """Start the sweep loop; call from within the running event loop."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(app))
+
+    async def stop(self) -> None:
+        """Cancel the sweep loop and wait for it to exit."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, app: AppType) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                sweep(app, self.idle_ttl)
+            except Exception:
+                logger.exception("Session sweep failed")
+            if self.housekeeping is not None:
+                try:
+                    self.housekeeping(app)
+                except Exception:
+                    logger.exception("Housekeeping failed")
@@ -0,0 +1,127 @@
+"""Concurrent update processing that keeps each chat's updates in order."""
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable
+from typing import Any
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from .profiler import UpdateProfiler
+
+DEFAULT_MAX_CONCURRENT_UPDATES = 32
+
+
+class _ChatLock:
+    """A lock plus the number of updates holding or waiting for it."""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+def _chat_key(update: object) -> int | None:
+    """Return the id updates are serialized on: the chat, else the user."""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    if update.effective_user is not None:
+        return update.effective_user.id
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Process updates from different chats concurrently, one at a time per chat.
+
+    Handlers read-modify-write chat_data (e.g. the card index), so two
+    updates from the same chat must not interleave. Each chat gets a FIFO
+    lock that exists only while it has updates in flight; PTB starts update
+    tasks in arrival order, so a chat's updates run in the order received.
+
+    The per-chat lock is taken before a concurrency slot, so updates queued
+    behind a busy chat never occupy slots other chats could use.
+    """
+
+    __slots__ = ("_limit", "_running", "_slots", "_chat_locks", "last_processed_at", "profiler")
+
+    def __init__(
+        self,
+        max_concurrent_updates: int = DEFAULT_MAX_CONCURRENT_UPDATES,
+        profiler: UpdateProfiler | None = None,
+    ):
+        """Initialize the processor.
+
+        Args:
+            max_concurrent_updates: Maximum number of updates handled at once
+            profiler: Profiles a sampled fraction of updates, if given
+        """
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates must be a positive integer")
+        # The base class semaphore is entered before do_process_update(), where
+        # waiting on a chat lock would hold a slot, so it is sized (via the
+        # max_concurrent_updates property) to never block; the real bound is
+        # applied in do_process_update() once the chat lock is held.
+        self._limit = sys.maxsize
+        super().__init__(sys.maxsize)
+        self._limit = max_concurrent_updates
+        self._running = 0
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        self._chat_locks: dict[int, _ChatLock] = {}
+        # Wall-clock time the most recent update finished, or None before the first
+        self.last_processed_at: float | None = None
+        self.profiler = profiler
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        return self._limit
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self._running
+
+    @property
+    def active_chats(self) -> int:
+        """Number of chats with updates being processed or waiting."""
+        return len(self._chat_locks)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = _chat_key(update)
+        if key is None:
+            async with self._slots:
+                await self._run(coroutine)
+            return
+
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = _ChatLock()
+        entry.users += 1
+        try:
+            async with entry.lock, self._slots:
+                await self._run(coroutine)
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                del self._chat_locks[key]
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        self._running += 1
+        try:
+            profiler = self.profiler
+            if profiler is not None and profiler.should_sample():
+                await profiler.profile(coroutine)
+            else:
+                await coroutine
+        finally:
+            self._running -= 1
+            self.last_processed_at = time.time()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
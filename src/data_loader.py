@@ -2,36 +2,117 @@
 
 Supports CSV files (default) and Google Sheets (when configured).
 Data source is selected based on environment configuration.
+All lookups are served from the source's in-memory Catalog.
 """
 
-from .data_sources import Theme, get_data_source
+import time
+from collections.abc import Sequence
+
+from .data_sources import Catalog, CatalogWatcher, Theme, get_data_source
 
 # Initialize data source based on environment configuration
 # (CSV by default, Google Sheets if ENABLE_GOOGLE_SHEETS=true)
 _data_source = get_data_source()
 
 # Re-export Theme for backward compatibility
-__all__ = ["Theme", "get_themes", "get_questions", "get_all_questions"]
+__all__ = [
+    "Catalog",
+    "Theme",
+    "after_fork",
+    "get_catalog",
+    "get_catalog_version",
+    "get_theme",
+    "get_themes",
+    "get_questions",
+    "get_all_questions",
+    "readiness",
+    "watch_for_changes",
+]
+
+
+def get_catalog() -> Catalog:
+    """Return the current immutable catalog snapshot.
+
+    Data source is determined by environment configuration.
+    """
+    return _data_source.get_catalog()
+
+
+def get_catalog_version() -> int:
+    """Return the version of the current catalog.
+
+    Changes whenever a new deck is published; use it to key derived caches.
+    """
+    return _data_source.get_catalog().version
 
 
-def get_themes() -> list[Theme]:
-    """Return list of theme dicts: id, label, description.
+def watch_for_changes(interval: float) -> CatalogWatcher:
+    """Start a background watcher that hot-reloads the deck when it changes."""
+    watcher = CatalogWatcher(_data_source, interval=interval)
+    watcher.start()
+    return watcher
+
+
+def after_fork() -> None:
+    """Prepare the data source for use in a forked worker process."""
+    _data_source.after_fork()
+
+
+def readiness() -> tuple[bool, dict[str, object]]:
+    """Report whether a non-empty catalog is being served, without any I/O.
+
+    Returns:
+        (ready, details): details include the catalog age in seconds (time
+        since the data was last fetched or confirmed unchanged, not since the
+        catalog was built) and, for Google Sheets, whether the last refresh
+        succeeded
+    """
+    status = _data_source.status()
+    # A Sheets source without data of its own is serving its CSV fallback
+    serving = status
+    fallback = status.get("fallback")
+    if status.get("catalog_loaded_at") is None and isinstance(fallback, dict):
+        serving = fallback  # type: ignore[assignment]
+    loaded_at = serving.get("catalog_loaded_at")
+    fetched_at = serving.get("data_fetched_at")
+    themes = serving.get("themes")
+    details: dict[str, object] = {
+        "source": status.get("source"),
+        "serving": serving.get("source"),
+        "catalog_version": serving.get("catalog_version"),
+        "catalog_age": time.time() - fetched_at if isinstance(fetched_at, float) else None,
+        "themes": themes,
+    }
+    if "last_refresh_ok" in status:
+        details["last_refresh_ok"] = status["last_refresh_ok"]
+        details["last_refresh_error"] = status.get("last_refresh_error")
+    ready = loaded_at is not None and isinstance(themes, int) and themes > 0
+    return ready, details
+
+
+def get_themes() -> Sequence[Theme]:
+    """Return theme dicts: id, label, description.
 
     Data source is determined by environment configuration.
     """
     return _data_source.get_themes()
 
 
-def get_questions(theme_id: str) -> list[str]:
-    """Return list of questions for a theme. theme_id must be from get_themes().
+def get_theme(theme_id: str) -> Theme | None:
+    """Return the theme with this id, or None if it does not exist."""
+    return _data_source.get_theme(theme_id)
+
+
+def get_questions(theme_id: str) -> Sequence[str]:
+    """Return questions for a theme. theme_id must be from get_themes().
 
     Data source is determined by environment configuration.
     """
     return _data_source.get_questions(theme_id)
 
 
-def get_all_questions() -> list[tuple[str, str]]:
-    """Return list of (theme_id, question) tuples for all questions.
+def get_all_questions() -> Sequence[tuple[str, str]]:
+    """Return (theme_id, question) tuples for all questions.
 
     Used for random mix mode to show which theme each question is from.
     Data source is determined by environment configuration.
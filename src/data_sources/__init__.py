@@ -4,6 +4,15 @@ Supports multiple backends: CSV files, Google Sheets, etc.
 """
 
 from .base import DataSource, Theme
+from .catalog import Catalog, build_catalog
 from .factory import get_data_source
+from .watcher import CatalogWatcher
 
-__all__ = ["DataSource", "Theme", "get_data_source"]
+__all__ = [
+    "Catalog",
+    "CatalogWatcher",
+    "DataSource",
+    "Theme",
+    "build_catalog",
+    "get_data_source",
+]
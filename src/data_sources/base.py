@@ -1,42 +1,79 @@
 """Abstract base class for data sources."""
 
 from abc import ABC, abstractmethod
-from typing import TypedDict
+from collections.abc import Sequence
 
+from .catalog import Catalog, Theme
 
-class Theme(TypedDict):
-    """One theme with id, label, and description."""
-
-    id: str
-    label: str
-    description: str
+__all__ = ["Catalog", "DataSource", "Theme"]
 
 
 class DataSource(ABC):
-    """Abstract interface for loading themes and questions."""
+    """Abstract interface for loading themes and questions.
+
+    Implementations load their data into an immutable Catalog; the lookup
+    methods below are served from that snapshot without further I/O.
+    """
 
     @abstractmethod
-    def get_themes(self) -> list[Theme]:
-        """Return list of all available themes."""
+    def get_catalog(self) -> Catalog:
+        """Return the current catalog snapshot."""
         pass
 
-    @abstractmethod
-    def get_questions(self, theme_id: str) -> list[str]:
-        """Return list of questions for a specific theme.
+    def refresh(self) -> bool:
+        """Reload data if the backing store changed.
+
+        Called periodically from a background thread, never from the event loop.
+        Implementations must publish the new catalog with a single assignment so
+        readers never observe a partially built deck.
+
+        Returns:
+            True if a new catalog was published, False otherwise
+        """
+        return False
+
+    def after_fork(self) -> None:
+        """Reset per-process state (locks, threads, connections) in a forked child.
+
+        The catalog itself is kept, so forked workers share it copy-on-write.
+        """
+
+    def status(self) -> dict[str, object]:
+        """Return source state for monitoring; must not perform I/O."""
+        catalog = self.get_catalog()
+        return {
+            "source": type(self).__name__,
+            "catalog_version": catalog.version,
+            "catalog_loaded_at": catalog.loaded_at,
+            # Local decks are read when the catalog is built
+            "data_fetched_at": catalog.loaded_at,
+            "themes": len(catalog.themes),
+            "questions": len(catalog.all_questions),
+        }
+
+    def get_themes(self) -> Sequence[Theme]:
+        """Return all available themes."""
+        return self.get_catalog().themes
+
+    def get_theme(self, theme_id: str) -> Theme | None:
+        """Return the theme with this id, or None if it does not exist."""
+        return self.get_catalog().get_theme(theme_id)
+
+    def get_questions(self, theme_id: str) -> Sequence[str]:
+        """Return questions for a specific theme.
 
         Args:
             theme_id: The theme identifier (must exist in get_themes())
 
         Returns:
-            List of question strings, or empty list if theme_id is invalid
+            Question strings, or an empty sequence if theme_id is invalid
         """
-        pass
+        return self.get_catalog().get_questions(theme_id)
 
-    @abstractmethod
-    def get_all_questions(self) -> list[tuple[str, str]]:
+    def get_all_questions(self) -> Sequence[tuple[str, str]]:
         """Return all questions with their theme_id.
 
         Returns:
-            List of (theme_id, question) tuples for all questions
+            (theme_id, question) tuples for all questions
         """
-        pass
+        return self.get_catalog().all_questions
@@ -0,0 +1,81 @@
+"""Immutable, indexed snapshot of themes and questions."""
+
+import itertools
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import TypedDict
+
+
+class Theme(TypedDict):
+    """One theme with id, label, and description."""
+
+    id: str
+    label: str
+    description: str
+
+
+# Process-wide counter so every published catalog gets a unique version,
+# regardless of which data source built it
+_version_counter = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Read-only deck built in a single pass at load time.
+
+    All lookups are O(1) dict/tuple accesses; nothing touches disk or network.
+    Data sources publish a new Catalog instead of mutating an existing one.
+    """
+
+    themes: tuple[Theme, ...]
+    themes_by_id: Mapping[str, Theme]
+    questions_by_theme: Mapping[str, tuple[str, ...]]
+    all_questions: tuple[tuple[str, str], ...]
+    version: int
+    loaded_at: float
+
+    def get_theme(self, theme_id: str) -> Theme | None:
+        """Return the theme with this id, or None if unknown."""
+        return self.themes_by_id.get(theme_id)
+
+    def get_questions(self, theme_id: str) -> tuple[str, ...]:
+        """Return questions for a theme, or an empty tuple if unknown."""
+        return self.questions_by_theme.get(theme_id, ())
+
+
+def build_catalog(themes: Iterable[Theme], questions: Iterable[tuple[str, str]]) -> Catalog:
+    """Build a catalog from themes and (theme_id, question) pairs.
+
+    Duplicate theme ids keep their first occurrence. Questions for unknown
+    themes and empty questions are dropped. Order is preserved.
+
+    Args:
+        themes: Themes in display order
+        questions: (theme_id, question) pairs in deck order
+
+    Returns:
+        New Catalog with a fresh version number
+    """
+    themes_by_id: dict[str, Theme] = {}
+    for theme in themes:
+        themes_by_id.setdefault(theme["id"], theme)
+
+    grouped: dict[str, list[str]] = {theme_id: [] for theme_id in themes_by_id}
+    all_questions: list[tuple[str, str]] = []
+    for theme_id, question in questions:
+        bucket = grouped.get(theme_id)
+        if bucket is None or not question:
+            continue
+        bucket.append(question)
+        all_questions.append((theme_id, question))
+
+    return Catalog(
+        themes=tuple(themes_by_id.values()),
+        themes_by_id=MappingProxyType(themes_by_id),
+        questions_by_theme=MappingProxyType({tid: tuple(qs) for tid, qs in grouped.items()}),
+        all_questions=tuple(all_questions),
+        version=next(_version_counter),
+        loaded_at=time.time(),
+    )
@@ -0,0 +1,101 @@
+"""Circuit breaker with exponential backoff for remote data fetches."""
+
+import random
+import threading
+import time
+from collections.abc import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency until a backoff window elapses.
+
+    States:
+    - closed: calls allowed, no recent failures
+    - open: calls rejected until the backoff window ends
+    - half_open: window ended; the next call is a trial (success closes,
+      failure reopens with a longer window)
+
+    The window doubles with each consecutive failure up to max_delay, with
+    jitter so multiple instances do not retry in lockstep.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 5.0,
+        max_delay: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ):
+        """Initialize the breaker.
+
+        Args:
+            base_delay: Backoff after the first failure, in seconds
+            max_delay: Upper bound for the backoff, in seconds
+            clock: Monotonic time source (injectable for tests)
+            rng: Returns a float in [0, 1) used for jitter
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._total_failures = 0
+        self._open_until = 0.0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open, or half_open."""
+        if self._consecutive_failures == 0:
+            return CLOSED
+        if self._clock() < self._open_until:
+            return OPEN
+        return HALF_OPEN
+
+    @property
+    def consecutive_failures(self) -> int:
+        """Failures since the last success."""
+        return self._consecutive_failures
+
+    def allow_request(self) -> bool:
+        """Return True unless the breaker is open."""
+        return self.state != OPEN
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+
+    def record_failure(self) -> float:
+        """Open the breaker for the next backoff window.
+
+        Returns:
+            Length of the backoff window in seconds
+        """
+        with self._lock:
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            exponent = min(self._consecutive_failures - 1, 30)
+            delay = min(self.max_delay, self.base_delay * 2**exponent)
+            # "Equal jitter": keep at least half the window, randomize the rest
+            delay = delay / 2 + self._rng() * delay / 2
+            self._open_until = self._clock() + delay
+            return delay
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker allows a trial call (0 if allowed now)."""
+        return max(0.0, self._open_until - self._clock())
+
+    def stats(self) -> dict[str, object]:
+        """Return breaker state and failure counts for monitoring."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "total_failures": self._total_failures,
+            "retry_in": round(self.retry_in(), 3),
+        }
@@ -2,9 +2,13 @@
 
 import csv
 import logging
+import os
+import threading
 from pathlib import Path
 
+from .. import metrics
 from .base import DataSource, Theme
+from .catalog import Catalog, build_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -12,12 +16,21 @@ logger = logging.getLogger(__name__)
 # Format: "theme:{id}" must be <= 64 bytes
 MAX_THEME_ID_LENGTH = 58
 
+_RELOADS = metrics.counter(
+    "table_talks_csv_reloads_total", "CSV deck reloads after a file change", ["result"]
+)
+
 
 class CSVDataSource(DataSource):
-    """Load themes and questions from CSV files."""
+    """Load themes and questions from CSV files.
+
+    Both files are parsed once at construction into an immutable Catalog;
+    all lookups afterwards are served from memory. refresh() re-stats the
+    files and swaps in a new catalog when they change.
+    """
 
     def __init__(self, data_dir: Path | None = None):
-        """Initialize CSV data source.
+        """Initialize CSV data source and load the catalog.
 
         Args:
             data_dir: Directory containing themes.csv and questions.csv.
@@ -29,14 +42,17 @@ class CSVDataSource(DataSource):
         self.themes_csv = self.data_dir / "themes.csv"
         self.questions_csv = self.data_dir / "questions.csv"
 
-        # Cache for questions by theme (matches existing behavior)
-        self._questions_cache: dict[str, list[str]] = {}
+        # Signature of the files the current catalog was built from, plus the
+        # last changed signature seen (reload waits until it is stable across
+        # two polls so half-written files are not picked up)
+        self._loaded_signature = self._file_signature()
+        self._pending_signature: tuple[object, ...] | None = None
+        self._refresh_lock = threading.Lock()
 
-    def get_themes(self) -> list[Theme]:
-        """Return list of theme dicts: id, label, description.
+        self._catalog: Catalog = self._load_catalog()
 
-        Validates theme IDs and skips invalid entries.
-        """
+    def _read_themes(self) -> list[Theme]:
+        """Parse themes.csv, validating theme IDs and skipping invalid entries."""
         themes: list[Theme] = []
         with open(self.themes_csv, encoding="utf-8", newline="") as f:
             for i, row in enumerate(csv.DictReader(f), start=2):
@@ -66,44 +82,76 @@ class CSVDataSource(DataSource):
                 themes.append(Theme(id=theme_id, label=theme_label, description=theme_desc))
         return themes
 
-    def get_questions(self, theme_id: str) -> list[str]:
-        """Return list of questions for a theme. theme_id must be from get_themes()."""
-        # Check cache first
-        if theme_id in self._questions_cache:
-            return self._questions_cache[theme_id]
-
-        # Validate theme exists
-        allowed: set[str] = {t["id"] for t in self.get_themes()}
-        if theme_id not in allowed:
-            return []
-
-        # Load questions for this theme
-        out: list[str] = []
-        with open(self.questions_csv, encoding="utf-8", newline="") as f:
-            for row in csv.DictReader(f):
-                tid = row.get("theme_id", "").strip()
-                q = row.get("question", "").strip()
-                if tid == theme_id and q:
-                    out.append(q)
-
-        # Cache the result
-        self._questions_cache[theme_id] = out
-        return out
-
-    def get_all_questions(self) -> list[tuple[str, str]]:
-        """Return list of (theme_id, question) tuples for all questions.
-
-        Used for random mix mode to show which theme each question is from.
-        """
-        all_questions: list[tuple[str, str]] = []
-        themes = self.get_themes()
-        theme_ids = {t["id"] for t in themes}
-
+    def _read_questions(self) -> list[tuple[str, str]]:
+        """Parse questions.csv into (theme_id, question) pairs."""
+        questions: list[tuple[str, str]] = []
         with open(self.questions_csv, encoding="utf-8", newline="") as f:
             for row in csv.DictReader(f):
                 theme_id = row.get("theme_id", "").strip()
                 question = row.get("question", "").strip()
-                if theme_id in theme_ids and question:
-                    all_questions.append((theme_id, question))
-
-        return all_questions
+                if theme_id and question:
+                    questions.append((theme_id, question))
+        return questions
+
+    def _load_catalog(self) -> Catalog:
+        """Read both CSV files and build a catalog in one pass."""
+        catalog = build_catalog(self._read_themes(), self._read_questions())
+        logger.info(
+            f"Loaded {len(catalog.themes)} themes and {len(catalog.all_questions)} questions "
+            f"from {self.data_dir}"
+        )
+        return catalog
+
+    def _file_signature(self) -> tuple[object, ...]:
+        """Return (mtime, size) for both CSV files; None for missing files."""
+        signature: list[object] = []
+        for path in (self.themes_csv, self.questions_csv):
+            try:
+                st = os.stat(path)
+            except OSError:
+                signature.append(None)
+                continue
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def after_fork(self) -> None:
+        """Replace the refresh lock, which may have been held at fork time."""
+        self._refresh_lock = threading.Lock()
+
+    def get_catalog(self) -> Catalog:
+        """Return the catalog loaded from disk."""
+        return self._catalog
+
+    def refresh(self) -> bool:
+        """Rebuild the catalog if either CSV file changed since the last load.
+
+        Returns:
+            True if a new catalog was published, False otherwise
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            signature = self._file_signature()
+            if signature == self._loaded_signature:
+                self._pending_signature = None
+                return False
+            if signature != self._pending_signature:
+                # First sighting of this change; wait for the writer to finish
+                self._pending_signature = signature
+                return False
+
+            try:
+                catalog = self._load_catalog()
+            except Exception as e:
+                _RELOADS.labels("error").inc()
+                logger.warning(f"Failed to reload CSV deck from {self.data_dir}: {e}")
+                return False
+
+            # Single reference assignment: readers see either the old or the new deck
+            self._catalog = catalog
+            self._loaded_signature = signature
+            self._pending_signature = None
+            _RELOADS.labels("ok").inc()
+            return True
+        finally:
+            self._refresh_lock.release()
@@ -24,6 +24,13 @@ def get_data_source() -> DataSource:
     - GOOGLE_SERVICE_ACCOUNT_FILE: Path to service account JSON file
     - GOOGLE_SERVICE_ACCOUNT_JSON: Service account JSON as string (alternative)
     - SHEETS_CACHE_TTL: Cache duration in seconds (default: 300)
+    - SHEETS_STALE_WHILE_REVALIDATE: Set to "true" to serve expired data while
+      refreshing in the background
+    - SHEETS_BACKOFF_BASE / SHEETS_BACKOFF_MAX: Retry backoff bounds in seconds
+      after failed fetches (default: 5 / 300)
+    - SHEETS_CONDITIONAL_FETCH: Set to "false" to always download the full sheet
+      instead of first checking its modifiedTime (default: true)
+    - SHEETS_SNAPSHOT_FILE: Path to persist the last good sheet to (optional)
 
     Returns:
         DataSource: Configured data source instance
@@ -43,6 +50,13 @@ def get_data_source() -> DataSource:
 
                 sheet_name = os.getenv("GOOGLE_SHEET_NAME", "Questions")
                 cache_ttl = int(os.getenv("SHEETS_CACHE_TTL", "300"))
+                stale_while_revalidate = (
+                    os.getenv("SHEETS_STALE_WHILE_REVALIDATE", "").lower() == "true"
+                )
+                backoff_base = float(os.getenv("SHEETS_BACKOFF_BASE", "5"))
+                backoff_max = float(os.getenv("SHEETS_BACKOFF_MAX", "300"))
+                snapshot_path = os.getenv("SHEETS_SNAPSHOT_FILE") or None
+                conditional_fetch = os.getenv("SHEETS_CONDITIONAL_FETCH", "true").lower() != "false"
 
                 logger.info("Attempting to load data from Google Sheets")
                 return GoogleSheetsDataSource(
@@ -51,6 +65,11 @@ def get_data_source() -> DataSource:
                     credentials_file=creds_file,
                     credentials_json=creds_json,
                     cache_ttl=cache_ttl,
+                    stale_while_revalidate=stale_while_revalidate,
+                    backoff_base=backoff_base,
+                    backoff_max=backoff_max,
+                    snapshot_path=snapshot_path,
+                    conditional_fetch=conditional_fetch,
                 )
             except Exception as e:
                 logger.warning(f"Failed to initialize Google Sheets: {e}")
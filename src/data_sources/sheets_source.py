@@ -2,13 +2,20 @@
 
 import json
 import logging
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 
 import gspread
 from google.oauth2 import service_account
 
+from .. import metrics
 from .base import DataSource, Theme
+from .catalog import Catalog, build_catalog
+from .circuit_breaker import CircuitBreaker
 from .csv_source import CSVDataSource
+from .snapshot import read_snapshot, write_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +27,21 @@ REQUIRED_COLUMNS = ["theme_id", "theme_label", "theme_description", "question"]
 # So theme_id must be <= 64 - len("theme:") = 58 bytes
 MAX_THEME_ID_LENGTH = 58
 
+_CACHE_LOOKUPS = metrics.counter(
+    "table_talks_sheets_cache_total",
+    "Catalog lookups by cache state (hit, stale, miss, fallback)",
+    ["result"],
+)
+_CACHE_HIT = _CACHE_LOOKUPS.labels("hit")
+_CACHE_STALE = _CACHE_LOOKUPS.labels("stale")
+_CACHE_MISS = _CACHE_LOOKUPS.labels("miss")
+_CACHE_FALLBACK = _CACHE_LOOKUPS.labels("fallback")
+_FETCH_SECONDS = metrics.histogram(
+    "table_talks_sheets_fetch_duration_seconds",
+    "Google Sheets revalidation time by result",
+    ["result"],
+)
+
 
 class GoogleSheetsDataSource(DataSource):
     """Load themes and questions from Google Sheets with caching and CSV fallback.
@@ -27,8 +49,17 @@ class GoogleSheetsDataSource(DataSource):
     Features:
     - Service account authentication (file or JSON env var)
     - In-memory caching with configurable TTL
+    - Optional stale-while-revalidate: expired data keeps being served while a
+      single worker thread fetches a fresh copy
+    - Single-flight fetching with a circuit breaker: at most one fetch runs at a
+      time, and after failures the last good snapshot is served until an
+      exponential (jittered) backoff window elapses
+    - Conditional refresh: a cheap Drive modifiedTime check skips the download
+      and just extends the cache lifetime when the sheet has not changed
+    - Optional on-disk snapshot of the last good fetch: served immediately on
+      startup (revalidated in the background) and kept through Sheets outages
     - Validates sheet structure and data
-    - Falls back to CSV on any error
+    - Falls back to CSV when no Sheets snapshot is available
     - Parses denormalized sheet format into themes and questions
     """
 
@@ -40,6 +71,11 @@ class GoogleSheetsDataSource(DataSource):
         credentials_json: str | None = None,
         cache_ttl: int = 300,
         csv_fallback: CSVDataSource | None = None,
+        stale_while_revalidate: bool = False,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        snapshot_path: Path | str | None = None,
+        conditional_fetch: bool = True,
     ):
         """Initialize Google Sheets data source.
 
@@ -50,17 +86,48 @@ class GoogleSheetsDataSource(DataSource):
             credentials_json: Service account JSON as string
             cache_ttl: Cache time-to-live in seconds (default: 300 = 5 minutes)
             csv_fallback: CSV data source to use on errors (creates new if None)
+            stale_while_revalidate: Serve expired data and refresh in the background
+                instead of fetching on the caller's thread
+            backoff_base: Seconds to wait after the first failed fetch
+            backoff_max: Upper bound for the backoff window in seconds
+            snapshot_path: File to persist each successful fetch to and warm-start from
+            conditional_fetch: Check the spreadsheet's modifiedTime before downloading
+                and skip the download when it is unchanged
         """
         self.sheet_id = sheet_id
         self.sheet_name = sheet_name
         self.cache_ttl = cache_ttl
         self.csv_fallback = csv_fallback or CSVDataSource()
+        self.stale_while_revalidate = stale_while_revalidate
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.conditional_fetch = conditional_fetch
 
-        # Cache for parsed data (separate variables for cleaner typing)
-        self._cached_themes: list[Theme] | None = None
-        self._cached_questions_by_theme: dict[str, list[str]] | None = None
-        self._cached_all_questions: list[tuple[str, str]] | None = None
+        # Last parsed snapshot; replaced wholesale on each successful fetch
+        self._catalog: Catalog | None = None
         self._last_fetch_time: float | None = None
+        # When the served data was last fetched or confirmed unchanged; unlike
+        # _last_fetch_time this is restored from the snapshot on warm start
+        self._data_fetched_at: float | None = None
+        # Drive modifiedTime of the spreadsheet the current catalog came from
+        self._remote_modified_time: str | None = None
+        # Outcome of the most recent fetch attempt (None until one has run)
+        self._last_refresh_ok: bool | None = None
+        self._last_refresh_error: str | None = None
+
+        # Only one fetch may run at a time; the breaker spaces out retries
+        self._fetch_lock = threading.Lock()
+        self._breaker = CircuitBreaker(base_delay=backoff_base, max_delay=backoff_max)
+
+        # Background refresh (stale-while-revalidate and warm-start revalidation)
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sheets-refresh"
+        )
+        self._refresh_future: Future[None] | None = None
+        self._refresh_lock = threading.Lock()
+
+        # Warm start: serve the last persisted snapshot until revalidated
+        if self.snapshot_path is not None:
+            self._load_snapshot()
 
         # Initialize Google Sheets client
         self._client: gspread.Client | None = None
@@ -71,6 +138,15 @@ class GoogleSheetsDataSource(DataSource):
             logger.error(f"Failed to authenticate with Google Sheets: {e}")
             logger.info("Will use CSV fallback for all requests")
 
+        if self._client is not None:
+            if self._catalog is not None:
+                # Serving the snapshot; revalidate without delaying startup
+                self._schedule_refresh()
+            elif stale_while_revalidate:
+                # Prime the cache now (at startup, before the event loop runs) so
+                # that requests never have to wait for the first download
+                self._background_refresh()
+
     def _authenticate(
         self, credentials_file: str | None, credentials_json: str | None
     ) -> gspread.Client:
@@ -118,9 +194,48 @@ class GoogleSheetsDataSource(DataSource):
         elapsed = time.time() - self._last_fetch_time
         return elapsed < self.cache_ttl
 
-    def _fetch_and_parse_sheet(self) -> None:
+    def _fetch_modified_time(self) -> str | None:
+        """Return the spreadsheet's Drive modifiedTime, or None if unavailable.
+
+        One small Drive API call instead of downloading every cell.
+        """
+        if self._client is None:
+            return None
+        try:
+            metadata = self._client.http_client.get_file_drive_metadata(self.sheet_id)
+            return str(metadata["modifiedTime"])
+        except Exception as e:
+            logger.warning(f"Could not read Google Sheet modifiedTime, doing full fetch: {e}")
+            return None
+
+    def _revalidate(self) -> bool:
+        """Refresh the cache, skipping the download if the sheet is unchanged.
+
+        Returns:
+            True if the sheet was downloaded, False if it was unchanged
+
+        Raises:
+            Exception on any error (caller should handle with CSV fallback)
+        """
+        modified_time = self._fetch_modified_time() if self.conditional_fetch else None
+        if (
+            modified_time is not None
+            and self._catalog is not None
+            and modified_time == self._remote_modified_time
+        ):
+            self._last_fetch_time = time.time()
+            self._data_fetched_at = self._last_fetch_time
+            logger.debug(f"Google Sheet unchanged since {modified_time}; extending cache")
+            return False
+        self._fetch_and_parse_sheet(modified_time)
+        return True
+
+    def _fetch_and_parse_sheet(self, modified_time: str | None = None) -> None:
         """Fetch data from Google Sheets and parse into cache.
 
+        Args:
+            modified_time: Drive modifiedTime observed before the download, if known
+
         Raises:
             Exception on any error (caller should handle with CSV fallback)
         """
@@ -145,7 +260,6 @@ class GoogleSheetsDataSource(DataSource):
         # Parse data
         col_indices = {col: header.index(col) for col in REQUIRED_COLUMNS}
         themes_dict: dict[str, Theme] = {}
-        questions_by_theme: dict[str, list[str]] = {}
         all_questions: list[tuple[str, str]] = []
 
         for i, row in enumerate(rows[1:], start=2):
@@ -183,22 +297,61 @@ class GoogleSheetsDataSource(DataSource):
                 themes_dict[theme_id] = Theme(
                     id=theme_id, label=theme_label, description=theme_desc
                 )
-                questions_by_theme[theme_id] = []
 
             # Add question
-            questions_by_theme[theme_id].append(question)
             all_questions.append((theme_id, question))
 
-        # Update cache
-        self._cached_themes = list(themes_dict.values())
-        self._cached_questions_by_theme = questions_by_theme
-        self._cached_all_questions = all_questions
+        # Publish the new snapshot in a single assignment
+        catalog = build_catalog(themes_dict.values(), all_questions)
+        self._catalog = catalog
         self._last_fetch_time = time.time()
+        self._data_fetched_at = self._last_fetch_time
+        self._remote_modified_time = modified_time
 
         logger.info(
-            f"Loaded {len(themes_dict)} themes and {len(all_questions)} questions "
+            f"Loaded {len(catalog.themes)} themes and {len(catalog.all_questions)} questions "
             "from Google Sheets"
         )
+        self._save_snapshot(catalog)
+
+    def _load_snapshot(self) -> None:
+        """Adopt the persisted snapshot, if any, as an already-expired cache."""
+        if self.snapshot_path is None:
+            return
+        loaded = read_snapshot(self.snapshot_path)
+        if loaded is None:
+            return
+        catalog, metadata = loaded
+        if metadata.get("sheet_id") != self.sheet_id:
+            logger.warning(f"Ignoring snapshot {self.snapshot_path} from a different sheet")
+            return
+        self._catalog = catalog
+        modified_time = metadata.get("modified_time")
+        self._remote_modified_time = str(modified_time) if modified_time else None
+        fetched_at = metadata.get("fetched_at")
+        self._data_fetched_at = float(fetched_at) if isinstance(fetched_at, int | float) else None
+        logger.info(
+            f"Serving {len(catalog.all_questions)} questions from snapshot "
+            f"{self.snapshot_path} (fetched at {metadata.get('fetched_at')})"
+        )
+
+    def _save_snapshot(self, catalog: Catalog) -> None:
+        """Persist a freshly fetched catalog; failures are logged, not raised."""
+        if self.snapshot_path is None:
+            return
+        try:
+            write_snapshot(
+                self.snapshot_path,
+                catalog,
+                metadata={
+                    "sheet_id": self.sheet_id,
+                    "sheet_name": self.sheet_name,
+                    "fetched_at": self._last_fetch_time,
+                    "modified_time": self._remote_modified_time,
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write snapshot {self.snapshot_path}: {e}")
 
     def _ensure_cache_loaded(self) -> bool:
         """Ensure cache is loaded with data from Google Sheets.
@@ -208,36 +361,127 @@ class GoogleSheetsDataSource(DataSource):
         """
         # Check if cache is valid
         if self._is_cache_valid():
+            _CACHE_HIT.inc()
             return True
 
-        # Try to fetch from Google Sheets
-        try:
-            self._fetch_and_parse_sheet()
+        # Serve what we have (or the CSV fallback) and revalidate off the caller's thread
+        if self.stale_while_revalidate:
+            self._schedule_refresh()
+            if self._catalog is None:
+                return False
+            _CACHE_STALE.inc()
             return True
-        except Exception as e:
-            logger.warning(f"Failed to fetch from Google Sheets: {e}, using CSV fallback")
-            return False
 
-    def get_themes(self) -> list[Theme]:
-        """Return list of all available themes."""
-        if self._ensure_cache_loaded():
-            return self._cached_themes or []
+        # Wait for an in-flight fetch only if there is nothing to serve meanwhile
+        if self._fetch_single_flight(wait=self._catalog is None):
+            _CACHE_MISS.inc()
+            return True
 
-        # Fallback to CSV
-        return self.csv_fallback.get_themes()
+        # Serve the last good snapshot while backing off or while another fetch runs
+        if self._catalog is not None:
+            _CACHE_STALE.inc()
+            return True
+        logger.warning("No Google Sheets data available, using CSV fallback")
+        return False
 
-    def get_questions(self, theme_id: str) -> list[str]:
-        """Return list of questions for a specific theme."""
-        if self._ensure_cache_loaded() and self._cached_questions_by_theme is not None:
-            return self._cached_questions_by_theme.get(theme_id, [])
+    def _fetch_single_flight(self, wait: bool) -> bool:
+        """Fetch from Google Sheets unless the breaker is open or a fetch is in flight.
 
-        # Fallback to CSV
-        return self.csv_fallback.get_questions(theme_id)
+        Args:
+            wait: Block until an in-flight fetch finishes instead of giving up
 
-    def get_all_questions(self) -> list[tuple[str, str]]:
-        """Return all questions with their theme_id."""
-        if self._ensure_cache_loaded() and self._cached_all_questions is not None:
-            return self._cached_all_questions
+        Returns:
+            True if the cache holds fresh data afterwards, False otherwise
+        """
+        if not self._breaker.allow_request():
+            return False
+        if not self._fetch_lock.acquire(blocking=wait):
+            return False
+        try:
+            # A concurrent caller may have refreshed while we waited for the lock
+            if self._is_cache_valid():
+                return True
+            if not self._breaker.allow_request():
+                return False
+            start = time.perf_counter()
+            try:
+                downloaded = self._revalidate()
+            except Exception as e:
+                _FETCH_SECONDS.labels("error").observe(time.perf_counter() - start)
+                self._last_refresh_ok = False
+                self._last_refresh_error = str(e)
+                delay = self._breaker.record_failure()
+                logger.warning(
+                    f"Failed to fetch from Google Sheets: {e} "
+                    f"(failure {self._breaker.consecutive_failures}, retry in {delay:.1f}s)"
+                )
+                return False
+            result = "modified" if downloaded else "not_modified"
+            _FETCH_SECONDS.labels(result).observe(time.perf_counter() - start)
+            self._last_refresh_ok = True
+            self._last_refresh_error = None
+            self._breaker.record_success()
+            return True
+        finally:
+            self._fetch_lock.release()
+
+    def _schedule_refresh(self) -> None:
+        """Start a background fetch unless one is already in flight."""
+        if not self._breaker.allow_request():
+            return
+        with self._refresh_lock:
+            if self._refresh_future is not None and not self._refresh_future.done():
+                return
+            self._refresh_future = self._refresh_executor.submit(self._background_refresh)
+
+    def _background_refresh(self) -> None:
+        """Fetch a fresh snapshot; on failure keep serving the stale one."""
+        self._fetch_single_flight(wait=False)
+
+    def get_catalog(self) -> Catalog:
+        """Return the Google Sheets catalog, or the CSV catalog on failure."""
+        if self._ensure_cache_loaded() and self._catalog is not None:
+            return self._catalog
 
         # Fallback to CSV
-        return self.csv_fallback.get_all_questions()
+        _CACHE_FALLBACK.inc()
+        return self.csv_fallback.get_catalog()
+
+    def refresh(self) -> bool:
+        """Pick up edits to the CSV fallback deck (Sheets data is TTL-driven)."""
+        return self.csv_fallback.refresh()
+
+    def after_fork(self) -> None:
+        """Recreate locks and the refresh thread, and drop inherited connections."""
+        self._fetch_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sheets-refresh"
+        )
+        self._refresh_future = None
+        self._refresh_lock = threading.Lock()
+        if self._client is not None:
+            try:
+                self._client.http_client.session.close()
+            except Exception as e:
+                logger.warning(f"Failed to reset Sheets connections after fork: {e}")
+        self.csv_fallback.after_fork()
+
+    def status(self) -> dict[str, object]:
+        """Return cache and circuit breaker state without triggering a fetch."""
+        catalog = self._catalog
+        return {
+            "source": "google_sheets",
+            "catalog_version": catalog.version if catalog is not None else None,
+            "catalog_loaded_at": catalog.loaded_at if catalog is not None else None,
+            "themes": len(catalog.themes) if catalog is not None else 0,
+            "questions": len(catalog.all_questions) if catalog is not None else 0,
+            "data_fetched_at": self._data_fetched_at,
+            "last_fetch_time": self._last_fetch_time,
+            "remote_modified_time": self._remote_modified_time,
+            "cache_valid": self._is_cache_valid(),
+            "last_refresh_ok": self._last_refresh_ok,
+            "last_refresh_error": self._last_refresh_error,
+            "fetch_in_flight": self._fetch_lock.locked(),
+            "breaker": self._breaker.stats(),
+            "fallback": self.csv_fallback.status(),
+        }
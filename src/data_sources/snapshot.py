@@ -0,0 +1,101 @@
+"""Persist catalogs to disk as checksummed JSON snapshots."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from .catalog import Catalog, Theme, build_catalog
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _checksum(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def write_snapshot(path: Path, catalog: Catalog, metadata: dict[str, object] | None = None) -> None:
+    """Atomically write a catalog snapshot.
+
+    The payload is written to a temp file in the same directory, fsynced, and
+    renamed over the target, so readers see either the old or the new file.
+
+    Args:
+        path: Destination file
+        catalog: Catalog to persist
+        metadata: Extra JSON-serializable fields stored alongside the deck
+    """
+    payload = json.dumps(
+        {
+            "themes": [dict(t) for t in catalog.themes],
+            "questions": [list(pair) for pair in catalog.all_questions],
+            "metadata": metadata or {},
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    document = json.dumps(
+        {
+            "format": SNAPSHOT_FORMAT_VERSION,
+            "checksum": _checksum(payload),
+            "payload": payload.decode("utf-8"),
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(document)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def read_snapshot(path: Path) -> tuple[Catalog, dict[str, object]] | None:
+    """Load a snapshot written by write_snapshot().
+
+    Returns:
+        (catalog, metadata), or None if the file is missing, corrupt, or
+        from an unknown format version
+    """
+    try:
+        document = json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+    if not isinstance(document, dict) or document.get("format") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning(f"Ignoring snapshot {path} with unknown format")
+        return None
+
+    payload = str(document.get("payload", "")).encode("utf-8")
+    if _checksum(payload) != document.get("checksum"):
+        logger.warning(f"Ignoring snapshot {path}: checksum mismatch")
+        return None
+
+    try:
+        data = json.loads(payload)
+        themes = [
+            Theme(id=t["id"], label=t["label"], description=t.get("description", ""))
+            for t in data["themes"]
+        ]
+        questions = [(str(theme_id), str(question)) for theme_id, question in data["questions"]]
+        metadata = dict(data.get("metadata") or {})
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Ignoring malformed snapshot {path}: {e}")
+        return None
+    return build_catalog(themes, questions), metadata
@@ -0,0 +1,60 @@
+"""Background polling of a data source for deck changes."""
+
+import logging
+import threading
+
+from .base import DataSource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+
+class CatalogWatcher:
+    """Call DataSource.refresh() periodically from a daemon thread.
+
+    Rebuilding happens on this thread, so the event loop never blocks on
+    file I/O or parsing; readers keep using the previous catalog until the
+    source swaps in the new one.
+    """
+
+    def __init__(self, source: DataSource, interval: float = DEFAULT_RELOAD_INTERVAL):
+        """Initialize the watcher.
+
+        Args:
+            source: Data source to poll
+            interval: Seconds between polls
+        """
+        self.source = source
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+        self._thread.start()
+        logger.info("Watching deck for changes every %ss", self.interval)
+
+    def stop(self) -> None:
+        """Stop polling; returns once the current poll finishes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                if self.source.refresh():
+                    catalog = self.source.get_catalog()
+                    logger.info(
+                        "Deck reloaded: version=%s themes=%d questions=%d",
+                        catalog.version,
+                        len(catalog.themes),
+                        len(catalog.all_questions),
+                    )
+            except Exception:
+                logger.exception("Deck reload failed")
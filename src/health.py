@@ -1,23 +1,92 @@
 """Minimal HTTP server for health checks. Runs in a daemon thread."""
 
+import json
 import logging
 import threading
+from collections.abc import Callable
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
+from . import metrics
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_HEALTH_PORT = 9999
 
+# name -> check returning a reason the process is unhealthy, or None
+_checks: dict[str, Callable[[], str | None]] = {}
+# name -> probe returning (ready, details) for GET /ready
+_probes: dict[str, Callable[[], tuple[bool, dict[str, object]]]] = {}
+
+
+def register_health_check(name: str, check: Callable[[], str | None]) -> None:
+    """Make GET /health fail (503) whenever check() returns a reason."""
+    _checks[name] = check
+
+
+def unregister_health_check(name: str) -> None:
+    """Remove a check added with register_health_check()."""
+    _checks.pop(name, None)
+
+
+def register_readiness_probe(
+    name: str, probe: Callable[[], tuple[bool, dict[str, object]]]
+) -> None:
+    """Include probe() in GET /ready; the instance is ready only if every probe is."""
+    _probes[name] = probe
+
+
+def readiness() -> tuple[bool, dict[str, object]]:
+    """Run every readiness probe and return (ready, per-probe details)."""
+    ready = True
+    checks: dict[str, object] = {}
+    for name, probe in list(_probes.items()):
+        try:
+            probe_ready, details = probe()
+        except Exception as e:
+            probe_ready, details = False, {"error": str(e)}
+        ready = ready and probe_ready
+        checks[name] = {"ready": probe_ready, **details}
+    return ready, checks
+
+
+def health_problems() -> list[str]:
+    """Return the reasons reported by failing health checks."""
+    problems: list[str] = []
+    for name, check in list(_checks.items()):
+        try:
+            reason = check()
+        except Exception as e:
+            reason = f"check failed: {e}"
+        if reason is not None:
+            problems.append(f"{name}: {reason}")
+    return problems
+
 
 class _HealthHandler(BaseHTTPRequestHandler):
-    """Responds 200 OK only to GET /health."""
+    """Responds to GET /health and GET /ready (503 when failing) and GET /metrics."""
 
     def do_GET(self) -> None:  # noqa: N802
         if self.path == "/health" or self.path == "/health/":
-            self.send_response(200)
+            problems = health_problems()
+            self.send_response(503 if problems else 200)
             self.send_header("Content-Type", "text/plain")
             self.end_headers()
-            self.wfile.write(b"ok")
+            self.wfile.write("\n".join(problems).encode() if problems else b"ok")
+        elif self.path == "/ready" or self.path == "/ready/":
+            ready, checks = readiness()
+            body = json.dumps({"ready": ready, "checks": checks}, default=str).encode()
+            self.send_response(200 if ready else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/metrics" or self.path == "/metrics/":
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
         else:
             self.send_response(404)
             self.end_headers()
@@ -27,7 +96,7 @@ class _HealthHandler(BaseHTTPRequestHandler):
 
 
 def start_health_server(port: int = DEFAULT_HEALTH_PORT) -> None:
-    """Start a daemon thread serving GET /health on the given port."""
+    """Start a daemon thread serving /health, /ready and /metrics on the given port."""
     server = HTTPServer(("0.0.0.0", port), _HealthHandler)
 
     def serve() -> None:
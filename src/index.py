@@ -4,22 +4,55 @@ import logging
 import os
 import sys
 from datetime import datetime
+from functools import partial
+from typing import Any
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Configure logging before importing bot (so startup logs are visible)
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
-    stream=sys.stdout,
-    force=True,
+from .logging_setup import (  # noqa: E402
+    DEFAULT_LOG_FORMAT,
+    LOG_FORMATS,
+    configure_logging,
+    parse_sample_rates,
+    set_action_sample_rates,
 )
+
+# Configure logging before importing bot (so startup logs are visible).
+# Records are queued and written by a background thread: "json" or "text"
+_log_format = os.environ.get("LOG_FORMAT", DEFAULT_LOG_FORMAT).lower()
+configure_logging(logging.INFO, _log_format if _log_format in LOG_FORMATS else DEFAULT_LOG_FORMAT)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-from .bot import build_application  # noqa: E402
-from .health import DEFAULT_HEALTH_PORT, start_health_server  # noqa: E402
+from .bot import build_application, run_polling, run_webhook  # noqa: E402
+from .bot.app import (  # noqa: E402
+    DEFAULT_WEBHOOK_LISTEN,
+    DEFAULT_WEBHOOK_MAX_CONNECTIONS,
+    DEFAULT_WEBHOOK_PORT,
+)
+from .bot.broadcast import DEFAULT_BROADCAST_DEADLINE  # noqa: E402
+from .bot.coalesce import DEFAULT_NAV_COALESCE_DELAY  # noqa: E402
+from .bot.loop_monitor import (  # noqa: E402
+    DEFAULT_LOOP_BLOCK_THRESHOLD,
+    DEFAULT_LOOP_WEDGED_AFTER,
+)
+from .bot.outbound import DEFAULT_GLOBAL_RATE  # noqa: E402
+from .bot.profiler import DEFAULT_PROFILE_DIR, DEFAULT_PROFILE_SAMPLE_RATE  # noqa: E402
+from .bot.sweeper import (  # noqa: E402
+    DEFAULT_MAX_TRACKED_CHATS,
+    DEFAULT_SESSION_IDLE_TTL,
+    DEFAULT_SESSION_SWEEP_INTERVAL,
+)
+from .bot.update_processor import DEFAULT_MAX_CONCURRENT_UPDATES  # noqa: E402
+from .data_loader import readiness, watch_for_changes  # noqa: E402
+from .data_sources.watcher import DEFAULT_RELOAD_INTERVAL  # noqa: E402
+from .health import (  # noqa: E402
+    DEFAULT_HEALTH_PORT,
+    register_readiness_probe,
+    start_health_server,
+)
+from .prefork import DEFAULT_WEB_WORKERS, serve_prefork  # noqa: E402
 from .version import get_changelog, get_version  # noqa: E402
 
 logger = logging.getLogger(__name__)
@@ -48,7 +81,38 @@ def main() -> None:
         )
         raise SystemExit(1)
 
-    logger.info("Bot starting (polling) in %s environment", env_name)
+    if _log_format not in LOG_FORMATS:
+        logger.warning("Unknown LOG_FORMAT '%s'; using %s", _log_format, DEFAULT_LOG_FORMAT)
+
+    # Fraction of each action's logs to keep, e.g. "next_card=0.1,*=1"
+    try:
+        set_action_sample_rates(parse_sample_rates(os.environ.get("LOG_SAMPLE_RATES", "")))
+    except ValueError as e:
+        logger.critical("Invalid LOG_SAMPLE_RATES: %s; exiting", e)
+        raise SystemExit(1) from e
+
+    # "polling" (default) or "webhook"
+    update_mode = os.environ.get("UPDATE_MODE", "polling").lower()
+    webhook_url = os.environ.get("WEBHOOK_URL")
+    if update_mode not in ("polling", "webhook"):
+        logger.critical("Unknown UPDATE_MODE '%s'; exiting", update_mode)
+        raise SystemExit(1)
+    if update_mode == "webhook" and not webhook_url:
+        logger.critical("UPDATE_MODE=webhook requires WEBHOOK_URL; exiting")
+        raise SystemExit(1)
+
+    # Worker processes behind one webhook front process (webhook mode only)
+    web_workers = int(os.environ.get("WEB_WORKERS", DEFAULT_WEB_WORKERS))
+    if web_workers > 1 and update_mode != "webhook":
+        logger.critical("WEB_WORKERS > 1 requires UPDATE_MODE=webhook; exiting")
+        raise SystemExit(1)
+
+    logger.info(
+        "Bot starting (%s, %d worker(s)) in %s environment",
+        update_mode,
+        max(1, web_workers),
+        env_name,
+    )
     sys.stdout.flush()
     sys.stderr.flush()
 
@@ -61,23 +125,102 @@ def main() -> None:
     changelog = get_changelog(num_versions=2)
     coffee_link = os.environ.get("COFFEE_LINK")
 
+    # Idle session eviction (seconds); a sweep interval of 0 disables it
+    session_idle_ttl = float(os.environ.get("SESSION_IDLE_TTL", DEFAULT_SESSION_IDLE_TTL))
+    session_sweep_interval = float(
+        os.environ.get("SESSION_SWEEP_INTERVAL", DEFAULT_SESSION_SWEEP_INTERVAL)
+    )
+    max_tracked_chats = int(os.environ.get("MAX_TRACKED_CHATS", DEFAULT_MAX_TRACKED_CHATS))
+
+    # Seconds allowed for "going offline" notices during shutdown
+    shutdown_notify_deadline = float(
+        os.environ.get("SHUTDOWN_NOTIFY_DEADLINE", DEFAULT_BROADCAST_DEADLINE)
+    )
+
+    # Updates handled at once across chats (each chat is still processed in order)
+    max_concurrent_updates = int(
+        os.environ.get("MAX_CONCURRENT_UPDATES", DEFAULT_MAX_CONCURRENT_UPDATES)
+    )
+
+    # Extra seconds to wait for more Next/Back taps before editing the card
+    nav_coalesce_delay = float(os.environ.get("NAV_COALESCE_DELAY", DEFAULT_NAV_COALESCE_DELAY))
+
+    # Bot API requests per second across all chats (flood control lowers it temporarily)
+    outbound_rate = float(os.environ.get("OUTBOUND_RATE", DEFAULT_GLOBAL_RATE))
+
+    # Event loop stalls longer than this are logged with a stack sample (0 disables);
+    # /health fails once a stall lasts LOOP_WEDGED_AFTER seconds
+    loop_block_threshold = float(
+        os.environ.get("LOOP_BLOCK_THRESHOLD", DEFAULT_LOOP_BLOCK_THRESHOLD)
+    )
+    loop_wedged_after = float(os.environ.get("LOOP_WEDGED_AFTER", DEFAULT_LOOP_WEDGED_AFTER))
+
+    # Fraction of updates profiled into PROFILE_DIR (the creator can change it with /profile)
+    profile_sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", DEFAULT_PROFILE_SAMPLE_RATE))
+    profile_dir = os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+
     # Capture deployment time
     deployment_time = datetime.now().strftime("%Y-%m-%d %H:%M UTC")
 
-    app = build_application(
-        token,
-        secret=None,
-        env=env_name,
-        creator_user_id=creator_user_id,
-        bot_version=bot_version,
-        changelog=changelog,
-        coffee_link=coffee_link,
-        deployment_time=deployment_time,
-    )
+    app_options: dict[str, Any] = {
+        "secret": os.environ.get("WEBHOOK_SECRET") or None,
+        "env": env_name,
+        "creator_user_id": creator_user_id,
+        "bot_version": bot_version,
+        "changelog": changelog,
+        "coffee_link": coffee_link,
+        "deployment_time": deployment_time,
+        "session_idle_ttl": session_idle_ttl,
+        "session_sweep_interval": session_sweep_interval,
+        "max_tracked_chats": max_tracked_chats,
+        "shutdown_notify_deadline": shutdown_notify_deadline,
+        "max_concurrent_updates": max_concurrent_updates,
+        "nav_coalesce_delay": nav_coalesce_delay,
+        "outbound_rate": outbound_rate,
+        "loop_block_threshold": loop_block_threshold,
+        "loop_wedged_after": loop_wedged_after,
+        "profile_sample_rate": profile_sample_rate,
+        "profile_dir": profile_dir,
+    }
+    webhook_options: dict[str, Any] = {
+        "listen": os.environ.get("WEBHOOK_LISTEN", DEFAULT_WEBHOOK_LISTEN),
+        "port": int(os.environ.get("WEBHOOK_PORT", DEFAULT_WEBHOOK_PORT)),
+        "url_path": os.environ.get("WEBHOOK_PATH") or None,
+        "max_connections": int(
+            os.environ.get("WEBHOOK_MAX_CONNECTIONS", DEFAULT_WEBHOOK_MAX_CONNECTIONS)
+        ),
+    }
     health_port = int(os.environ.get("HEALTH_PORT", DEFAULT_HEALTH_PORT))
-    start_health_server(port=health_port)
+    register_readiness_probe("catalog", readiness)
+
+    # Hot-reload deck files; 0 disables the watcher
+    reload_interval = float(os.environ.get("DECK_RELOAD_INTERVAL", DEFAULT_RELOAD_INTERVAL))
     try:
-        app.run_polling(allowed_updates=["message", "callback_query"])
+        if web_workers > 1 and webhook_url:
+            # Workers are forked with the deck already loaded and start their own
+            # watchers (threads do not survive fork); the health server is
+            # started after forking
+            serve_prefork(
+                token,
+                partial(build_application, token, **app_options, with_updater=False),
+                web_workers,
+                webhook_url,
+                secret=app_options["secret"],
+                reload_interval=reload_interval,
+                wedged_after=loop_wedged_after,
+                health_port=health_port,
+                **webhook_options,
+            )
+            return
+
+        start_health_server(port=health_port)
+        app = build_application(token, **app_options)
+        if reload_interval > 0:
+            watch_for_changes(reload_interval)
+        if update_mode == "webhook" and webhook_url:
+            run_webhook(app, webhook_url, **webhook_options)
+        else:
+            run_polling(app)
     finally:
         logger.info("Bot stopped. Restart the process to accept messages again.")
 
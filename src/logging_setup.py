@@ -0,0 +1,293 @@
+"""Queue-backed logging with structured records, action sampling and error aggregation.
+
+configure_logging() routes every logger through a QueueHandler, so logging
+calls on the event loop only enqueue a record; a background thread formats
+queued records and writes them to the stream in batches.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from logging.handlers import QueueHandler
+from typing import IO, Any
+
+DEFAULT_LOG_FORMAT = "json"
+LOG_FORMATS = ("json", "text")
+# Most records written per stream write
+MAX_BATCH = 256
+# Identical handler errors within this many seconds are counted, not logged
+DEFAULT_ERROR_AGGREGATION_WINDOW = 60.0
+MAX_AGGREGATED_ERRORS = 1000
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def _fields(record: logging.LogRecord) -> Mapping[str, object]:
+    fields = getattr(record, "fields", None)
+    return fields if isinstance(fields, Mapping) else {}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from extra={"fields": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, object] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic text lines, with structured fields appended as key=value pairs."""
+
+    def __init__(self) -> None:
+        super().__init__(_TEXT_FORMAT)
+
+    def formatMessage(self, record: logging.LogRecord) -> str:  # noqa: N802
+        line = super().formatMessage(record)
+        fields = _fields(record)
+        if not fields:
+            return line
+        return line + " | " + " | ".join(f"{key}={value}" for key, value in fields.items())
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps structured fields and exception text separate.
+
+    The stock prepare() folds the traceback into the message; here the
+    message is merged with its args and the traceback is pre-rendered into
+    exc_text, so the writer thread's formatter can place each in its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class BatchingWriter:
+    """Background thread that drains a record queue and writes it in batches."""
+
+    def __init__(
+        self, records: "queue.SimpleQueue[logging.LogRecord | None]", formatter: logging.Formatter
+    ):
+        self.records = records
+        self.formatter = formatter
+        self.stream: IO[str] = sys.stdout
+        self._thread: threading.Thread | None = None
+
+    def start(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write everything queued so far, then stop the thread."""
+        if self._thread is None:
+            return
+        self.records.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.records.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [self._format(record) for record in batch if record is not None]
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:
+                    pass
+            if len(lines) < len(batch):
+                return  # stop() was called
+
+    def _format(self, record: logging.LogRecord) -> str:
+        try:
+            return self.formatter.format(record)
+        except Exception as e:
+            return f"Failed to format log record from {record.name}: {e}"
+
+
+_writer: BatchingWriter | None = None
+_handler: _StructuredQueueHandler | None = None
+
+
+def _stop_before_fork() -> None:
+    """Write out queued records and stop the writer, so no lock it holds is copied into a child."""
+    if _writer is not None:
+        _writer.stop()
+
+
+def _resume_after_fork() -> None:
+    if _writer is not None:
+        _writer.start(_writer.stream)
+
+
+def _restart_in_child() -> None:
+    """Give a forked child its own queue and writer thread (threads do not survive fork)."""
+    global _writer
+    if _writer is None or _handler is None:
+        return
+    records: queue.SimpleQueue[logging.LogRecord | None] = queue.SimpleQueue()
+    _handler.queue = records
+    stream = _writer.stream
+    _writer = BatchingWriter(records, _writer.formatter)
+    _writer.start(stream)
+
+
+def configure_logging(
+    level: int = logging.INFO, log_format: str = DEFAULT_LOG_FORMAT, stream: IO[str] | None = None
+) -> None:
+    """Send all logging through a queue to a background writer.
+
+    Args:
+        level: Root logger level
+        log_format: "json" (one object per line) or "text"
+        stream: Where records are written; defaults to stdout
+    """
+    global _writer, _handler
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"log_format must be one of {LOG_FORMATS}")
+    previous = _writer
+    formatter = JsonFormatter() if log_format == "json" else TextFormatter()
+    records: queue.SimpleQueue[logging.LogRecord | None] = queue.SimpleQueue()
+    _handler = _StructuredQueueHandler(records)
+    _writer = BatchingWriter(records, formatter)
+    _writer.start(stream or sys.stdout)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    if previous is not None:
+        previous.stop()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(
+    before=_stop_before_fork,
+    after_in_parent=_resume_after_fork,
+    after_in_child=_restart_in_child,
+)
+
+
+# Per-action sampling for high-volume action logs
+_action_sample_rates: dict[str, float] = {}
+_default_sample_rate = 1.0
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse "next_card=0.1,previous_card=0.1,*=1" into {action: rate}.
+
+    Raises:
+        ValueError: On malformed entries or rates outside 0-1
+    """
+    rates: dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        action, sep, value = item.partition("=")
+        if not sep or not action.strip():
+            raise ValueError(f"Expected action=rate, got {item!r}")
+        rate = float(value)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Sample rate for {action.strip()!r} must be between 0 and 1")
+        rates[action.strip()] = rate
+    return rates
+
+
+def set_action_sample_rates(rates: Mapping[str, float]) -> None:
+    """Set the fraction of each action's logs to keep; "*" sets the default."""
+    global _default_sample_rate
+    _action_sample_rates.clear()
+    _action_sample_rates.update(rates)
+    _default_sample_rate = _action_sample_rates.pop("*", 1.0)
+
+
+def sample_action(action: str, rng: Callable[[], float] = random.random) -> bool:
+    """Return True if this occurrence of action should be logged."""
+    rate = _action_sample_rates.get(action, _default_sample_rate)
+    return rate >= 1 or (rate > 0 and rng() < rate)
+
+
+class ErrorAggregator:
+    """Collapse repeats of the same error into one log line per window.
+
+    record() returns how many repeats were suppressed since the error was
+    last logged (0 the first time), or None while it should stay quiet.
+    flush() hands over the repeats still pending, so a storm that stops (or
+    a shutdown) does not hide how many there were.
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_ERROR_AGGREGATION_WINDOW,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self._clock = clock
+        # key -> [time last logged, repeats suppressed since]
+        self._seen: OrderedDict[Hashable, list[Any]] = OrderedDict()
+
+    def record(self, key: Hashable) -> int | None:
+        now = self._clock()
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            return None
+        suppressed = entry[1] if entry is not None else 0
+        self._seen[key] = [now, 0]
+        self._seen.move_to_end(key)
+        if len(self._seen) > MAX_AGGREGATED_ERRORS:
+            self._seen.popitem(last=False)
+        return suppressed
+
+    def flush(self) -> list[tuple[Any, int]]:
+        """Return (key, repeats suppressed) for every error with repeats pending.
+
+        The caller logs them; each such error then counts as logged now.
+        """
+        now = self._clock()
+        pending: list[tuple[Any, int]] = []
+        for key, entry in self._seen.items():
+            if entry[1]:
+                pending.append((key, entry[1]))
+                entry[0], entry[1] = now, 0
+        return pending
@@ -0,0 +1,317 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms are registered once at import time by the modules
+that record them; recording is a dict lookup plus a locked add, so it is
+cheap enough for per-update hot paths. render() produces the text format
+served at GET /metrics by the health server.
+
+Processes that nothing scrapes (prefork workers) send snapshot() to the
+process serving /metrics, which renders each one with a worker label.
+"""
+
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, Generic, TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Label values -> child value, as returned by a metric's snapshot()
+Samples = Mapping[tuple[str, ...], Any]
+# Metric name -> samples, as returned by Registry.snapshot()
+Snapshot = dict[str, dict[tuple[str, ...], Any]]
+
+# Seconds; suits both in-process work (sub-millisecond) and network calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(label for label in extra if label)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+    def reset(self) -> None:
+        self.value = 0.0
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def snapshot(self) -> float:
+        return self.value
+
+    def reset(self) -> None:
+        self.value = 0.0
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple[tuple[int, ...], float]:
+        with self._lock:
+            return tuple(self.counts), self.sum
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self._buckets) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+_ChildT = TypeVar("_ChildT", _CounterChild, _GaugeChild, _HistogramChild)
+
+
+class _Metric(ABC, Generic[_ChildT]):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], _ChildT] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self) -> _ChildT: ...
+
+    def labels(self, *values: str) -> _ChildT:
+        """Return the child for these label values (cache it on hot paths)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _samples(self, samples: Samples, extra: str = "") -> Iterator[str]:
+        """Yield exposition lines for samples, adding the extra label to each."""
+
+    def snapshot(self) -> dict[tuple[str, ...], Any]:
+        """Return the current value of every child, keyed by label values."""
+        return {values: child.snapshot() for values, child in list(self._children.items())}
+
+    def reset(self) -> None:
+        """Zero every child (children stay bound, so cached labels() keep working)."""
+        for child in list(self._children.values()):
+            child.reset()
+
+    def render(self, workers: Mapping[str, Samples] | None = None) -> str:
+        """Render this metric, plus each worker's samples labelled with its name."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(self.snapshot()),
+        ]
+        for worker, samples in (workers or {}).items():
+            lines.extend(self._samples(samples, f'worker="{_escape(worker)}"'))
+        return "\n".join(lines)
+
+
+class Counter(_Metric[_CounterChild]):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter."""
+        self.labels().inc(amount)
+
+    def _samples(self, samples: Samples, extra: str = "") -> Iterator[str]:
+        for values, value in samples.items():
+            labels = _format_labels(self.labelnames, values, extra)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(_Metric[_GaugeChild]):
+    """Value that is set rather than accumulated, optionally split by labels."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge."""
+        self.labels().set(value)
+
+    def _samples(self, samples: Samples, extra: str = "") -> Iterator[str]:
+        for values, value in samples.items():
+            labels = _format_labels(self.labelnames, values, extra)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record a value in the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def _samples(self, samples: Samples, extra: str = "") -> Iterator[str]:
+        bounds = [*self.buckets, math.inf]
+        for values, (counts, total) in samples.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, values, extra, le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values, extra)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Collection of metrics rendered together, along with workers' snapshots."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._workers: dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Counter | Gauge | Histogram) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def snapshot(self) -> Snapshot:
+        """Return every metric's samples, for sending to another process."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def reset(self) -> None:
+        """Zero every metric and forget workers' snapshots.
+
+        Used by forked workers, which would otherwise report the counts their
+        parent had recorded before the fork as their own.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            self._workers.clear()
+        for metric in metrics:
+            metric.reset()
+
+    def set_worker_snapshot(self, worker: str, snapshot: Snapshot) -> None:
+        """Replace the samples rendered for a worker (another process's snapshot())."""
+        with self._lock:
+            self._workers[worker] = snapshot
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            workers = dict(self._workers)
+        parts: list[str] = []
+        for metric in metrics:
+            samples = {
+                worker: snapshot[metric.name]
+                for worker, snapshot in workers.items()
+                if metric.name in snapshot
+            }
+            parts.append(metric.render(samples) + "\n")
+        return "".join(parts)
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Create and register a counter."""
+    metric = Counter(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Create and register a gauge."""
+    metric = Gauge(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create and register a histogram."""
+    metric = Histogram(name, documentation, labelnames, buckets)
+    REGISTRY.register(metric)
+    return metric
+
+
+def render() -> str:
+    """Return the default registry in Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,516 @@
+"""Prefork serving: one webhook front process feeding N forked bot workers.
+
+The front process loads the deck, freezes the heap with gc.freeze(), and
+forks a supervisor before starting any threads of its own. The supervisor
+stays single-threaded and forks the workers (and re-forks any that die), so
+no worker is forked while another thread holds a lock, and every worker
+shares the same catalog pages copy-on-write. The front then receives
+Telegram's webhook requests on a plain HTTP server and hands each update to
+the worker chosen by hashing its chat id, which keeps all of a chat's updates
+(and its session in chat_data) on one worker.
+
+Workers send their metrics to the front every few seconds, so the front's
+GET /metrics covers the whole instance. They also keep a heartbeat and
+their application's state in shared memory, so the front's GET /health fails
+when a worker's loop is wedged and its GET /ready reflects the workers.
+"""
+
+import asyncio
+import ctypes
+import gc
+import hmac
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import wait
+from multiprocessing.context import ForkProcess
+from typing import Any
+from urllib.parse import urlsplit
+
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from . import data_loader, logging_setup, metrics
+from .bot.app import ALLOWED_UPDATES, check_webhook_secret
+from .bot.loop_monitor import DEFAULT_LOOP_WEDGED_AFTER
+from .health import (
+    register_health_check,
+    register_readiness_probe,
+    start_health_server,
+    unregister_health_check,
+)
+
+logger = logging.getLogger(__name__)
+
+AppType = Application[Any, Any, Any, Any, Any, Any]
+# (worker id, metrics snapshot) sent from workers to the front
+Report = tuple[int, metrics.Snapshot]
+
+DEFAULT_WEB_WORKERS = 1
+# Telegram updates are a few KB; anything far larger is not from Telegram
+MAX_UPDATE_BYTES = 1 << 20
+# Seconds a worker may take to stop (shutdown notices are sent meanwhile)
+WORKER_STOP_TIMEOUT = 30.0
+# Seconds between a worker's metrics reports to the front
+METRICS_REPORT_INTERVAL = 5.0
+# Seconds between heartbeats from a worker's event loop
+HEARTBEAT_INTERVAL = 1.0
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def dispatch_key(update: dict[str, Any]) -> int:
+    """Return the id used to pick a worker for a raw update.
+
+    The chat id when the update has one, else the sender's user id, else the
+    update id (so chatless updates are still spread across workers).
+    """
+    for field in ("message", "edited_message", "callback_query"):
+        body = update.get(field)
+        if not isinstance(body, dict):
+            continue
+        message = body.get("message", body)
+        chat = message.get("chat") if isinstance(message, dict) else None
+        if isinstance(chat, dict) and isinstance(chat.get("id"), int):
+            return chat["id"]
+        sender = body.get("from")
+        if isinstance(sender, dict) and isinstance(sender.get("id"), int):
+            return sender["id"]
+    update_id = update.get("update_id")
+    return update_id if isinstance(update_id, int) else 0
+
+
+class _WorkerState(ctypes.Structure):
+    """A worker's state in shared memory, written by the worker and read by the front."""
+
+    _fields_ = [
+        # time.monotonic() when the worker's event loop last got to run
+        ("heartbeat", ctypes.c_double),
+        # time.time() when the worker last finished processing an update; 0 if never
+        ("last_update_at", ctypes.c_double),
+        ("running", ctypes.c_bool),
+        # Process id of the current worker (set by the supervisor); 0 while none is alive
+        ("pid", ctypes.c_int),
+    ]
+
+
+async def _beat(app: AppType, state: _WorkerState) -> None:
+    """Publish the loop's heartbeat and the application's state for the front."""
+    while True:
+        state.heartbeat = time.monotonic()
+        state.running = app.running
+        state.last_update_at = getattr(app.update_processor, "last_processed_at", None) or 0.0
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+
+async def _serve_worker(
+    app: AppType,
+    updates: "multiprocessing.Queue[bytes | None]",
+    state: _WorkerState,
+) -> None:
+    """Feed updates from the front process into the application until told to stop."""
+    loop = asyncio.get_running_loop()
+    beat = loop.create_task(_beat(app, state))
+    parent = os.getppid()
+
+    def next_update() -> bytes | None:
+        while True:
+            try:
+                return updates.get(timeout=1.0)
+            except queue.Empty:
+                if os.getppid() != parent:
+                    logger.warning("Supervisor exited; stopping worker")
+                    return None
+
+    await app.initialize()
+    try:
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        while (raw := await loop.run_in_executor(None, next_update)) is not None:
+            try:
+                update = Update.de_json(json.loads(raw), app.bot)
+            except (TypeError, ValueError) as e:
+                logger.warning("Dropping malformed update: %s", e)
+                continue
+            await app.update_queue.put(update)
+        await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+    finally:
+        await app.shutdown()
+        beat.cancel()
+        state.running = False
+
+
+def _report_metrics(
+    worker_id: int, reports: "multiprocessing.Queue[Report | None]", stopped: threading.Event
+) -> None:
+    """Send this worker's metrics to the front until stopped, then once more."""
+    while not stopped.wait(METRICS_REPORT_INTERVAL):
+        reports.put((worker_id, metrics.REGISTRY.snapshot()))
+    reports.put((worker_id, metrics.REGISTRY.snapshot()))
+
+
+def _worker_main(
+    worker_id: int,
+    updates: "multiprocessing.Queue[bytes | None]",
+    reports: "multiprocessing.Queue[Report | None]",
+    state: _WorkerState,
+    app_factory: Callable[[], AppType],
+    reload_interval: float,
+) -> None:
+    """Entry point of a forked worker."""
+    # The front process coordinates shutdown through the queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    try:
+        data_loader.after_fork()
+        metrics.REGISTRY.reset()
+        if reload_interval > 0:
+            data_loader.watch_for_changes(reload_interval)
+        stopped = threading.Event()
+        reporter = threading.Thread(
+            target=_report_metrics, args=(worker_id, reports, stopped), name="metrics-report"
+        )
+        reporter.start()
+        logger.info("Worker %d started (pid %d)", worker_id, os.getpid())
+        try:
+            asyncio.run(_serve_worker(app_factory(), updates, state))
+        finally:
+            stopped.set()
+            reporter.join()
+        logger.info("Worker %d stopped", worker_id)
+    finally:
+        # Forked processes leave through os._exit(), which skips the atexit
+        # handler, so write out queued records here
+        logging_setup.shutdown_logging()
+
+
+class _WorkerPool:
+    """Forked workers, each with its own update queue; restarts workers that die.
+
+    start() forks a supervisor process, which forks the workers and re-forks
+    any that die. Call it before the front starts any threads: the supervisor
+    then has only the main thread whenever it forks, and as it is forked
+    right after gc.freeze() its workers still share the frozen pages.
+
+    Metrics reported by the workers are added to this process's registry,
+    labelled with the worker id. Each worker's event loop stamps a shared
+    heartbeat; health_problem() reports workers whose heartbeat is more than
+    wedged_after seconds old, and readiness() whether every worker is alive
+    and running.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        app_factory: Callable[[], AppType],
+        reload_interval: float,
+        wedged_after: float = DEFAULT_LOOP_WEDGED_AFTER,
+        stop_timeout: float = WORKER_STOP_TIMEOUT,
+    ):
+        self._ctx = multiprocessing.get_context("fork")
+        self._app_factory = app_factory
+        self._reload_interval = reload_interval
+        self.wedged_after = wedged_after
+        self.stop_timeout = stop_timeout
+        self.queues: list[multiprocessing.Queue[bytes | None]] = [
+            self._ctx.Queue() for _ in range(size)
+        ]
+        self.reports: multiprocessing.Queue[Report | None] = self._ctx.Queue()
+        # Each field has a single writing process and is read here, so no lock is needed
+        self.states: list[_WorkerState] = [self._ctx.RawValue(_WorkerState) for _ in range(size)]
+        # Counts from now, so a worker that never starts its loop is caught too
+        for state in self.states:
+            state.heartbeat = time.monotonic()
+        self._stopping = self._ctx.Event()
+        self._supervisor: ForkProcess | None = None
+        self._collector: threading.Thread | None = None
+        # Only used in the supervisor
+        self._processes: list[ForkProcess | None] = [None] * size
+
+    def _spawn(self, worker_id: int) -> None:
+        state = self.states[worker_id]
+        state.heartbeat = time.monotonic()
+        state.last_update_at = 0.0
+        state.running = False
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self.queues[worker_id],
+                self.reports,
+                state,
+                self._app_factory,
+                self._reload_interval,
+            ),
+            name=f"bot-worker-{worker_id}",
+        )
+        process.start()
+        state.pid = process.pid or 0
+        self._processes[worker_id] = process
+
+    def _restart_dead(self) -> None:
+        for worker_id, process in enumerate(self._processes):
+            if process is not None and not process.is_alive():
+                state = self.states[worker_id]
+                state.pid = 0
+                state.running = False
+                logger.error(
+                    "Worker %d exited with code %s; restarting", worker_id, process.exitcode
+                )
+                self._spawn(worker_id)
+
+    def _stop_workers(self) -> None:
+        for worker_id, process in enumerate(self._processes):
+            if process is None:
+                continue
+            process.join(self.stop_timeout)
+            if process.is_alive():
+                # Workers ignore SIGTERM
+                logger.warning("Worker %d did not stop in time; killing it", worker_id)
+                process.kill()
+                process.join()
+            self.states[worker_id].pid = 0
+
+    def _supervise(self) -> None:
+        """Entry point of the supervisor: fork the workers and restart any that die."""
+        # The front process coordinates shutdown through the stopping event
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        front = os.getppid()
+        try:
+            for worker_id in range(len(self.queues)):
+                self._spawn(worker_id)
+            while True:
+                wait([process.sentinel for process in self._processes if process], timeout=1.0)
+                # Checked after the wait: workers only exit for good once this is set
+                if self._stopping.is_set():
+                    break
+                if os.getppid() != front:
+                    logger.warning("Front process exited; stopping workers")
+                    for updates in self.queues:
+                        updates.put(None)
+                    break
+                self._restart_dead()
+            self._stop_workers()
+        finally:
+            # See _worker_main
+            logging_setup.shutdown_logging()
+
+    def _collect_reports(self) -> None:
+        while (report := self.reports.get()) is not None:
+            worker_id, snapshot = report
+            metrics.REGISTRY.set_worker_snapshot(str(worker_id), snapshot)
+
+    def start(self) -> None:
+        """Fork the supervisor (and through it the workers), then collect their metrics."""
+        self._supervisor = self._ctx.Process(target=self._supervise, name="bot-worker-supervisor")
+        self._supervisor.start()
+        self._collector = threading.Thread(
+            target=self._collect_reports, name="metrics-collector", daemon=True
+        )
+        self._collector.start()
+
+    def _supervised(self) -> bool:
+        return self._supervisor is not None and self._supervisor.is_alive()
+
+    def health_problem(self) -> str | None:
+        """Return why the workers cannot serve (supervisor gone, loops not beating), or None."""
+        if self._supervisor is not None and not self._supervised():
+            return f"worker supervisor exited with code {self._supervisor.exitcode}"
+        if self.wedged_after <= 0:
+            return None
+        now = time.monotonic()
+        stalled = [
+            f"worker {worker_id} event loop blocked for {now - state.heartbeat:.1f}s"
+            for worker_id, state in enumerate(self.states)
+            if now - state.heartbeat >= self.wedged_after
+        ]
+        return "; ".join(stalled) or None
+
+    def readiness(self) -> tuple[bool, dict[str, object]]:
+        """Report each worker's liveness and last processed update.
+
+        Ready only while every worker is alive and its application running,
+        since each worker alone serves its share of the chats.
+        """
+        now = time.time()
+        supervised = self._supervised()
+        ready = True
+        workers: dict[str, object] = {}
+        for worker_id, state in enumerate(self.states):
+            alive = supervised and state.pid != 0
+            running = alive and bool(state.running)
+            last = state.last_update_at or None
+            ready = ready and running
+            workers[str(worker_id)] = {
+                "alive": alive,
+                "running": running,
+                "last_update_at": last,
+                "last_update_age": now - last if last is not None else None,
+            }
+        return ready, {"workers": workers}
+
+    def dispatch(self, key: int, raw: bytes) -> None:
+        self.queues[key % len(self.queues)].put(raw)
+
+    def stop(self) -> None:
+        """Ask every worker to finish; the supervisor kills any still running after stop_timeout."""
+        self._stopping.set()
+        for updates in self.queues:
+            updates.put(None)
+        if self._supervisor is not None:
+            self._supervisor.join()
+        if self._collector is not None:
+            self.reports.put(None)
+            self._collector.join()
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], pool: _WorkerPool, path: str, secret: str | None):
+        super().__init__(address, _WebhookHandler)
+        self.pool = pool
+        self.url_path = "/" + path.strip("/")
+        self.secret = secret
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Accepts Telegram's POSTs and forwards each update to its worker."""
+
+    def _reply(self, status: int) -> None:
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:  # noqa: N802
+        server: _WebhookServer = self.server  # type: ignore[assignment]
+        if self.path.rstrip("/") != server.url_path.rstrip("/"):
+            self._reply(404)
+            return
+        secret = server.secret
+        if secret is not None and not hmac.compare_digest(
+            self.headers.get(_SECRET_HEADER, "").encode(), secret.encode()
+        ):
+            self._reply(403)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reply(411)
+            return
+        if not 0 < length <= MAX_UPDATE_BYTES:
+            self._reply(413)
+            return
+        raw = self.rfile.read(length)
+        try:
+            update = json.loads(raw)
+        except ValueError:
+            self._reply(400)
+            return
+        if not isinstance(update, dict):
+            self._reply(400)
+            return
+        server.pool.dispatch(dispatch_key(update), raw)
+        self._reply(200)
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.debug("webhook %s", args[0] if args else "")
+
+
+async def _set_webhook(
+    token: str, webhook_url: str, secret: str | None, max_connections: int
+) -> None:
+    async with Bot(token) as bot:
+        await bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret,
+            max_connections=max_connections,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+
+
+def serve_prefork(
+    token: str,
+    app_factory: Callable[[], AppType],
+    workers: int,
+    webhook_url: str,
+    listen: str,
+    port: int,
+    url_path: str | None,
+    secret: str | None,
+    max_connections: int,
+    reload_interval: float = 0,
+    wedged_after: float = DEFAULT_LOOP_WEDGED_AFTER,
+    health_port: int | None = None,
+) -> None:
+    """Serve webhook updates with a front process and workers forked by its supervisor.
+
+    Blocks until SIGINT or SIGTERM, then stops accepting updates and lets
+    each worker drain its queue and run its shutdown hooks.
+
+    Args:
+        token: Bot token, used to register the webhook
+        app_factory: Builds a worker's application (without an updater)
+        workers: Number of worker processes
+        webhook_url: Public HTTPS URL Telegram posts updates to
+        listen: Local address to bind
+        port: Local port to bind
+        url_path: Local path to serve; defaults to the path of webhook_url
+        secret: Expected X-Telegram-Bot-Api-Secret-Token, or None to skip the check
+        max_connections: Maximum simultaneous connections Telegram may open
+        reload_interval: Seconds between deck change checks in each worker; 0 disables
+        wedged_after: Seconds without a heartbeat from a worker's event loop
+            before GET /health fails; 0 disables the check
+        health_port: Port for the health server, started once the workers are
+            forked; None if the caller runs it
+    """
+    check_webhook_secret(secret)
+    if secret is None:
+        logger.warning("Webhook secret not set; update requests will not be verified")
+    if url_path is None:
+        url_path = urlsplit(webhook_url).path
+    asyncio.run(_set_webhook(token, webhook_url, secret, max_connections))
+
+    # Load the deck in this process and move everything allocated so far out
+    # of the collector's reach, so workers' GC passes do not touch (and copy)
+    # the shared pages
+    catalog = data_loader.get_catalog()
+    logger.info("Catalog v%d loaded; forking %d workers", catalog.version, workers)
+    gc.collect()
+    gc.freeze()
+
+    # Fork before starting any threads in this process
+    pool = _WorkerPool(workers, app_factory, reload_interval, wedged_after)
+    pool.start()
+    register_health_check("workers", pool.health_problem)
+    register_readiness_probe("workers", pool.readiness)
+    if health_port is not None:
+        start_health_server(port=health_port)
+
+    server = _WebhookServer((listen, port), pool, url_path, secret)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    logger.info("Webhook front listening on %s:%d/%s", listen, port, url_path.strip("/"))
+
+    stopping = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopping.set())
+    try:
+        while not stopping.wait(1.0):
+            pass
+    finally:
+        logger.info("Stopping webhook front and %d workers", workers)
+        server.shutdown()
+        server.server_close()
+        unregister_health_check("workers")
+        pool.stop()
@@ -0,0 +1,30 @@
+"""Smoke test for the data source benchmark suite."""
+
+import csv
+from pathlib import Path
+
+from benchmarks.bench_data_sources import SOURCES, report, run
+from benchmarks.deckgen import sheet_rows, theme_count, write_csv_deck
+from src.data_sources.csv_source import CSVDataSource
+
+
+def test_generated_decks_match_between_layouts(tmp_path: Path):
+    write_csv_deck(tmp_path, 500, seed=3)
+    rows = sheet_rows(500, seed=3)
+    with open(tmp_path / "questions.csv", encoding="utf-8", newline="") as f:
+        csv_questions = [(row["theme_id"], row["question"]) for row in csv.DictReader(f)]
+    assert csv_questions == [(row[0], row[3]) for row in rows[1:]]
+
+    catalog = CSVDataSource(tmp_path).get_catalog()
+    assert len(catalog.themes) == theme_count(500)
+    assert len(catalog.all_questions) == 500
+
+
+def test_suite_reports_every_source():
+    document = run(sizes=(200,), repeat=1, lookups=100)
+    assert [r["source"] for r in document["results"]] == list(SOURCES)
+    for result in document["results"]:
+        assert result["questions"] == 200
+        assert result["load_seconds"] > 0
+        assert result["peak_memory_bytes"] > 0
+    assert "1.00x" in report(document, baseline=document)
@@ -0,0 +1,65 @@
+"""Tests for the concurrent shutdown broadcaster."""
+
+import asyncio
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from src.bot.broadcast import broadcast
+from src.bot.outbound import OutboundScheduler
+from telegram import Bot
+from telegram.error import Forbidden, RetryAfter
+from telegram.ext import ExtBot
+
+# RetryAfter(int) itself warns about PTB's move to timedelta periods
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:Deprecated since version v22.2:telegram.warnings.PTBDeprecationWarning"
+)
+
+
+def _bot(send: AsyncMock) -> Any:
+    bot = AsyncMock()
+    bot.send_message = send
+    return bot
+
+
+def test_delivers_to_every_chat():
+    send = AsyncMock()
+    result = asyncio.run(broadcast(_bot(send), range(20), "bye", rate=1000))
+    assert (result.delivered, result.failed, result.skipped) == (20, 0, 0)
+    assert sorted(call.kwargs["chat_id"] for call in send.await_args_list) == list(range(20))
+
+
+def test_retries_after_flood_control_and_counts_failures():
+    calls: dict[int, int] = {}
+
+    async def send_message(chat_id: int, text: str) -> None:
+        calls[chat_id] = calls.get(chat_id, 0) + 1
+        if chat_id == 1 and calls[chat_id] == 1:
+            raise RetryAfter(0)
+        if chat_id == 2:
+            raise Forbidden("bot was blocked by the user")
+
+    result = asyncio.run(
+        broadcast(_bot(AsyncMock(side_effect=send_message)), [1, 2, 3], "bye", rate=1000)
+    )
+    assert (result.delivered, result.failed, result.skipped) == (2, 1, 0)
+    assert calls[1] == 2
+
+
+def test_skips_chats_that_cannot_be_reached_before_deadline():
+    send = AsyncMock()
+    result = asyncio.run(broadcast(_bot(send), range(10), "bye", rate=10, deadline=0.25))
+    assert result.delivered + result.skipped == 10
+    assert 1 <= result.delivered < 10
+    assert result.failed == 0
+
+
+def test_leaves_flood_control_to_the_outbound_scheduler():
+    bot = ExtBot("123:TEST", rate_limiter=OutboundScheduler(max_retries=1))
+    post = AsyncMock(side_effect=RetryAfter(0))
+    with patch.object(Bot, "_do_post", post):
+        result = asyncio.run(broadcast(bot, [1], "bye", max_retries=5))
+    assert (result.delivered, result.failed, result.skipped) == (0, 1, 0)
+    # The scheduler's one retry, not the broadcaster's five on top of it
+    assert post.await_count == 2
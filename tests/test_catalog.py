@@ -0,0 +1,74 @@
+"""Tests for the in-memory deck catalog."""
+
+import os
+from pathlib import Path
+
+import pytest
+from src.data_sources.catalog import Theme, build_catalog
+from src.data_sources.csv_source import CSVDataSource
+
+
+def _write_deck(data_dir: Path) -> None:
+    (data_dir / "themes.csv").write_text(
+        "id,label,description\nmarriage,Marriage,Couples\nfaith,Faith,Faith questions\n",
+        encoding="utf-8",
+    )
+    (data_dir / "questions.csv").write_text(
+        "theme_id,question\nmarriage,Q1\nfaith,Q2\nmarriage,Q3\nunknown,Q4\n",
+        encoding="utf-8",
+    )
+
+
+def test_build_catalog_indexes_themes_and_questions():
+    catalog = build_catalog(
+        [Theme(id="a", label="A", description=""), Theme(id="b", label="B", description="")],
+        [("a", "q1"), ("b", "q2"), ("a", "q3"), ("missing", "q4"), ("a", "")],
+    )
+    assert [t["id"] for t in catalog.themes] == ["a", "b"]
+    assert catalog.get_theme("b") == {"id": "b", "label": "B", "description": ""}
+    assert catalog.get_theme("missing") is None
+    assert catalog.get_questions("a") == ("q1", "q3")
+    assert catalog.get_questions("missing") == ()
+    assert catalog.all_questions == (("a", "q1"), ("b", "q2"), ("a", "q3"))
+
+
+def test_build_catalog_is_immutable_and_versioned():
+    first = build_catalog([], [])
+    second = build_catalog([], [])
+    assert second.version > first.version
+    with pytest.raises(TypeError):
+        first.questions_by_theme["x"] = ()  # type: ignore[index]
+
+
+def test_csv_source_reads_disk_only_once(tmp_path: Path):
+    _write_deck(tmp_path)
+    source = CSVDataSource(data_dir=tmp_path)
+
+    # Removing the files proves lookups are served from memory
+    (tmp_path / "themes.csv").unlink()
+    (tmp_path / "questions.csv").unlink()
+
+    assert [t["id"] for t in source.get_themes()] == ["marriage", "faith"]
+    assert source.get_questions("marriage") == ("Q1", "Q3")
+    assert source.get_all_questions() == (("marriage", "Q1"), ("faith", "Q2"), ("marriage", "Q3"))
+
+
+def test_csv_source_refresh_swaps_catalog_after_change_settles(tmp_path: Path):
+    _write_deck(tmp_path)
+    source = CSVDataSource(data_dir=tmp_path)
+    original = source.get_catalog()
+    assert source.refresh() is False
+
+    questions_csv = tmp_path / "questions.csv"
+    questions_csv.write_text("theme_id,question\nfaith,New question\n", encoding="utf-8")
+    os.utime(questions_csv, ns=(1, 1))
+
+    # First poll only notes the change; the second publishes it
+    assert source.refresh() is False
+    assert source.get_catalog() is original
+    assert source.refresh() is True
+
+    reloaded = source.get_catalog()
+    assert reloaded.version > original.version
+    assert reloaded.all_questions == (("faith", "New question"),)
+    assert original.get_questions("marriage") == ("Q1", "Q3")
@@ -0,0 +1,102 @@
+"""Tests for coalescing navigation taps into few message edits."""
+
+import asyncio
+from collections.abc import Coroutine
+from types import SimpleNamespace
+from typing import Any
+
+from src import metrics
+from src.bot.coalesce import NavigationCoalescer
+from telegram import InlineKeyboardMarkup
+
+_MARKUP = InlineKeyboardMarkup([])
+
+
+class _Query:
+    def __init__(self, text: str, message_id: int = 1) -> None:
+        self.message = SimpleNamespace(text=text, message_id=message_id)
+        self.edits: list[str] = []
+
+    async def edit_message_text(self, text: str, reply_markup: Any) -> None:
+        await asyncio.sleep(0.01)  # request in flight
+        self.edits.append(text)
+
+
+class _Application:
+    """Stands in for Application.create_task, keeping the tasks it starts."""
+
+    def __init__(self) -> None:
+        self.tasks: list[asyncio.Task[Any]] = []
+
+    def create_task(self, coroutine: Coroutine[Any, Any, Any], name: str | None = None) -> Any:
+        task = asyncio.get_running_loop().create_task(coroutine, name=name)
+        self.tasks.append(task)
+        return task
+
+    async def stop(self) -> None:
+        await asyncio.gather(*self.tasks)
+
+
+def _exported_edits() -> dict[str, float]:
+    samples = metrics.REGISTRY.snapshot()["table_talks_navigation_edits_total"]
+    return {result: value for (result,), value in samples.items()}
+
+
+def test_taps_during_an_edit_become_one_follow_up_edit():
+    before = _exported_edits()
+    state = {"card": 1}
+    query = _Query("card 1")
+    app: Any = _Application()
+
+    async def run() -> NavigationCoalescer:
+        coalescer = NavigationCoalescer()
+        for _ in range(5):
+            state["card"] += 1
+            coalescer.request(app, 1, query, lambda: (f"card {state['card']}", _MARKUP))  # type: ignore[arg-type]
+            await asyncio.sleep(0.001)
+        await app.stop()
+        assert not coalescer.pending_edits
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert query.edits[-1] == "card 6"
+    assert len(query.edits) < 5
+    assert coalescer.stats["taps"] == 5
+    assert coalescer.stats["edits_saved"] == 5 - len(query.edits)
+    after = _exported_edits()
+    assert after["sent"] - before.get("sent", 0) == len(query.edits)
+    assert after["saved"] - before.get("saved", 0) == 5 - len(query.edits)
+
+
+def test_skips_edit_when_state_returns_to_displayed_card():
+    query = _Query("card 1")
+    app: Any = _Application()
+
+    async def run() -> NavigationCoalescer:
+        coalescer = NavigationCoalescer(delay=0.01)
+        coalescer.request(app, 1, query, lambda: ("card 2", _MARKUP))  # type: ignore[arg-type]
+        coalescer.request(app, 1, query, lambda: ("card 1", _MARKUP))  # type: ignore[arg-type]
+        await app.stop()
+        return coalescer
+
+    coalescer = asyncio.run(run())
+    assert query.edits == []
+    assert coalescer.stats["edits_saved"] == 2
+
+
+def test_messages_in_one_chat_are_edited_separately():
+    old = _Query("card 3", message_id=1)
+    new = _Query("card 1", message_id=2)
+    app: Any = _Application()
+
+    async def run() -> None:
+        coalescer = NavigationCoalescer(delay=0.01)
+        coalescer.request(app, 1, old, lambda: ("card 4", _MARKUP))  # type: ignore[arg-type]
+        # Matches the old message's text but not the new message's
+        coalescer.request(app, 1, new, lambda: ("card 3", _MARKUP))  # type: ignore[arg-type]
+        assert coalescer.pending_edits == 2
+        await app.stop()
+
+    asyncio.run(run())
+    assert old.edits == ["card 4"]
+    assert new.edits == ["card 3"]
@@ -0,0 +1,189 @@
+"""Tests for queued structured logging, action sampling and error aggregation."""
+
+import asyncio
+import io
+import json
+import logging
+import threading
+from collections.abc import Iterator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from src import logging_setup
+from src.bot import build_application
+from src.bot.app import on_error, on_stop
+from src.bot.session import log_action
+from src.logging_setup import (
+    ErrorAggregator,
+    configure_logging,
+    parse_sample_rates,
+    sample_action,
+    set_action_sample_rates,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def restore_root_logger() -> Iterator[None]:
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+@pytest.fixture
+def sample_rates() -> Iterator[None]:
+    yield
+    set_action_sample_rates({})
+
+
+def _update(chat_id: int = 5) -> Any:
+    return SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id), effective_user=SimpleNamespace(id=9)
+    )
+
+
+def test_json_records_are_written_by_the_background_writer(restore_root_logger: None):
+    stream = io.StringIO()
+    configure_logging(logging.INFO, "json", stream)
+    log_action(_update(), "theme_chosen", theme_id="fun")
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        logging.getLogger("tests").exception("Failed %s", "load")
+    shutdown_logging()
+
+    first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+    assert first["msg"] == "theme_chosen"
+    assert first["logger"] == "src.bot.session"
+    assert (first["chat_id"], first["user_id"], first["theme_id"]) == (5, 9, "fun")
+    assert second["msg"] == "Failed load"
+    assert second["level"] == "ERROR"
+    assert "ValueError: bad row" in second["exc"]
+
+
+def test_text_format_appends_fields(restore_root_logger: None):
+    stream = io.StringIO()
+    configure_logging(logging.INFO, "text", stream)
+    log_action(_update(), "start")
+    shutdown_logging()
+    assert stream.getvalue().rstrip().endswith("start | chat_id=5 | user_id=9 | action=start")
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        configure_logging(logging.INFO, "xml")
+
+
+def test_sample_rates_are_parsed_and_applied(sample_rates: None):
+    rates = parse_sample_rates("next_card=0.1, previous_card=0,*=0.5")
+    assert rates == {"next_card": 0.1, "previous_card": 0.0, "*": 0.5}
+    with pytest.raises(ValueError):
+        parse_sample_rates("next_card")
+    with pytest.raises(ValueError):
+        parse_sample_rates("next_card=2")
+
+    set_action_sample_rates(rates)
+    assert not sample_action("previous_card")
+    assert sample_action("next_card", rng=lambda: 0.05)
+    assert not sample_action("next_card", rng=lambda: 0.5)
+    assert sample_action("start", rng=lambda: 0.4)
+
+
+def test_unsampled_actions_are_not_logged(sample_rates: None, caplog: pytest.LogCaptureFixture):
+    set_action_sample_rates({"next_card": 0})
+    with caplog.at_level(logging.INFO, logger="src.bot.session"):
+        log_action(_update(), "next_card")
+        log_action(_update(), "start")
+    assert [record.getMessage() for record in caplog.records] == ["start"]
+
+
+def test_error_aggregator_counts_repeats_within_window():
+    now = [0.0]
+    aggregator = ErrorAggregator(window=60, clock=lambda: now[0])
+    assert aggregator.record("timeout") == 0
+    assert aggregator.record("timeout") is None
+    assert aggregator.record("timeout") is None
+    assert aggregator.record("other") == 0
+    now[0] = 61.0
+    assert aggregator.record("timeout") == 2
+
+
+def test_error_aggregator_flush_hands_over_pending_repeats():
+    now = [0.0]
+    aggregator = ErrorAggregator(window=60, clock=lambda: now[0])
+    aggregator.record("timeout")
+    aggregator.record("timeout")
+    aggregator.record("other")
+    assert aggregator.flush() == [("timeout", 1)]
+    assert aggregator.flush() == []
+    now[0] = 61.0
+    assert aggregator.record("timeout") == 0
+
+
+def test_pending_repeats_are_logged_by_the_sweeper_and_on_stop(
+    caplog: pytest.LogCaptureFixture,
+):
+    app = build_application("123:TEST", session_sweep_interval=0.01)
+    aggregator: ErrorAggregator = app.bot_data["_error_aggregator"]
+    sweeper = app.bot_data["_session_sweeper"]
+
+    async def run() -> None:
+        for _ in range(3):
+            aggregator.record(("TimeoutError", "Timed out"))
+        sweeper.start(app)
+        await asyncio.sleep(0.05)
+        aggregator.record(("TimeoutError", "Timed out"))
+        await on_stop(app)
+
+    with caplog.at_level(logging.ERROR, logger="src.bot.app"):
+        asyncio.run(run())
+    repeats = [record.fields["repeats_suppressed"] for record in caplog.records]  # type: ignore[attr-defined]
+    assert repeats == [2, 1]
+    assert caplog.records[0].fields["error_type"] == "TimeoutError"  # type: ignore[attr-defined]
+
+
+def test_on_error_logs_repeated_errors_once(caplog: pytest.LogCaptureFixture):
+    context: Any = SimpleNamespace(
+        error=TimeoutError("Timed out"), bot_data={"_error_aggregator": ErrorAggregator()}
+    )
+
+    async def run() -> None:
+        for _ in range(5):
+            await on_error(None, context)
+
+    with caplog.at_level(logging.ERROR, logger="src.bot.app"):
+        asyncio.run(run())
+    assert len(caplog.records) == 1
+    assert caplog.records[0].fields["error_type"] == "TimeoutError"  # type: ignore[attr-defined]
+
+
+def test_writer_restarts_after_fork(restore_root_logger: None):
+    stream = io.StringIO()
+    configure_logging(logging.INFO, "json", stream)
+    parent_writer = logging_setup._writer  # type: ignore[reportPrivateUsage]
+    logging_setup._restart_in_child()  # type: ignore[reportPrivateUsage]
+    assert logging_setup._writer is not parent_writer  # type: ignore[reportPrivateUsage]
+    logging.getLogger("tests").warning("from child")
+    shutdown_logging()
+    assert json.loads(stream.getvalue())["msg"] == "from child"
+    assert parent_writer is not None
+    parent_writer.stop()
+
+
+def test_writer_is_stopped_for_a_fork(restore_root_logger: None):
+    stream = io.StringIO()
+    configure_logging(logging.INFO, "json", stream)
+    logging.getLogger("tests").warning("before fork")
+    logging_setup._stop_before_fork()  # type: ignore[reportPrivateUsage]
+    # Queued records are written first and no writer thread is left to fork
+    assert json.loads(stream.getvalue())["msg"] == "before fork"
+    assert not any(thread.name == "log-writer" for thread in threading.enumerate())
+
+    logging_setup._resume_after_fork()  # type: ignore[reportPrivateUsage]
+    logging.getLogger("tests").warning("after fork")
+    shutdown_logging()
+    assert json.loads(stream.getvalue().splitlines()[-1])["msg"] == "after fork"
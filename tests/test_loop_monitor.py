@@ -0,0 +1,62 @@
+"""Tests for the event loop lag monitor."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from src.bot.loop_monitor import LoopMonitor, blocking_function
+from src.health import health_problems
+
+
+def _frame(module: str, name: str, back: Any = None) -> Any:
+    return SimpleNamespace(
+        f_code=SimpleNamespace(co_name=name), f_globals={"__name__": module}, f_back=back
+    )
+
+
+def test_blocking_function_names_the_outermost_handler():
+    outer = _frame("asyncio.events", "_run")
+    handler = _frame("src.bot.handlers", "next_card", outer)
+    helper = _frame("src.bot.handlers", "send_card", handler)
+    inner = _frame("csv", "reader", helper)
+    assert blocking_function(inner) == "next_card"
+
+
+def test_blocking_function_falls_back_to_own_package():
+    frame = _frame("json", "loads", _frame("src.data_sources.csv_source", "_read_themes"))
+    assert blocking_function(frame) == "src.data_sources.csv_source._read_themes"
+
+
+def test_blocked_loop_is_reported_and_fails_health():
+    monitor = LoopMonitor(threshold=0.05, wedged_after=0.1, interval=0.01)
+    problems: list[list[str]] = []
+
+    def block_the_loop() -> None:
+        time.sleep(0.2)
+        problems.append(health_problems())
+
+    async def run() -> None:
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert monitor.stats["blocked"] == 1
+    assert problems and problems[0][0].startswith("event_loop: event loop blocked")
+    assert monitor.percentiles()["max"] >= 0.15
+    assert health_problems() == []
+
+
+def test_disabled_monitor_does_not_start():
+    monitor = LoopMonitor(threshold=0)
+
+    async def run() -> None:
+        monitor.start()
+        assert monitor.blocked_for() == 0.0
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert monitor.percentiles() == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
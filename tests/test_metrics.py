@@ -0,0 +1,124 @@
+"""Tests for in-process metrics and their exposition format."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from src import metrics
+from src.bot.outbound import OutboundScheduler
+from src.bot.rate_limit import RATE_LIMITS, rate_limit
+
+
+def test_counter_renders_labelled_samples():
+    registry = metrics.Registry()
+    requests = metrics.Counter("requests_total", "Requests", ["path"])
+    registry.register(requests)
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    requests.labels('quo"te').inc()
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/a"} 3\n'
+        'requests_total{path="quo\\"te"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = histogram.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_worker_snapshots_are_rendered_with_a_worker_label():
+    worker = metrics.Registry()
+    worker_latency = metrics.Histogram("latency_seconds", "Latency", buckets=(1.0,))
+    worker.register(worker_latency)
+    worker_latency.observe(0.5)
+
+    front = metrics.Registry()
+    front.register(metrics.Histogram("latency_seconds", "Latency", buckets=(1.0,)))
+    front.set_worker_snapshot("0", worker.snapshot())
+
+    assert front.render().splitlines()[2:] == [
+        'latency_seconds_bucket{worker="0",le="1"} 1',
+        'latency_seconds_bucket{worker="0",le="+Inf"} 1',
+        'latency_seconds_sum{worker="0"} 0.5',
+        'latency_seconds_count{worker="0"} 1',
+    ]
+
+
+def test_reset_zeroes_bound_children():
+    registry = metrics.Registry()
+    counter = metrics.Counter("forked_total", "Forked", ["kind"])
+    registry.register(counter)
+    child = counter.labels("a")
+    child.inc(3)
+    registry.reset()
+    child.inc()
+    assert registry.snapshot() == {"forked_total": {("a",): 1.0}}
+
+
+def test_labels_must_match_label_names():
+    counter = metrics.Counter("things_total", "Things", ["kind"])
+    with pytest.raises(ValueError):
+        counter.labels()
+
+
+def test_duplicate_registration_is_rejected():
+    registry = metrics.Registry()
+    registry.register(metrics.Counter("dup_total", "Dup"))
+    with pytest.raises(ValueError):
+        registry.register(metrics.Counter("dup_total", "Dup"))
+
+
+def test_rate_limit_wrapper_counts_updates_and_rejections():
+    @rate_limit("theme_selection")
+    async def metrics_probe_handler(update: Any, context: Any) -> None:
+        pass
+
+    context: Any = SimpleNamespace(
+        chat_data={}, application=SimpleNamespace(bot_data={}, chat_data={})
+    )
+    update: Any = SimpleNamespace(callback_query=None, message=None, effective_chat=None)
+    max_requests, _ = RATE_LIMITS["theme_selection"]
+
+    async def run() -> None:
+        for _ in range(max_requests + 1):
+            await metrics_probe_handler(update, context)
+
+    asyncio.run(run())
+    output = metrics.render()
+    assert f'table_talks_updates_total{{handler="metrics_probe_handler"}} {max_requests + 1}' in (
+        output
+    )
+    assert (
+        f'table_talks_handler_duration_seconds_count{{handler="metrics_probe_handler"}} '
+        f"{max_requests}" in output
+    )
+    assert 'table_talks_rate_limited_total{category="theme_selection"}' in output
+
+
+def test_outbound_requests_are_counted_by_endpoint():
+    async def callback() -> bool:
+        return True
+
+    async def run() -> None:
+        scheduler = OutboundScheduler()
+        await scheduler.process_request(callback, (), {}, "metricsProbe", {}, None)
+
+    asyncio.run(run())
+    output = metrics.render()
+    assert 'table_talks_bot_api_requests_total{endpoint="metricsProbe",result="ok"} 1' in output
+    assert 'table_talks_bot_api_request_duration_seconds_count{endpoint="metricsProbe"} 1' in output
@@ -0,0 +1,67 @@
+"""Tests for the outbound Bot API request scheduler."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from src.bot.outbound import PRIORITY_BULK, OutboundScheduler
+from telegram.error import RetryAfter
+
+# RetryAfter(int) itself warns about PTB's move to timedelta periods
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:Deprecated since version v22.2:telegram.warnings.PTBDeprecationWarning"
+)
+
+
+def _request(scheduler: OutboundScheduler, log: list[str], name: str, endpoint: str, **extra: Any):
+    async def callback() -> bool:
+        log.append(name)
+        return True
+
+    return scheduler.process_request(callback, (), {}, endpoint, {}, extra.get("rate_limit_args"))
+
+
+def test_queued_requests_run_by_priority():
+    log: list[str] = []
+
+    async def run() -> None:
+        scheduler = OutboundScheduler(global_rate=50)
+        scheduler._global.tokens = 0  # saturated: every request has to queue
+        await asyncio.gather(
+            _request(scheduler, log, "broadcast", "sendMessage", rate_limit_args=PRIORITY_BULK),
+            _request(scheduler, log, "edit", "editMessageText"),
+            _request(scheduler, log, "answer", "answerCallbackQuery"),
+        )
+
+    asyncio.run(run())
+    assert log == ["answer", "edit", "broadcast"]
+
+
+def test_retry_after_is_retried_and_slows_global_rate():
+    attempts = 0
+
+    async def callback() -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RetryAfter(0)
+        return "ok"
+
+    scheduler = OutboundScheduler(global_rate=30)
+    result = asyncio.run(
+        scheduler.process_request(callback, (), {}, "sendMessage", {"chat_id": 5}, None)
+    )
+    assert result == "ok"
+    assert attempts == 2
+    assert scheduler.stats["retry_after"] == 1
+    assert scheduler.rate < 30
+
+
+def test_retry_after_raised_when_retries_exhausted():
+    async def callback() -> None:
+        raise RetryAfter(0)
+
+    scheduler = OutboundScheduler(max_retries=1)
+    with pytest.raises(RetryAfter):
+        asyncio.run(scheduler.process_request(callback, (), {}, "answerCallbackQuery", {}, None))
+    assert scheduler.stats["requests"] == 2
@@ -0,0 +1,32 @@
+"""Tests for lazily evaluated permutations."""
+
+import pickle
+
+import pytest
+from src.bot.permutation import LazyPermutation
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 7, 64, 1000, 4097])
+def test_is_a_bijection(size: int):
+    perm = LazyPermutation(size, seed=12345)
+    assert len(perm) == size
+    assert sorted(perm) == list(range(size))
+
+
+def test_seed_selects_permutation_deterministically():
+    assert list(LazyPermutation(500, seed=1)) == list(LazyPermutation(500, seed=1))
+    assert list(LazyPermutation(500, seed=1)) != list(LazyPermutation(500, seed=2))
+
+
+def test_indexing_and_bounds():
+    perm = LazyPermutation(10, seed=7)
+    assert perm[-1] == perm[9]
+    with pytest.raises(IndexError):
+        perm[10]
+
+
+def test_pickles_as_size_and_seed_only():
+    perm = LazyPermutation(10**9, seed=42)
+    restored = pickle.loads(pickle.dumps(perm))
+    assert restored[123_456_789] == perm[123_456_789]
+    assert len(pickle.dumps(perm)) < 128
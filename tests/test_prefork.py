@@ -0,0 +1,271 @@
+"""Tests for the prefork webhook front process."""
+
+import asyncio
+import ctypes
+import io
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from src import metrics
+from src.logging_setup import configure_logging, shutdown_logging
+from src.prefork import (
+    _beat,
+    _report_metrics,
+    _WebhookServer,
+    _worker_main,
+    _WorkerPool,
+    _WorkerState,
+    dispatch_key,
+)
+
+# The log writer is stopped for each fork, but Python counts threads only after
+# the at-fork hooks have restarted it
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:This process .* is multi-threaded:DeprecationWarning"
+)
+
+
+class _RecordingPool:
+    def __init__(self) -> None:
+        self.dispatched: list[tuple[int, bytes]] = []
+
+    def dispatch(self, key: int, raw: bytes) -> None:
+        self.dispatched.append((key, raw))
+
+
+def test_dispatch_key_keeps_chat_affinity():
+    message = {"update_id": 1, "message": {"chat": {"id": -100}, "from": {"id": 7}}}
+    tap = {
+        "update_id": 2,
+        "callback_query": {"from": {"id": 7}, "message": {"chat": {"id": -100}}},
+    }
+    inline_tap = {"update_id": 3, "callback_query": {"from": {"id": 7}}}
+
+    assert dispatch_key(message) == dispatch_key(tap) == -100
+    assert dispatch_key(inline_tap) == 7
+    assert dispatch_key({"update_id": 9}) == 9
+
+
+@pytest.fixture
+def front():
+    pool: Any = _RecordingPool()
+    server = _WebhookServer(("127.0.0.1", 0), pool, "/hook/", "s3cret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", pool
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url: str, body: dict[str, Any], secret: str | None) -> int:
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST")
+    if secret is not None:
+        request.add_header("X-Telegram-Bot-Api-Secret-Token", secret)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_front_forwards_verified_updates(front):
+    base, pool = front
+    update = {"update_id": 5, "message": {"chat": {"id": 42}}}
+
+    assert _post(f"{base}/hook", update, "s3cret") == 200
+    assert pool.dispatched == [(42, json.dumps(update).encode())]
+
+
+def test_front_rejects_wrong_secret_and_path(front):
+    base, pool = front
+    update = {"update_id": 5, "message": {"chat": {"id": 42}}}
+
+    assert _post(f"{base}/hook", update, "wrong") == 403
+    assert _post(f"{base}/hook", update, None) == 403
+    assert _post(f"{base}/other", update, "s3cret") == 404
+    assert pool.dispatched == []
+
+
+def test_worker_reports_its_metrics_before_exiting():
+    ctx = multiprocessing.get_context("fork")
+    reports: Any = ctx.Queue()
+    stopped = threading.Event()
+    stopped.set()
+    process = ctx.Process(target=_report_metrics, args=(3, reports, stopped))
+    process.start()
+    worker_id, snapshot = reports.get(timeout=10)
+    process.join(10)
+
+    assert worker_id == 3
+    assert snapshot.keys() == metrics.REGISTRY.snapshot().keys()
+
+
+class _Process:
+    def __init__(self, alive: bool) -> None:
+        self.alive = alive
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+def _beat_briefly(state: Any) -> None:
+    app = SimpleNamespace(running=True, update_processor=SimpleNamespace(last_processed_at=100.0))
+
+    async def run() -> None:
+        task = asyncio.create_task(_beat(app, state))  # type: ignore[arg-type]
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def pool() -> _WorkerPool:
+    pool = _WorkerPool(2, lambda: None, 0, wedged_after=5)  # type: ignore[arg-type, return-value]
+    pool._supervisor = _Process(True)  # type: ignore[assignment]
+    for worker_id, state in enumerate(pool.states):
+        state.pid = 1000 + worker_id
+    # Worker 0 publishes its state from a forked process; worker 1 never has
+    process = multiprocessing.get_context("fork").Process(
+        target=_beat_briefly, args=(pool.states[0],)
+    )
+    process.start()
+    process.join(10)
+    return pool
+
+
+def test_stale_worker_heartbeat_fails_health(pool: _WorkerPool):
+    pool.states[1].heartbeat = time.monotonic() - 30
+
+    assert pool.states[0].heartbeat > time.monotonic() - 5
+    problem = pool.health_problem()
+    assert problem is not None
+    assert problem.startswith("worker 1 event loop blocked for 30")
+    assert "worker 0" not in problem
+
+
+def test_readiness_reports_each_worker(pool: _WorkerPool):
+    ready, details = pool.readiness()
+    workers: Any = details["workers"]
+    assert not ready
+    assert workers["0"]["running"] is True
+    assert workers["0"]["last_update_at"] == 100.0
+    assert workers["1"] == {
+        "alive": True,
+        "running": False,
+        "last_update_at": None,
+        "last_update_age": None,
+    }
+
+    pool.states[1].running = True
+    assert pool.readiness()[0]
+    pool.states[0].pid = 0
+    assert not pool.readiness()[0]
+
+
+def test_exited_supervisor_fails_health_and_readiness(pool: _WorkerPool):
+    pool.states[1].running = True
+    pool._supervisor.alive = False  # type: ignore[union-attr]
+    pool._supervisor.exitcode = 1  # type: ignore[union-attr]
+
+    assert pool.health_problem() == "worker supervisor exited with code 1"
+    assert not pool.readiness()[0]
+
+
+class _StoppingApp:
+    """Just enough of an Application for a worker that is told to stop at once."""
+
+    post_init = None
+    running = False
+    update_processor = None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def start(self) -> None:
+        self.running = True
+
+    async def stop(self) -> None:
+        self.running = False
+
+    async def post_stop(self, app: Any) -> None:
+        for i in range(200):
+            logging.getLogger("tests").info("post_stop line %d", i)
+
+    async def shutdown(self) -> None:
+        pass
+
+
+@pytest.fixture
+def restore_root_logger() -> Iterator[None]:
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+# The log writer thread is running when the worker forks, as in production
+def test_forked_worker_writes_all_queued_logs(restore_root_logger: None, tmp_path: Path):
+    log_path = tmp_path / "worker.log"
+    ctx = multiprocessing.get_context("fork")
+    updates: Any = ctx.Queue()
+    updates.put(None)
+    with open(log_path, "w", encoding="utf-8") as stream:
+        configure_logging(logging.INFO, "text", stream)
+        process = ctx.Process(
+            target=_worker_main,
+            args=(0, updates, ctx.Queue(), ctx.RawValue(_WorkerState), _StoppingApp, 0),
+        )
+        process.start()
+        process.join(10)
+        shutdown_logging()
+
+    lines = log_path.read_text(encoding="utf-8").splitlines()
+    assert process.exitcode == 0
+    assert sum("post_stop line" in line for line in lines) == 200
+    assert lines[-1].endswith("Worker 0 stopped")
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_supervisor_forks_and_restarts_workers(restore_root_logger: None):
+    configure_logging(logging.CRITICAL, "text", io.StringIO())
+    starts = multiprocessing.get_context("fork").RawValue(ctypes.c_int)
+
+    def app_factory() -> Any:
+        starts.value += 1
+        if starts.value == 1:
+            raise RuntimeError("first worker crashes")
+        return _StoppingApp()
+
+    pool = _WorkerPool(1, app_factory, 0, stop_timeout=10)
+    state = pool.states[0]
+    pool.start()
+    try:
+        _wait_for(lambda: bool(state.running))
+        assert starts.value == 2
+        assert pool.readiness()[0]
+        # Forked by the single-threaded supervisor, not by this process
+        assert state.pid not in {child.pid for child in multiprocessing.active_children()}
+    finally:
+        pool.stop()
+
+    assert state.pid == 0
+    assert not pool.readiness()[0]
@@ -0,0 +1,111 @@
+"""Tests for the sampling update profiler."""
+
+import asyncio
+import pstats
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock
+
+import pytest
+from src.bot import profiler as profiler_module
+from src.bot.handlers import profile_command
+from src.bot.profiler import UpdateProfiler
+from src.bot.update_processor import ChatOrderedUpdateProcessor
+
+
+def _busy_handler_work() -> int:
+    return sum(range(1000))
+
+
+async def _handler() -> None:
+    _busy_handler_work()
+    await asyncio.sleep(0)
+
+
+def test_off_by_default_and_rate_is_validated():
+    profiler = UpdateProfiler()
+    assert not profiler.should_sample()
+    with pytest.raises(ValueError):
+        profiler.sample_rate = 1.5
+
+
+def test_sampled_updates_are_aggregated_into_pstats(tmp_path: Path):
+    profiler = UpdateProfiler(sample_rate=1.0, output_dir=tmp_path, flush_every=2)
+    processor = ChatOrderedUpdateProcessor(4, profiler)
+
+    async def run() -> None:
+        for _ in range(3):
+            await processor.process_update(object(), _handler())
+
+    asyncio.run(run())
+    assert profiler.profiled == 3
+    # Written after the second update; the third waits for the next flush
+    stats = pstats.Stats(str(profiler.path))
+    functions = {name for _, _, name in stats.stats}  # type: ignore[attr-defined]
+    assert "_busy_handler_work" in functions
+    assert asyncio.run(profiler.flush()) == profiler.path
+    assert asyncio.run(profiler.flush()) is None
+
+
+def test_profile_is_written_off_the_event_loop(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    writers: list[int] = []
+    write = profiler_module._write_atomically
+
+    def recording_write(path: Path, data: bytes) -> None:
+        writers.append(threading.get_ident())
+        write(path, data)
+
+    monkeypatch.setattr(profiler_module, "_write_atomically", recording_write)
+    profiler = UpdateProfiler(sample_rate=1.0, output_dir=tmp_path, flush_every=1)
+
+    async def run() -> int:
+        await profiler.profile(_handler())
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert writers and loop_thread not in writers
+    assert profiler.path.exists()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_unsampled_updates_are_not_profiled(tmp_path: Path):
+    profiler = UpdateProfiler(sample_rate=0.5, output_dir=tmp_path, rng=lambda: 0.9)
+    processor = ChatOrderedUpdateProcessor(4, profiler)
+    asyncio.run(processor.process_update(object(), _handler()))
+    assert profiler.profiled == 0
+    assert asyncio.run(profiler.flush()) is None
+
+
+def _command(user_id: int, args: list[str], profiler: UpdateProfiler) -> tuple[Any, Any]:
+    message = SimpleNamespace(reply_text=AsyncMock())
+    update: Any = SimpleNamespace(
+        message=message,
+        callback_query=None,
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=user_id),
+    )
+    bot_data = {"creator_user_id": 42, "_profiler": profiler}
+    context: Any = SimpleNamespace(
+        args=args, chat_data={}, application=SimpleNamespace(bot_data=bot_data)
+    )
+    return update, context
+
+
+def test_profile_command_is_creator_only(tmp_path: Path):
+    profiler = UpdateProfiler(output_dir=tmp_path)
+    update, context = _command(7, ["0.5"], profiler)
+    asyncio.run(profile_command(update, context))
+    assert profiler.sample_rate == 0
+    update.message.reply_text.assert_not_called()
+
+    update, context = _command(42, ["0.5"], profiler)
+    asyncio.run(profile_command(update, context))
+    assert profiler.sample_rate == 0.5
+    assert "0.5" in update.message.reply_text.call_args.args[0]
+
+    update, context = _command(42, ["fast"], profiler)
+    asyncio.run(profile_command(update, context))
+    assert profiler.sample_rate == 0.5
+    assert "Usage" in update.message.reply_text.call_args.args[0]
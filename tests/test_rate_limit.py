@@ -0,0 +1,54 @@
+"""Tests for token bucket rate limiting."""
+
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+from src.bot.rate_limit import RATE_LIMITS, TokenBucket, is_rate_limited
+
+# is_rate_limited keys state on context.chat_data only
+_UPDATE: Any = None
+
+
+def _context() -> Any:
+    return SimpleNamespace(chat_data={})
+
+
+def test_allows_burst_up_to_limit_then_blocks():
+    context = _context()
+    max_requests, _ = RATE_LIMITS["theme_selection"]
+    with patch("src.bot.rate_limit.time.time", return_value=1000.0):
+        results = [
+            is_rate_limited(_UPDATE, context, "theme_selection") for _ in range(max_requests)
+        ]
+        assert not any(results)
+        assert is_rate_limited(_UPDATE, context, "theme_selection")
+
+
+def test_tokens_refill_over_the_window():
+    context = _context()
+    max_requests, window = RATE_LIMITS["theme_selection"]
+    with patch("src.bot.rate_limit.time.time", return_value=1000.0):
+        for _ in range(max_requests):
+            is_rate_limited(_UPDATE, context, "theme_selection")
+    with patch("src.bot.rate_limit.time.time", return_value=1000.0 + window / max_requests):
+        assert not is_rate_limited(_UPDATE, context, "theme_selection")
+        assert is_rate_limited(_UPDATE, context, "theme_selection")
+
+
+def test_state_is_constant_size():
+    context = _context()
+    with patch("src.bot.rate_limit.time.time", return_value=1000.0):
+        for _ in range(500):
+            is_rate_limited(_UPDATE, context, "callback")
+    bucket = context.chat_data["rate_limit_callback"]
+    assert isinstance(bucket, TokenBucket)
+    assert not hasattr(bucket, "__dict__")
+
+
+def test_wait_time_reports_time_to_next_token():
+    bucket = TokenBucket(capacity=2, now=0.0)
+    assert bucket.consume(2, 1.0, 0.0)
+    assert bucket.consume(2, 1.0, 0.0)
+    assert not bucket.consume(2, 1.0, 0.0)
+    assert bucket.wait_time(2, 1.0, 0.25) == 0.75
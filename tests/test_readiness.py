@@ -0,0 +1,74 @@
+"""Tests for the /ready endpoint and its probes."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import HTTPServer
+from typing import Any
+
+import pytest
+from src import data_loader, health
+from src.bot.app import build_application, readiness
+
+
+@pytest.fixture
+def probes(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    registered: dict[str, Any] = {}
+    monkeypatch.setattr(health, "_probes", registered)
+    return registered
+
+
+def _get(port: int, path: str) -> tuple[int, dict[str, Any]]:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}") as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_ready_endpoint_reflects_probes(probes: dict[str, Any]):
+    state = {"ok": False}
+    health.register_readiness_probe("catalog", data_loader.readiness)
+    health.register_readiness_probe("flag", lambda: (state["ok"], {"value": state["ok"]}))
+    server = HTTPServer(("127.0.0.1", 0), health._HealthHandler)  # type: ignore[reportPrivateUsage]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        port = server.server_address[1]
+        status, body = _get(port, "/ready")
+        assert status == 503
+        assert body["ready"] is False
+        assert body["checks"]["catalog"]["ready"] is True
+        assert body["checks"]["flag"] == {"ready": False, "value": False}
+
+        state["ok"] = True
+        status, body = _get(port, "/ready")
+        assert status == 200
+        assert body["ready"] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_failing_probe_is_reported_not_raised(probes: dict[str, Any]):
+    def broken() -> tuple[bool, dict[str, object]]:
+        raise RuntimeError("boom")
+
+    health.register_readiness_probe("broken", broken)
+    assert health.readiness() == (False, {"broken": {"ready": False, "error": "boom"}})
+
+
+def test_catalog_readiness_reports_age_without_io():
+    ready, details = data_loader.readiness()
+    assert ready
+    assert isinstance(details["themes"], int) and details["themes"] > 0
+    assert isinstance(details["catalog_age"], float) and details["catalog_age"] >= 0
+
+
+def test_application_is_not_ready_until_running(probes: dict[str, Any]):
+    app = build_application("123:TEST")
+    assert "application" in probes
+    ready, details = readiness(app)
+    assert not ready
+    assert details["running"] is False
+    assert details["last_update_at"] is None
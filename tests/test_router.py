@@ -0,0 +1,57 @@
+"""Tests for callback data encoding and routing."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock
+
+from src.bot.constants import (
+    CALLBACK_NEXT,
+    CALLBACK_THEME,
+    LEGACY_CALLBACKS,
+)
+from src.bot.keyboards import MAX_CALLBACK_DATA_LENGTH
+from src.bot.router import CallbackRouter, decode_callback, encode_callback
+
+
+def test_round_trip():
+    assert decode_callback(encode_callback(CALLBACK_NEXT)) == (CALLBACK_NEXT, [])
+    data = encode_callback(CALLBACK_THEME, "fun-light")
+    assert decode_callback(data) == (CALLBACK_THEME, ["fun-light"])
+
+
+def test_legacy_callback_data_still_decodes():
+    assert decode_callback("next") == (CALLBACK_NEXT, [])
+    assert decode_callback("theme:faith") == (CALLBACK_THEME, ["faith"])
+    assert decode_callback("no-such-button") is None
+
+
+def test_encodings_are_compact_and_unique():
+    actions = list(LEGACY_CALLBACKS.values()) + [CALLBACK_THEME]
+    assert len(set(actions)) == len(actions)
+    # Theme ids keep all but three of Telegram's 64 bytes
+    assert len(encode_callback(CALLBACK_THEME, "")) == 3 < MAX_CALLBACK_DATA_LENGTH
+
+
+def _callback_update(data: str) -> Any:
+    return SimpleNamespace(callback_query=SimpleNamespace(data=data, answer=AsyncMock()))
+
+
+def test_dispatch_passes_arguments_in_context_args():
+    router = CallbackRouter()
+    chosen = AsyncMock()
+    router.add(CALLBACK_THEME, chosen)
+    update = _callback_update("theme:faith")
+    context: Any = SimpleNamespace(args=None)
+
+    asyncio.run(router.dispatch(update, context))
+    chosen.assert_awaited_once_with(update, context)
+    assert context.args == ["faith"]
+
+
+def test_dispatch_answers_unknown_callbacks():
+    router = CallbackRouter()
+    update = _callback_update("1?")
+
+    asyncio.run(router.dispatch(update, SimpleNamespace(args=None)))  # type: ignore[arg-type]
+    update.callback_query.answer.assert_awaited_once()
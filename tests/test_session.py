@@ -0,0 +1,58 @@
+"""Tests for compact session decks resolved against the catalog."""
+
+from src.bot.constants import LAZY_SHUFFLE_THRESHOLD, RANDOM_MIX_THEME_ID
+from src.bot.permutation import LazyPermutation
+from src.bot.session import SessionDict, format_card, start_deck, sync_deck
+from src.data_sources.catalog import Theme, build_catalog
+
+
+def _catalog(questions: list[tuple[str, str]]):
+    themes = [
+        Theme(id="a", label="Alpha", description=""),
+        Theme(id="b", label="Beta", description=""),
+    ]
+    return build_catalog(themes, questions)
+
+
+def test_start_deck_stores_only_a_permutation():
+    catalog = _catalog([("a", "q1"), ("a", "q2"), ("b", "q3")])
+    session: SessionDict = {}
+    start_deck(session, catalog, "a")
+
+    assert session.get("theme_id") == "a"
+    assert session.get("catalog_version") == catalog.version
+    assert sorted(session.get("order", ())) == [0, 1]
+    assert not any(isinstance(v, str) and v.startswith("q") for v in session.values())
+
+
+def test_format_card_resolves_text_and_random_mix_label():
+    catalog = _catalog([("a", "q1"), ("b", "q2")])
+    assert format_card(catalog, "a", [0], 0) == "Question 1 of 1\nq1"
+    assert format_card(catalog, RANDOM_MIX_THEME_ID, [1, 0], 0) == (
+        "Question 1 of 2\n📚 Theme: Beta\n\nq2"
+    )
+
+
+def test_sync_deck_reshuffles_when_deck_size_changes():
+    old = _catalog([("a", "q1"), ("a", "q2")])
+    session: SessionDict = {}
+    start_deck(session, old, "a")
+    session["index"] = 1
+
+    new = _catalog([("a", "q1"), ("a", "q2"), ("a", "q3")])
+    sync_deck(session, new)
+
+    assert session.get("catalog_version") == new.version
+    assert sorted(session.get("order", ())) == [0, 1, 2]
+    assert session.get("index") == 1
+
+
+def test_large_decks_use_lazy_permutation():
+    catalog = _catalog([("a", f"q{i}") for i in range(LAZY_SHUFFLE_THRESHOLD + 1)])
+    session: SessionDict = {}
+    start_deck(session, catalog, RANDOM_MIX_THEME_ID)
+
+    assert isinstance(session.get("order"), LazyPermutation)
+    assert format_card(catalog, RANDOM_MIX_THEME_ID, session.get("order", ()), 0).startswith(
+        f"Question 1 of {LAZY_SHUFFLE_THRESHOLD + 1}\n"
+    )
@@ -1,12 +1,16 @@
 """Tests for Google Sheets data source integration."""
 
 import json
+import time
 from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
+from src.data_sources.catalog import Theme, build_catalog
+from src.data_sources.circuit_breaker import CircuitBreaker
 from src.data_sources.sheets_source import GoogleSheetsDataSource
+from src.data_sources.snapshot import read_snapshot, write_snapshot
 
 
 @pytest.fixture
@@ -52,6 +56,9 @@ def mock_gspread_client(mock_sheet_data: list[list[str]]) -> Any:
         # Create mock client
         mock_client = MagicMock()
         mock_client.open_by_key.return_value = mock_spreadsheet
+        mock_client.http_client.get_file_drive_metadata.return_value = {
+            "modifiedTime": "2026-01-01T00:00:00.000Z"
+        }
 
         mock_authorize.return_value = mock_client
         yield mock_authorize
@@ -125,7 +132,7 @@ class TestGoogleSheetsDataSource:
             )
             questions = source.get_questions("nonexistent")
 
-            assert questions == []
+            assert questions == ()
 
     def test_get_all_questions(self, mock_gspread_client, mock_service_account_file):
         """Test loading all questions with theme associations."""
@@ -279,3 +286,243 @@ class TestGoogleSheetsDataSource:
 
                 # Should only have 2 valid questions
                 assert len(all_questions) == 2
+
+
+class TestStaleWhileRevalidate:
+    """Test background refresh when stale_while_revalidate is enabled."""
+
+    def test_serves_stale_data_while_refreshing(
+        self, mock_gspread_client, mock_service_account_file, mock_sheet_data
+    ):
+        """Expired data is returned immediately and replaced once the refresh lands."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+                stale_while_revalidate=True,
+            )
+            # Primed during construction
+            assert len(source.get_themes()) == 3
+
+            client = mock_gspread_client.return_value
+            worksheet = client.open_by_key.return_value.worksheet
+            worksheet.return_value.get_all_values.return_value = mock_sheet_data[:2]
+            client.http_client.get_file_drive_metadata.return_value = {
+                "modifiedTime": "2026-01-02T00:00:00.000Z"
+            }
+
+            # Still the old snapshot on this call; the refresh runs in the background
+            assert len(source.get_themes()) == 3
+            assert source._refresh_future is not None
+            source._refresh_future.result(timeout=5)
+
+            source.cache_ttl = 60
+            assert [t["id"] for t in source.get_themes()] == ["marriage"]
+
+    def test_failed_refresh_keeps_stale_data(self, mock_gspread_client, mock_service_account_file):
+        """A background failure leaves the last good snapshot in place."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+                stale_while_revalidate=True,
+            )
+            mock_gspread_client.return_value.open_by_key.side_effect = Exception("API Error")
+
+            assert len(source.get_themes()) == 3
+            assert source._refresh_future is not None
+            source._refresh_future.result(timeout=5)
+            assert [t["id"] for t in source.get_themes()] == ["marriage", "faith", "fun"]
+
+
+class TestCircuitBreaker:
+    """Test backoff and breaker behaviour around Sheets fetches."""
+
+    def test_breaker_opens_and_backs_off_exponentially(self):
+        """Each consecutive failure doubles the window until a success closes it."""
+        now = [100.0]
+        breaker = CircuitBreaker(
+            base_delay=2.0, max_delay=5.0, clock=lambda: now[0], rng=lambda: 1.0
+        )
+        assert breaker.state == "closed"
+
+        assert breaker.record_failure() == 2.0
+        assert breaker.state == "open"
+        assert not breaker.allow_request()
+
+        now[0] += 2.0
+        assert breaker.state == "half_open"
+        assert breaker.allow_request()
+
+        assert breaker.record_failure() == 4.0
+        assert breaker.record_failure() == 5.0  # capped at max_delay
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.stats()["total_failures"] == 3
+
+    def test_open_breaker_skips_fetch_and_serves_last_good_snapshot(
+        self, mock_gspread_client, mock_service_account_file
+    ):
+        """After a failed refresh, no new fetch happens until the backoff elapses."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+                backoff_base=60,
+            )
+            open_by_key = mock_gspread_client.return_value.open_by_key
+            assert len(source.get_themes()) == 3
+
+            open_by_key.side_effect = Exception("API Error")
+            metadata = mock_gspread_client.return_value.http_client.get_file_drive_metadata
+            metadata.side_effect = Exception("API Error")
+            assert [t["id"] for t in source.get_themes()] == ["marriage", "faith", "fun"]
+            calls_after_failure = open_by_key.call_count
+
+            assert len(source.get_themes()) == 3
+            assert open_by_key.call_count == calls_after_failure
+
+            status = source.status()
+            assert status["breaker"]["state"] == "open"  # type: ignore[index]
+            assert status["breaker"]["consecutive_failures"] == 1  # type: ignore[index]
+            assert status["last_refresh_ok"] is False
+            assert status["last_refresh_error"] == "API Error"
+
+
+class TestSnapshot:
+    """Test persisted last-known-good snapshots."""
+
+    def test_successful_fetch_writes_snapshot(
+        self, mock_gspread_client, mock_service_account_file, tmp_path: Path
+    ):
+        """A good fetch is persisted and can be read back intact."""
+        snapshot_file = tmp_path / "snapshot.json"
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                snapshot_path=snapshot_file,
+            )
+            expected = source.get_all_questions()
+
+        loaded = read_snapshot(snapshot_file)
+        assert loaded is not None
+        catalog, metadata = loaded
+        assert catalog.all_questions == expected
+        assert metadata["sheet_id"] == "test_sheet_id"
+
+    def test_corrupt_snapshot_is_ignored(self, tmp_path: Path):
+        """A snapshot whose payload does not match its checksum is rejected."""
+        snapshot_file = tmp_path / "snapshot.json"
+        write_snapshot(
+            snapshot_file,
+            build_catalog([Theme(id="a", label="A", description="")], [("a", "q")]),
+        )
+        snapshot_file.write_text(snapshot_file.read_text().replace('\\"q\\"', '\\"x\\"'))
+        assert read_snapshot(snapshot_file) is None
+
+    def test_warm_start_serves_snapshot_when_sheets_is_down(
+        self, mock_service_account_file, tmp_path: Path
+    ):
+        """With Sheets unreachable, the snapshot is served instead of the bundled CSV."""
+        snapshot_file = tmp_path / "snapshot.json"
+        write_snapshot(
+            snapshot_file,
+            build_catalog(
+                [Theme(id="cached", label="Cached", description="")], [("cached", "Saved?")]
+            ),
+            metadata={"sheet_id": "test_sheet_id"},
+        )
+        with patch("src.data_sources.sheets_source.gspread.authorize") as mock_authorize:
+            mock_authorize.return_value.open_by_key.side_effect = Exception("API Error")
+            with patch("src.data_sources.sheets_source.service_account"):
+                source = GoogleSheetsDataSource(
+                    sheet_id="test_sheet_id",
+                    credentials_file=mock_service_account_file,
+                    snapshot_path=snapshot_file,
+                )
+                assert source._refresh_future is not None
+                source._refresh_future.result(timeout=5)
+
+                assert source.get_all_questions() == (("cached", "Saved?"),)
+
+    def test_warm_start_reports_when_the_snapshot_was_fetched(
+        self, mock_service_account_file, tmp_path: Path
+    ):
+        """A restored snapshot keeps its original fetch time, not the restore time."""
+        snapshot_file = tmp_path / "snapshot.json"
+        fetched_at = time.time() - 3 * 86400
+        write_snapshot(
+            snapshot_file,
+            build_catalog([Theme(id="a", label="A", description="")], [("a", "q")]),
+            metadata={"sheet_id": "test_sheet_id", "fetched_at": fetched_at},
+        )
+        with patch("src.data_sources.sheets_source.gspread.authorize") as mock_authorize:
+            mock_authorize.return_value.open_by_key.side_effect = Exception("API Error")
+            with patch("src.data_sources.sheets_source.service_account"):
+                source = GoogleSheetsDataSource(
+                    sheet_id="test_sheet_id",
+                    credentials_file=mock_service_account_file,
+                    snapshot_path=snapshot_file,
+                )
+                assert source._refresh_future is not None
+                source._refresh_future.result(timeout=5)
+
+                assert source.status()["data_fetched_at"] == fetched_at
+
+
+class TestConditionalFetch:
+    """Test modifiedTime checks before downloading the sheet."""
+
+    def test_unchanged_sheet_skips_download(self, mock_gspread_client, mock_service_account_file):
+        """An expired cache with the same modifiedTime is extended without a download."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+            )
+            client = mock_gspread_client.return_value
+            source.get_themes()
+            source.get_themes()
+            source.get_themes()
+
+            assert client.open_by_key.call_count == 1
+            assert client.http_client.get_file_drive_metadata.call_count == 3
+
+    def test_unchanged_sheet_counts_as_fresh(self, mock_gspread_client, mock_service_account_file):
+        """A not-modified check refreshes the data's fetch time."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+            )
+            source.get_themes()
+            source._data_fetched_at = time.time() - 3600
+            source.get_themes()
+
+            fetched_at = source.status()["data_fetched_at"]
+            assert isinstance(fetched_at, float) and time.time() - fetched_at < 60
+
+    def test_changed_sheet_is_downloaded(self, mock_gspread_client, mock_service_account_file):
+        """A new modifiedTime triggers a full download."""
+        with patch("src.data_sources.sheets_source.service_account"):
+            source = GoogleSheetsDataSource(
+                sheet_id="test_sheet_id",
+                credentials_file=mock_service_account_file,
+                cache_ttl=0,
+            )
+            client = mock_gspread_client.return_value
+            source.get_themes()
+            client.http_client.get_file_drive_metadata.return_value = {
+                "modifiedTime": "2026-01-02T00:00:00.000Z"
+            }
+            source.get_themes()
+
+            assert client.open_by_key.call_count == 2
+            assert source.status()["remote_modified_time"] == "2026-01-02T00:00:00.000Z"
@@ -0,0 +1,110 @@
+"""Tests for idle chat eviction and bounded chat tracking."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from src.bot import build_application
+from src.bot.app import notify_going_offline
+from src.bot.constants import OFFLINE_MESSAGE, SESSION_STATS_KEY
+from src.bot.outbound import PRIORITY_BULK
+from src.bot.rate_limit import rate_limit
+from src.bot.session import mark_session_active, track_chat
+from src.bot.sweeper import (
+    evict_idle_chats,
+    evict_untracked_chats,
+    get_active_sessions,
+    get_tracked_chats,
+    sweep,
+)
+
+
+def _update(chat_id: int) -> Any:
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id))
+
+
+def _touch(app: Any, chat_id: int, at: float) -> None:
+    with patch("src.bot.session.time.monotonic", return_value=at):
+        track_chat(app, _update(chat_id))
+    app._chat_data[chat_id]["theme_id"] = "faith"
+
+
+def test_evicts_only_idle_chats():
+    app = build_application("123:TEST")
+    _touch(app, 1, at=0.0)
+    _touch(app, 2, at=50.0)
+    _touch(app, 1, at=90.0)  # chat 1 becomes the most recently active
+
+    assert evict_idle_chats(app, idle_ttl=60, now=120.0) == 1
+    assert list(get_tracked_chats(app)) == [1]
+    assert 2 not in app.chat_data
+    assert 1 in app.chat_data
+
+
+def test_rate_limited_handlers_track_their_chat():
+    app = build_application("123:TEST")
+
+    @rate_limit("command")
+    async def untracking_handler(update: Any, context: Any) -> None:
+        pass
+
+    context: Any = SimpleNamespace(application=app, chat_data=app._chat_data[7])
+    asyncio.run(untracking_handler(_update(7), context))
+    assert 7 in get_tracked_chats(app)
+    # The limiter's state survives a sweep while the chat is active
+    assert evict_idle_chats(app, idle_ttl=60) == 0
+    assert "rate_limit_command" in app.chat_data[7]
+
+
+def test_untracked_chat_data_is_dropped_once_at_startup():
+    app = build_application("123:TEST")
+    _touch(app, 1, at=0.0)
+    app._chat_data[2]["theme_id"] = "faith"
+
+    assert evict_idle_chats(app, idle_ttl=60, now=30.0) == 0
+    assert evict_untracked_chats(app) == 1
+    assert list(app.chat_data) == [1]
+
+
+def test_tracking_is_bounded_to_recent_chats():
+    app = build_application("123:TEST", max_tracked_chats=2)
+    for chat_id in (1, 2, 3):
+        _touch(app, chat_id, at=float(chat_id))
+
+    assert list(get_tracked_chats(app)) == [2, 3]
+    assert 1 not in app.chat_data
+
+
+def test_sweep_reports_counts():
+    app = build_application("123:TEST")
+    _touch(app, 1, at=0.0)
+    with patch("src.bot.sweeper.time.monotonic", return_value=10_000_000.0):
+        assert sweep(app, idle_ttl=60) == 1
+    assert app.bot_data[SESSION_STATS_KEY] == {
+        "evicted_total": 1,
+        "last_evicted": 1,
+        "resident": 0,
+        "tracked": 0,
+        "active_sessions": 0,
+    }
+
+
+def test_eviction_removes_chat_from_active_sessions():
+    app = build_application("123:TEST")
+    _touch(app, 1, at=0.0)
+    mark_session_active(app, _update(1))
+
+    evict_idle_chats(app, idle_ttl=60, now=120.0)
+    assert get_active_sessions(app) == set()
+
+
+def test_shutdown_notifies_only_active_sessions():
+    app = build_application("123:TEST")
+    for chat_id in (1, 2, 3):
+        _touch(app, chat_id, at=0.0)
+    mark_session_active(app, _update(2))
+
+    with patch.object(type(app.bot), "send_message", new_callable=AsyncMock) as send:
+        asyncio.run(notify_going_offline(app))
+    send.assert_awaited_once_with(chat_id=2, text=OFFLINE_MESSAGE, rate_limit_args=PRIORITY_BULK)
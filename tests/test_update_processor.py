@@ -0,0 +1,82 @@
+"""Tests for per-chat ordered concurrent update processing."""
+
+import asyncio
+from datetime import datetime, timezone
+
+from src.bot.update_processor import ChatOrderedUpdateProcessor
+from telegram import CallbackQuery, Chat, Message, Update, User
+
+
+def _tap(update_id: int, chat_id: int) -> Update:
+    user = User(id=chat_id, first_name="Test", is_bot=False)
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    message = Message(message_id=1, date=datetime.now(timezone.utc), chat=chat)
+    query = CallbackQuery(
+        id=str(update_id), from_user=user, chat_instance="test", data="next", message=message
+    )
+    return Update(update_id=update_id, callback_query=query)
+
+
+async def _process_all(processor: ChatOrderedUpdateProcessor, jobs: list) -> None:
+    tasks = [
+        asyncio.create_task(processor.process_update(update, coroutine))
+        for update, coroutine in jobs
+    ]
+    await asyncio.gather(*tasks)
+
+
+def test_same_chat_taps_neither_skip_nor_repeat():
+    session = {"index": 0}
+    shown: list[int] = []
+
+    async def next_card() -> None:
+        index = session["index"]
+        await asyncio.sleep(0)  # e.g. edit_message_text
+        shown.append(index)
+        session["index"] = index + 1
+
+    async def run() -> None:
+        processor = ChatOrderedUpdateProcessor(8)
+        await _process_all(processor, [(_tap(i, 1), next_card()) for i in range(5)])
+        assert processor.active_chats == 0
+
+    asyncio.run(run())
+    assert shown == [0, 1, 2, 3, 4]
+
+
+def test_other_chats_run_while_one_chat_is_slow():
+    events: list[str] = []
+
+    async def run() -> None:
+        processor = ChatOrderedUpdateProcessor(2)
+        release = asyncio.Event()
+
+        async def slow() -> None:
+            events.append("slow start")
+            await release.wait()
+            events.append("slow end")
+
+        async def queued_behind_slow() -> None:
+            events.append("same chat")
+
+        async def other_chat() -> None:
+            events.append("other chat")
+
+        async def unblock() -> None:
+            events.append("unblock")
+            release.set()
+
+        await _process_all(
+            processor,
+            [
+                (_tap(1, 1), slow()),
+                (_tap(2, 1), queued_behind_slow()),
+                (_tap(3, 2), unblock()),
+                (_tap(4, 3), other_chat()),
+            ],
+        )
+
+    asyncio.run(run())
+    # Chat 1's second update waits for its first without taking the free slot
+    assert events.index("unblock") < events.index("slow end") < events.index("same chat")
+    assert "other chat" in events
@@ -1,6 +1,15 @@
 """Test validation of theme data and callback data."""
 
-from src.bot.keyboards import is_valid_callback_data
+from unittest.mock import patch
+
+from src.bot.constants import CALLBACK_THEME_PREFIX
+from src.bot.keyboards import (
+    home_keyboard,
+    is_valid_callback_data,
+    navigation_keyboard,
+    theme_keyboard,
+)
+from src.data_sources import Theme, build_catalog
 
 
 class TestCallbackDataValidation:
@@ -54,3 +63,26 @@ class TestCallbackDataValidation:
         # Too many emojis should fail
         emoji_string_long = "theme:" + "🎲" * 15  # 66 bytes (exceeds 64)
         assert not is_valid_callback_data(emoji_string_long)
+
+
+class TestKeyboardCache:
+    """Test keyboards are built once and reused."""
+
+    def test_static_keyboards_are_shared(self):
+        """Test repeated calls return the same prebuilt markup."""
+        assert home_keyboard() is home_keyboard()
+        assert navigation_keyboard(show_back=False) is navigation_keyboard(show_back=False)
+        assert navigation_keyboard() is not navigation_keyboard(show_back=False)
+
+    def test_theme_keyboard_rebuilt_on_catalog_change(self):
+        """Test the theme keyboard is cached per catalog version."""
+        first = build_catalog([Theme(id="faith", label="Faith", description="")], [])
+        second = build_catalog([Theme(id="fun", label="Fun", description="")], [])
+
+        with patch("src.bot.keyboards.get_catalog", return_value=first):
+            keyboard = theme_keyboard()
+            assert theme_keyboard() is keyboard
+        with patch("src.bot.keyboards.get_catalog", return_value=second):
+            rebuilt = theme_keyboard()
+        assert rebuilt is not keyboard
+        assert rebuilt.inline_keyboard[0][0].callback_data == f"{CALLBACK_THEME_PREFIX}fun"
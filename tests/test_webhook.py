@@ -0,0 +1,37 @@
+"""Tests for webhook mode wiring."""
+
+from unittest.mock import patch
+
+import pytest
+from src.bot import build_application, run_webhook
+from src.bot.app import ALLOWED_UPDATES
+
+
+def test_rejects_secret_telegram_would_refuse():
+    with pytest.raises(ValueError):
+        build_application("123:TEST", secret="not allowed!")
+
+
+def test_run_webhook_verifies_secret_and_serves_url_path():
+    app = build_application("123:TEST", secret="s3cret-token_1")
+    with patch.object(type(app), "run_webhook") as serve:
+        run_webhook(app, "https://bot.example.com/hooks/telegram", port=8080, max_connections=80)
+
+    serve.assert_called_once_with(
+        listen="0.0.0.0",
+        port=8080,
+        url_path="hooks/telegram",
+        webhook_url="https://bot.example.com/hooks/telegram",
+        secret_token="s3cret-token_1",
+        max_connections=80,
+        allowed_updates=ALLOWED_UPDATES,
+    )
+
+
+def test_run_webhook_url_path_override():
+    app = build_application("123:TEST")
+    with patch.object(type(app), "run_webhook") as serve:
+        run_webhook(app, "https://bot.example.com/public", url_path="/internal/")
+
+    assert serve.call_args.kwargs["url_path"] == "internal"
+    assert serve.call_args.kwargs["secret_token"] is None